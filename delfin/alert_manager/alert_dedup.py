@@ -0,0 +1,183 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Deduplication and flap suppression of the alerts before they are exported.
+
+Alerts are grouped by storage, alert id, resource type and location. An
+alert of the same category as the last exported one of its group is not
+exported again within the repeat window. A group whose category changed
+flap_threshold times within the flap window is flapping, none of its
+alerts are exported until it settles down.
+
+The next exported alert of a group carries the number of alerts suppressed
+since the previous one in repeat_count. When a group settles down in a
+category other than the exported one, its last alert is exported by
+flush, so a clear received while flapping is not lost.
+
+The groups live in memory, they are bounded in number and the least
+recently seen ones are evicted first.
+"""
+
+import collections
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+alert_dedup_opts = [
+    cfg.BoolOpt('enabled',
+                default=True,
+                help='Whether repeated and flapping alerts are suppressed '
+                     'before they are exported.'),
+    cfg.IntOpt('repeat_window',
+               default=300,
+               min=0,
+               help='Seconds during which an alert repeating the last '
+                    'exported one is suppressed.'),
+    cfg.IntOpt('flap_window',
+               default=600,
+               min=0,
+               help='Seconds during which the category changes of an '
+                    'alert are counted to detect flapping.'),
+    cfg.IntOpt('flap_threshold',
+               default=4,
+               min=2,
+               help='Number of category changes within the flap window '
+                    'from which an alert is flapping.'),
+    cfg.IntOpt('max_entries',
+               default=100000,
+               min=1,
+               help='Maximum number of alerts tracked, the least recently '
+                    'received ones are forgotten first.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(alert_dedup_opts, group='alert_dedup')
+
+
+class _Entry(object):
+
+    def __init__(self, alert, now):
+        self.category = alert.get('category')
+        self.exported_category = self.category
+        self.exported_at = now
+        self.seen_at = now
+        # Times of the category changes within the flap window
+        self.changes = collections.deque()
+        # Last suppressed alert, and the number of suppressed alerts
+        self.pending = None
+        self.repeat_count = 0
+
+    def is_flapping(self, now):
+        while self.changes and \
+                self.changes[0] <= now - CONF.alert_dedup.flap_window:
+            self.changes.popleft()
+        return len(self.changes) >= CONF.alert_dedup.flap_threshold
+
+    def export(self, alert, now):
+        if self.repeat_count:
+            alert['repeat_count'] = self.repeat_count
+        self.exported_category = alert.get('category')
+        self.exported_at = now
+        self.pending = None
+        self.repeat_count = 0
+        return alert
+
+
+class AlertDeduplicator(object):
+    """Time windowed table of the last alerts of each group."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.received = 0
+        self.exported = 0
+        self.suppressed = 0
+        self.evicted = 0
+
+    @staticmethod
+    def get_key(alert):
+        return (alert.get('storage_id'), alert.get('alert_id'),
+                alert.get('resource_type'), alert.get('location'))
+
+    def process(self, alert):
+        """Return the alert to export, or None if it is suppressed."""
+        if not CONF.alert_dedup.enabled:
+            return alert
+
+        key = self.get_key(alert)
+        now = time.time()
+        with self._lock:
+            self.received += 1
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                entry = _Entry(alert, now)
+                self._add(key, entry)
+                self.exported += 1
+                return alert
+
+            self._entries[key] = entry
+            entry.seen_at = now
+            if alert.get('category') != entry.category:
+                entry.category = alert.get('category')
+                entry.changes.append(now)
+            repeated = entry.category == entry.exported_category and \
+                now - entry.exported_at < CONF.alert_dedup.repeat_window
+            if entry.is_flapping(now) or repeated:
+                entry.pending = alert
+                entry.repeat_count += 1
+                self.suppressed += 1
+                return None
+            self.exported += 1
+            return entry.export(alert, now)
+
+    def _add(self, key, entry):
+        self._entries[key] = entry
+        while len(self._entries) > CONF.alert_dedup.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def flush(self):
+        """Return the alerts to export of the groups which settled down.
+
+        The groups not seen for longer than both windows are forgotten.
+        """
+        now = time.time()
+        expires_at = now - max(CONF.alert_dedup.repeat_window,
+                               CONF.alert_dedup.flap_window)
+        alerts = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.pending is not None and \
+                        entry.category != entry.exported_category and \
+                        not entry.is_flapping(now):
+                    alerts.append(entry.export(entry.pending, now))
+                    self.exported += 1
+                elif entry.seen_at <= expires_at:
+                    del self._entries[key]
+        return alerts
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'received': self.received,
+                'exported': self.exported,
+                'suppressed': self.suppressed,
+                'evicted': self.evicted,
+            }
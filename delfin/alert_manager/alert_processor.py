@@ -17,6 +17,7 @@ from oslo_log import log
 from delfin import context
 from delfin import db
 from delfin import exception
+from delfin.alert_manager import alert_dedup
 from delfin.common import alert_util
 from delfin.drivers import api as driver_manager
 from delfin.exporter import base_exporter
@@ -30,11 +31,12 @@ class AlertProcessor(object):
     def __init__(self):
         self.driver_manager = driver_manager.API()
         self.exporter_manager = base_exporter.AlertExporterManager()
+        self.deduplicator = alert_dedup.AlertDeduplicator()
 
     def process_alert_info(self, alert):
         """Fills alert model using driver manager interface."""
         ctxt = context.get_admin_context()
-        storage = db.storage_get(ctxt, alert['storage_id'])
+        storage = db.storage_get_cached(ctxt, alert['storage_id'])
 
         try:
             alert_model = self.driver_manager.parse_alert(ctxt,
@@ -47,5 +49,20 @@ class AlertProcessor(object):
             raise exception.InvalidResults(
                 "Failed to fill the alert model from driver.")
 
+        alert_model = self.deduplicator.process(alert_model)
+        if alert_model is None:
+            LOG.debug("Suppressed repeated alert of storage %s.",
+                      alert['storage_id'])
+            return
+
         # Export to base exporter which handles dispatch for all exporters
         self.exporter_manager.dispatch(ctxt, alert_model)
+
+    def flush_suppressed_alerts(self):
+        """Exports the last alerts of the alerts which stopped flapping."""
+        alerts = self.deduplicator.flush()
+        if not alerts:
+            return
+        ctxt = context.get_admin_context()
+        for alert_model in alerts:
+            self.exporter_manager.dispatch(ctxt, alert_model)
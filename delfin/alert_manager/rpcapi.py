@@ -46,6 +46,12 @@ class AlertAPI(object):
                                  snmp_config_to_del=snmp_config_to_del,
                                  snmp_config_to_add=snmp_config_to_add)
 
+    def invalidate_db_cache(self, ctxt, storage_id):
+        call_context = self.client.prepare(version='1.0', fanout=True)
+        return call_context.cast(ctxt,
+                                 'invalidate_db_cache',
+                                 storage_id=storage_id)
+
     def check_snmp_config(self, ctxt, snmp_config):
         call_context = self.client.prepare(version='1.0')
         return call_context.cast(ctxt,
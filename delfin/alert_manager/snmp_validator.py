@@ -162,7 +162,7 @@ class SNMPValidator(object):
     def _handle_validation_result(self, ctxt, storage_id,
                                   category=constants.Category.FAULT):
         try:
-            storage = db.storage_get(ctxt, storage_id)
+            storage = db.storage_get_cached(ctxt, storage_id)
             serial_number = storage.get('serial_number')
             if category == constants.Category.FAULT:
                 self.snmp_error_flag[serial_number] = True
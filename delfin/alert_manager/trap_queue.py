@@ -0,0 +1,301 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bounded queue between the trap listener and the trap processing workers.
+
+The pysnmp dispatcher only decodes a trap and puts it in the queue, green
+thread workers take the traps out and process them, so a slow exporter or
+database does not stall the socket.
+
+When the queue is full, the oldest queued trap is dropped, or with the
+spill-to-disk policy, traps are appended to segment files in a directory
+of the process under the spill path. Once traps are spilled, the following
+ones are spilled too until the workers read the segments back, so the
+traps are processed in the order they were received. When the queue
+starts, it takes over the segments left by the processes which are not
+running anymore and processes them first.
+"""
+
+import collections
+import errno
+import json
+import os
+import threading
+
+import eventlet
+import six
+from eventlet import semaphore
+from oslo_config import cfg
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+DROP_OLDEST = 'drop-oldest'
+SPILL_TO_DISK = 'spill-to-disk'
+
+trap_queue_opts = [
+    cfg.IntOpt('max_size',
+               default=100000,
+               min=1,
+               help='Maximum number of traps queued in memory waiting to '
+                    'be processed.'),
+    cfg.IntOpt('workers',
+               default=16,
+               min=1,
+               help='Number of green threads processing the queued traps.'),
+    cfg.StrOpt('overflow_policy',
+               default=DROP_OLDEST,
+               choices=[DROP_OLDEST, SPILL_TO_DISK],
+               help='What to do with a trap received while the queue is '
+                    'full: drop the oldest queued trap, or spill the traps '
+                    'to disk until the workers catch up.'),
+    cfg.StrOpt('spill_path',
+               default='$state_path/trap_spill',
+               help='Directory of the traps spilled to disk.'),
+    cfg.IntOpt('spill_max_size',
+               default=1000000,
+               min=1,
+               help='Maximum number of traps spilled to disk, traps '
+                    'received above it are dropped.'),
+    cfg.IntOpt('spill_segment_size',
+               default=1000,
+               min=1,
+               help='Number of traps in one spill file, the workers read '
+                    'the spilled traps back one file at a time.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(trap_queue_opts, group='trap_queue')
+
+SEGMENT_SUFFIX = '.json'
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+class TrapQueue(object):
+    """Bounded FIFO of traps processed by a pool of green threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._traps = collections.deque()
+        # Released once per queued trap, in memory or on disk
+        self._available = semaphore.Semaphore(0)
+        self._workers = []
+        self._stopped = False
+        # Sequence numbers of the spill segments, oldest first
+        self._segments = collections.deque()
+        self._next_segment = 0
+        self._segment_size = 0
+        self._on_disk = 0
+        self.received = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.processed = 0
+        self.failed = 0
+
+    @staticmethod
+    def _get_spill_dir():
+        # The queue may be created before the trap listener processes are
+        # forked, the directory is that of the calling process.
+        return os.path.join(CONF.trap_queue.spill_path, str(os.getpid()))
+
+    def _get_segment_file(self, segment):
+        return os.path.join(self._get_spill_dir(),
+                            '%020d%s' % (segment, SEGMENT_SUFFIX))
+
+    @staticmethod
+    def _list_segments(spill_dir):
+        segments = []
+        for file_name in os.listdir(spill_dir):
+            name, suffix = os.path.splitext(file_name)
+            if suffix == SEGMENT_SUFFIX and name.isdigit():
+                segments.append(int(name))
+        return sorted(segments)
+
+    def _add_segment(self, segment):
+        with open(self._get_segment_file(segment)) as f:
+            count = sum(1 for _ in f)
+        self._segments.append(segment)
+        self._next_segment = segment + 1
+        self._on_disk += count
+        for _ in range(count):
+            self._available.release()
+
+    def _load_segments(self):
+        """Pick up the traps spilled and not processed by previous runs."""
+        spill_path = CONF.trap_queue.spill_path
+        if not os.path.isdir(spill_path):
+            return
+        own_dir = self._get_spill_dir()
+        if os.path.isdir(own_dir):
+            for segment in self._list_segments(own_dir):
+                self._add_segment(segment)
+
+        for name in sorted(os.listdir(spill_path)):
+            spill_dir = os.path.join(spill_path, name)
+            if not name.isdigit() or spill_dir == own_dir or \
+                    not os.path.isdir(spill_dir) or _is_running(int(name)):
+                continue
+            if not os.path.isdir(own_dir):
+                os.makedirs(own_dir, 0o700)
+            for segment in self._list_segments(spill_dir):
+                try:
+                    os.rename(os.path.join(spill_dir, '%020d%s' % (
+                        segment, SEGMENT_SUFFIX)),
+                        self._get_segment_file(self._next_segment))
+                except OSError:
+                    # Taken over by another process
+                    continue
+                self._add_segment(self._next_segment)
+            try:
+                os.rmdir(spill_dir)
+            except OSError:
+                pass
+
+        if self._segments:
+            # Never append to a segment of a previous run
+            self._segment_size = CONF.trap_queue.spill_segment_size
+            LOG.info('Found %s traps spilled to disk.', self._on_disk)
+
+    def _spill(self, trap):
+        if self._on_disk >= CONF.trap_queue.spill_max_size:
+            return False
+        if not self._segments or \
+                self._segment_size >= CONF.trap_queue.spill_segment_size:
+            if not os.path.isdir(self._get_spill_dir()):
+                os.makedirs(self._get_spill_dir(), 0o700)
+            self._segments.append(self._next_segment)
+            self._next_segment += 1
+            self._segment_size = 0
+        with open(self._get_segment_file(self._segments[-1]), 'a') as f:
+            f.write(json.dumps(trap) + '\n')
+        self._segment_size += 1
+        self._on_disk += 1
+        self.spilled += 1
+        return True
+
+    def _read_segment(self):
+        """Move the oldest spill segment back to memory."""
+        segment = self._segments.popleft()
+        if not self._segments:
+            # The next spilled trap must not go to the segment read here
+            self._segment_size = CONF.trap_queue.spill_segment_size
+        file_name = self._get_segment_file(segment)
+        with open(file_name) as f:
+            traps = [json.loads(line) for line in f]
+        os.remove(file_name)
+        self._traps.extend(traps)
+        self._on_disk = max(self._on_disk - len(traps), 0)
+
+    def put(self, trap):
+        """Queue a trap, never blocks.
+
+        :param trap: JSON serializable dict describing the trap
+        """
+        with self._lock:
+            self.received += 1
+            full = len(self._traps) >= CONF.trap_queue.max_size
+            if CONF.trap_queue.overflow_policy == SPILL_TO_DISK and \
+                    (full or self._segments):
+                try:
+                    queued = self._spill(trap)
+                except (IOError, OSError, ValueError) as e:
+                    LOG.error('Failed to spill trap to disk: %s',
+                              six.text_type(e))
+                    queued = False
+                if not queued:
+                    self.dropped += 1
+                    return
+            elif full:
+                # The trap takes the place of the oldest one
+                self._traps.popleft()
+                self._traps.append(trap)
+                self.dropped += 1
+                return
+            else:
+                self._traps.append(trap)
+        self._available.release()
+
+    def get(self):
+        """Return the oldest queued trap, wait for one if none is queued.
+
+        :returns: the trap, or None once the queue is stopped
+        """
+        self._available.acquire()
+        with self._lock:
+            if self._stopped:
+                return None
+            if not self._traps and self._segments:
+                try:
+                    self._read_segment()
+                except (IOError, OSError, ValueError) as e:
+                    LOG.error('Failed to read traps spilled to disk: %s',
+                              six.text_type(e))
+            if not self._traps:
+                return None
+            return self._traps.popleft()
+
+    def _work(self, handler):
+        while not self._stopped:
+            trap = self.get()
+            if trap is None:
+                continue
+            try:
+                handler(trap)
+            except Exception as e:
+                LOG.exception('Failed to process trap: %s',
+                              six.text_type(e))
+                with self._lock:
+                    self.failed += 1
+            else:
+                with self._lock:
+                    self.processed += 1
+
+    def start(self, handler):
+        """Start the workers calling handler with each queued trap."""
+        self._stopped = False
+        with self._lock:
+            try:
+                self._load_segments()
+            except (IOError, OSError) as e:
+                LOG.error('Failed to load traps spilled to disk: %s',
+                          six.text_type(e))
+        self._workers = [eventlet.spawn(self._work, handler)
+                         for _ in range(CONF.trap_queue.workers)]
+
+    def stop(self):
+        """Stop the workers, the traps still queued in memory are lost."""
+        self._stopped = True
+        for _ in self._workers:
+            self._available.release()
+        self._workers = []
+
+    def get_stats(self):
+        """Return the trap counters and the current queue depth."""
+        with self._lock:
+            return {
+                'received': self.received,
+                'queued': len(self._traps) + self._on_disk,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'processed': self.processed,
+                'failed': self.failed,
+            }
@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import socket
+import threading
+
 import six
+from oslo_concurrency import lockutils
+from oslo_config import cfg
 from oslo_log import log
 from oslo_service import periodic_task
 from pysnmp.carrier.asyncore.dgram import udp
@@ -29,11 +34,14 @@ from delfin.alert_manager import alert_processor
 from delfin.alert_manager import constants
 from delfin.alert_manager import rpcapi
 from delfin.alert_manager import snmp_validator
+from delfin.alert_manager import trap_queue
 from delfin.common import constants as common_constants
 from delfin.db import api as db_api
+from delfin.db import cache as db_cache
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
 
 
 class TrapReceiver(manager.Manager):
@@ -49,6 +57,15 @@ class TrapReceiver(manager.Manager):
         self.alert_processor = alert_processor.AlertProcessor()
         self.snmp_validator = snmp_validator.SNMPValidator()
         self.alert_rpc_api = rpcapi.AlertAPI()
+        self.trap_queue = trap_queue.TrapQueue()
+        # Index of the configured alert sources, so that routing a trap
+        # needs no database query.
+        # host -> {storage_id: alert source with decoded community string}
+        self._alert_sources = {}
+        # storage_id -> host of its alert source
+        self._alert_source_hosts = {}
+        self._alert_sources_lock = threading.Lock()
+        self._heart_beat_lock = None
         super(TrapReceiver, self).__init__(host=kwargs.get('host'))
 
     def sync_snmp_config(self, ctxt, snmp_config_to_del=None,
@@ -65,6 +82,7 @@ class TrapReceiver(manager.Manager):
         storage_id = new_config.get("storage_id")
         version_int = self._get_snmp_version_int(ctxt,
                                                  new_config.get("version"))
+        alert_source = dict(new_config)
         if version_int == constants.SNMP_V2_INT or \
                 version_int == constants.SNMP_V1_INT:
             community_string = cryptor.decode(
@@ -72,6 +90,7 @@ class TrapReceiver(manager.Manager):
             community_index = self._get_community_index(storage_id)
             config.addV1System(self.snmp_engine, community_index,
                                community_string, contextName=community_string)
+            alert_source['community_string'] = community_string
         else:
             username = new_config.get("username")
             engine_id = new_config.get("engine_id")
@@ -96,9 +115,11 @@ class TrapReceiver(manager.Manager):
                 privProtocol=self._get_usm_priv_protocol(ctxt,
                                                          privacy_protocol),
                 securityEngineId=engine_id)
+        self._index_alert_source(alert_source)
 
     def _delete_snmp_config(self, ctxt, snmp_config):
         LOG.info("Start to remove snmp trap config.")
+        self._unindex_alert_source(snmp_config.get('storage_id'))
         version_int = self._get_snmp_version_int(ctxt,
                                                  snmp_config.get("version"))
         if version_int == constants.SNMP_V3_INT:
@@ -161,82 +182,116 @@ class TrapReceiver(manager.Manager):
 
     def _add_transport(self):
         """Configures the transport parameters for the snmp engine."""
+        transport = udp.UdpTransport()
+        if CONF.trap_receiver_workers > 1:
+            # Every trap receiver process binds the port, the kernel picks
+            # one of them by the address of the sender, so the traps of a
+            # storage keep their order.
+            if not hasattr(socket, 'SO_REUSEPORT'):
+                raise ValueError("SO_REUSEPORT is not supported, set "
+                                 "trap_receiver_workers to 1.")
+            transport.socket.setsockopt(socket.SOL_SOCKET,
+                                        socket.SO_REUSEPORT, 1)
         try:
             config.addTransport(
                 self.snmp_engine,
                 udp.domainName,
-                udp.UdpTransport().openServerMode(
+                transport.openServerMode(
                     (self.trap_receiver_address, int(self.trap_receiver_port)))
             )
         except Exception:
             raise ValueError("Port binding failed: Port is in use.")
 
-    @staticmethod
-    def _get_alert_source_by_host(source_ip):
-        """Gets alert source for given source ip address."""
-        filters = {'host': source_ip}
-        ctxt = context.RequestContext()
-
-        # Using the known filter and db exceptions are handled by api
-        alert_source = db.alert_source_get_all(ctxt, filters=filters)
-        if not alert_source:
+    def _index_alert_source(self, alert_source):
+        storage_id = alert_source.get('storage_id')
+        with self._alert_sources_lock:
+            self._unindex_alert_source_locked(storage_id)
+            host = alert_source.get('host')
+            if host:
+                self._alert_sources.setdefault(host, {})[storage_id] = \
+                    alert_source
+                self._alert_source_hosts[storage_id] = host
+
+    def _unindex_alert_source(self, storage_id):
+        with self._alert_sources_lock:
+            self._unindex_alert_source_locked(storage_id)
+
+    def _unindex_alert_source_locked(self, storage_id):
+        host = self._alert_source_hosts.pop(storage_id, None)
+        if host is None:
+            return
+        alert_sources = self._alert_sources.get(host, {})
+        alert_sources.pop(storage_id, None)
+        if not alert_sources:
+            self._alert_sources.pop(host, None)
+
+    def _get_alert_source_by_host(self, source_ip):
+        """Gets alert source for given source ip address.
+
+        The community string of the returned alert source is decoded.
+        """
+        alert_sources = list(self._alert_sources.get(source_ip, {}).values())
+        if not alert_sources:
             raise exception.AlertSourceNotFoundWithHost(source_ip)
 
         # This is to make sure unique host is configured each alert source
-        if len(alert_source) > 1:
+        if len(alert_sources) > 1:
             msg = (_("Failed to get unique alert source with host %s.")
                    % source_ip)
             raise exception.InvalidResults(msg)
 
-        return alert_source[0]
+        return alert_sources[0]
 
     def _cb_fun(self, state_reference, context_engine_id, context_name,
                 var_binds, cb_ctx):
-        """Callback function to process the incoming trap."""
+        """Callback function queuing the incoming trap.
+
+        It runs on the pysnmp dispatcher loop, so it only decodes the trap,
+        the trap queue workers process it.
+        """
         exec_context = self.snmp_engine.observer.getExecutionContext(
             'rfc3412.receiveMessage:request')
         LOG.debug("Get notification from: %s" %
                   "#".join([str(x) for x in exec_context['transportAddress']]))
-        alert = {}
-
-        try:
+        self.trap_queue.put({
             # transportAddress contains both ip and port, extract ip address
-            source_ip = exec_context['transportAddress'][0]
-            alert_source = self._get_alert_source_by_host(source_ip)
-
-            # In case of non v3 version, community string is used to map the
-            # trap. Pysnmp library helps to filter traps whose community string
-            # are not configured. But if a given community name x is configured
-            # for storage1, if the trap is received with x from storage 2,
-            # library will allow the trap. So for non v3 version, we need to
-            # verify that community name is configured at alert source db for
-            # the storage which is sending traps.
-            # context_name contains the incoming community string value
-            if exec_context['securityModel'] != constants.SNMP_V3_INT \
-                    and cryptor.decode(alert_source['community_string']) \
-                    != str(context_name):
-                msg = (_("Community string not matching with alert source %s, "
-                         "dropping it.") % source_ip)
-                raise exception.InvalidResults(msg)
-
-            for oid, val in var_binds:
-                # Fill raw oid and values
-                oid_str = str(oid)
-                alert[oid_str] = str(val)
-
-            # Fill additional info to alert info
-            alert['transport_address'] = source_ip
-            alert['storage_id'] = alert_source['storage_id']
-
-            # Handover to alert processor for model translation and export
-            self.alert_processor.process_alert_info(alert)
-        except exception.DelfinException as e:
-            # Log and end the trap processing error flow
-            err_msg = _("Failed to process alert report (%s).") % e.msg
-            LOG.exception(err_msg)
-        except Exception as e:
-            err_msg = six.text_type(e)
-            LOG.exception(err_msg)
+            'source_ip': exec_context['transportAddress'][0],
+            'security_model': exec_context['securityModel'],
+            'context_name': str(context_name),
+            'var_binds': [(str(oid), str(val)) for oid, val in var_binds],
+        })
+
+    def _process_trap(self, trap):
+        """Route a queued trap to its storage and process it.
+
+        Errors are logged and counted by the trap queue.
+        """
+        source_ip = trap['source_ip']
+        alert_source = self._get_alert_source_by_host(source_ip)
+
+        # In case of non v3 version, community string is used to map the
+        # trap. Pysnmp library helps to filter traps whose community string
+        # are not configured. But if a given community name x is configured
+        # for storage1, if the trap is received with x from storage 2,
+        # library will allow the trap. So for non v3 version, we need to
+        # verify that community name is configured at alert source db for
+        # the storage which is sending traps.
+        # context_name contains the incoming community string value
+        if trap['security_model'] != constants.SNMP_V3_INT \
+                and alert_source['community_string'] != trap['context_name']:
+            msg = (_("Community string not matching with alert source %s, "
+                     "dropping it.") % source_ip)
+            raise exception.InvalidResults(msg)
+
+        # Fill raw oid and values
+        alert = dict(trap['var_binds'])
+
+        # Fill additional info to alert info
+        alert['transport_address'] = source_ip
+        alert['storage_id'] = alert_source['storage_id']
+
+        # Handover to alert processor for model translation and export
+        self.alert_processor.process_alert_info(alert)
 
     def _load_snmp_config(self):
         """Load snmp config from database when service start."""
@@ -274,6 +329,8 @@ class TrapReceiver(manager.Manager):
 
             snmp_engine.transportDispatcher.jobStarted(
                 constants.SNMP_DISPATCHER_JOB_ID)
+
+            self.trap_queue.start(self._process_trap)
         except Exception as e:
             LOG.error(e)
             raise ValueError("Failed to setup for trap listener.")
@@ -291,16 +348,51 @@ class TrapReceiver(manager.Manager):
         # process as it is shutdown
         if self.snmp_engine:
             self.snmp_engine.transportDispatcher.closeDispatcher()
+        self.trap_queue.stop()
         LOG.info("Trap receiver stopped.")
 
+    def _is_heart_beat_process(self):
+        """Whether this process checks the alert sources of the node.
+
+        Only one of the trap receiver processes does, the one holding the
+        heart beat lock. Another one takes over when it is gone.
+        """
+        if CONF.trap_receiver_workers <= 1:
+            return True
+        if self._heart_beat_lock is None:
+            self._heart_beat_lock = lockutils.external_lock(
+                'heart-beat', lock_file_prefix='delfin-alert-',
+                lock_path=CONF.state_path)
+        if not self._heart_beat_lock.acquired:
+            self._heart_beat_lock.acquire(blocking=False)
+        return self._heart_beat_lock.acquired
+
     @periodic_task.periodic_task(spacing=1800, run_immediately=True)
     def heart_beat_task_spawn(self, ctxt):
         """Periodical task to spawn snmp heart beat check."""
+        if not self._is_heart_beat_process():
+            return
         LOG.info("Spawn the snmp heart beat check task.")
         alert_source_list = db.alert_source_get_all(ctxt)
         for alert_source in alert_source_list:
             self.alert_rpc_api.check_snmp_config(ctxt, alert_source)
 
+    @periodic_task.periodic_task(spacing=60)
+    def flush_suppressed_alerts(self, ctxt):
+        self.alert_processor.flush_suppressed_alerts()
+
+    def get_stats(self):
+        stats = super(TrapReceiver, self).get_stats()
+        stats.update({
+            'trap_queue': self.trap_queue.get_stats(),
+            'alert_dedup': self.alert_processor.deduplicator.get_stats(),
+        })
+        return stats
+
+    def invalidate_db_cache(self, ctxt, storage_id):
+        LOG.debug('Invalidate cached rows of storage %s.', storage_id)
+        db_cache.invalidate(storage_id)
+
     def check_snmp_config(self, ctxt, snmp_config):
         LOG.info("Received snmp config checking request for "
                  "storage: %s", snmp_config['storage_id'])
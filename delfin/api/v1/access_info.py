@@ -13,12 +13,14 @@
 # limitations under the License.
 from delfin import db
 from delfin import cryptor
+from delfin.alert_manager import rpcapi as alert_rpcapi
 from delfin.api import validation
 from delfin.api.common import wsgi
 from delfin.api.schemas import access_info as schema_access_info
 from delfin.api.views import access_info as access_info_viewer
 from delfin.common import constants
 from delfin.drivers import api as driverapi
+from delfin.task_manager import rpcapi as task_rpcapi
 
 
 class AccessInfoController(wsgi.Controller):
@@ -27,6 +29,8 @@ class AccessInfoController(wsgi.Controller):
         super(AccessInfoController, self).__init__()
         self._view_builder = access_info_viewer.ViewBuilder()
         self.driver_api = driverapi.API()
+        self.task_rpcapi = task_rpcapi.TaskAPI()
+        self.alert_rpcapi = alert_rpcapi.AlertAPI()
 
     def show(self, req, id):
         """Show access information by storage id."""
@@ -46,6 +50,8 @@ class AccessInfoController(wsgi.Controller):
             if body.get(access):
                 access_info[access].update(body[access])
         access_info = self.driver_api.update_access_info(ctxt, access_info)
+        self.task_rpcapi.invalidate_db_cache(ctxt, id)
+        self.alert_rpcapi.invalidate_db_cache(ctxt, id)
         return self._view_builder.show(access_info)
 
 
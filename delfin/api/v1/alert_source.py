@@ -54,6 +54,7 @@ class AlertSourceController(wsgi.Controller):
         snmp_config_to_add = alert_source
         self.alert_rpcapi.sync_snmp_config(ctx, snmp_config_to_del,
                                            snmp_config_to_add)
+        self.alert_rpcapi.invalidate_db_cache(ctx, id)
 
         return alert_view.build_alert_source(alert_source.to_dict())
 
@@ -73,6 +74,7 @@ class AlertSourceController(wsgi.Controller):
             self.alert_rpcapi.sync_snmp_config(ctx, snmp_config_to_del,
                                                None)
             db.alert_source_delete(ctx, id)
+            self.alert_rpcapi.invalidate_db_cache(ctx, id)
         else:
             raise exception.AlertSourceNotFound(id)
 
@@ -39,6 +39,11 @@ class APIRouter(common.APIRouter):
                        action="sync_all",
                        conditions={"method": ["POST"]})
 
+        mapper.connect("storages", "/storages/{id}/circuit-breaker",
+                       controller=self.resources['storages'],
+                       action="circuit_breaker",
+                       conditions={"method": ["GET"]})
+
         self.resources['access_info'] = access_info.create_resource()
         mapper.connect("storages", "/storages/{id}/access-info",
                        controller=self.resources['access_info'],
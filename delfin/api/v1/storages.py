@@ -16,7 +16,6 @@ import copy
 
 from oslo_config import cfg
 from oslo_log import log
-from oslo_utils import timeutils
 
 from delfin import coordination
 from delfin import db
@@ -68,6 +67,13 @@ class StorageController(wsgi.Controller):
         storage = db.storage_get(ctxt, id)
         return storage_view.build_storage(storage)
 
+    def circuit_breaker(self, req, id):
+        """Show the circuit breaker state of a storage in the API."""
+        ctxt = req.environ['delfin.context']
+        storage = db.storage_get(ctxt, id)
+        state = self.driver_api.get_circuit_state(ctxt, storage['id'])
+        return storage_view.build_circuit_breaker(state)
+
     @wsgi.response(201)
     @validation.schema(schema_storages.create)
     def create(self, req, body):
@@ -132,7 +138,7 @@ class StorageController(wsgi.Controller):
 
         for storage in storages:
             try:
-                _set_synced_if_ok(ctxt, storage['id'], resource_count)
+                resources.set_synced_if_ok(ctxt, storage['id'], resource_count)
             except exception.InvalidInput as e:
                 LOG.warn('Can not start new sync task for %s, reason is %s'
                          % (storage['id'], e.msg))
@@ -155,7 +161,7 @@ class StorageController(wsgi.Controller):
         ctxt = req.environ['delfin.context']
         storage = db.storage_get(ctxt, id)
         resource_count = len(resources.StorageResourceTask.__subclasses__())
-        _set_synced_if_ok(ctxt, storage['id'], resource_count)
+        resources.set_synced_if_ok(ctxt, storage['id'], resource_count)
         for subclass in resources.StorageResourceTask.__subclasses__():
             self.task_rpcapi.sync_storage_resource(
                 ctxt,
@@ -195,27 +201,3 @@ class StorageController(wsgi.Controller):
 
 def create_resource():
     return wsgi.Resource(StorageController())
-
-
-@coordination.synchronized('{storage_id}')
-def _set_synced_if_ok(context, storage_id, resource_count):
-    try:
-        storage = db.storage_get(context, storage_id)
-    except exception.StorageNotFound:
-        msg = 'Storage %s not found when try to set sync_status' \
-              % storage_id
-        raise exception.InvalidInput(message=msg)
-    else:
-        last_update = storage['updated_at'] or storage['created_at']
-        current_time = timeutils.utcnow()
-        interval = (current_time - last_update).seconds
-        # If last synchronization was within
-        # CONF.sync_task_expiration(in seconds), and the sync status
-        # is bigger than 0, it means some sync task is still running,
-        # the new sync task should not launch
-        if interval < CONF.sync_task_expiration and \
-                storage['sync_status'] > 0:
-            raise exception.StorageIsSyncing(storage['id'])
-        storage['sync_status'] = resource_count * constants.ResourceSync.START
-        storage['updated_at'] = current_time
-        db.storage_update(context, storage['id'], storage)
@@ -30,3 +30,7 @@ def build_storage(storage):
     else:
         view['sync_status'] = 'SYNCING'
     return dict(view)
+
+
+def build_circuit_breaker(state):
+    return dict(circuit_breaker=dict(state))
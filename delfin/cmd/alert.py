@@ -44,7 +44,7 @@ def main():
 
     # Launch alert manager service
     alert_manager = service.AlertService.create(binary='delfin-alert')
-    service.serve(alert_manager)
+    service.serve(alert_manager, workers=CONF.trap_receiver_workers)
     service.wait()
 
 
@@ -91,6 +91,15 @@ global_opts = [
     cfg.IntOpt('sync_task_expiration',
                default=1800,
                help='Sync task expiration in seconds.'),
+    cfg.BoolOpt('paged_sync_enabled',
+                default=False,
+                help='Whether volumes are synced page by page, so that '
+                     'the memory used by a sync task does not grow with '
+                     'the number of volumes of a storage.'),
+    cfg.IntOpt('sync_page_size',
+               default=1000,
+               help='Number of volumes reconciled at once when paged '
+                    'sync is enabled.'),
     cfg.BoolOpt('snmp_validation_enabled',
                 default=True,
                 help='Whether alert source configuration to be validated '
@@ -13,6 +13,8 @@
 """Tooz Coordination and locking utilities."""
 
 import inspect
+import threading
+import time
 
 import decorator
 from oslo_config import cfg
@@ -20,6 +22,7 @@ from oslo_log import log
 from oslo_utils import uuidutils
 import six
 from tooz import coordination
+from tooz import hashring
 from tooz import locking
 
 from delfin import cryptor
@@ -45,7 +48,19 @@ coordination_opts = [
                help='The backend server for distributed coordination.'),
     cfg.IntOpt('expiration',
                default=100,
-               help='The expiration(in second) of the lock.')
+               help='The expiration(in second) of the lock.'),
+    cfg.BoolOpt('partition_enabled',
+                default=False,
+                help='Whether storages are partitioned across task managers '
+                     'with a consistent hash ring of the task manager group '
+                     'members, so that each storage is always handled by '
+                     'the same task manager. The backend must support '
+                     'group membership.'),
+    cfg.IntOpt('partition_refresh_interval',
+               default=10,
+               min=1,
+               help='Seconds the members of the task manager group are '
+                    'cached before they are read again from the backend.'),
 ]
 
 CONF = cfg.CONF
@@ -112,6 +127,112 @@ class Coordinator(object):
 LOCK_COORDINATOR = Coordinator(prefix='delfin-')
 
 
+class ConsistentHashing(object):
+    """Consistent hash ring of the members of a coordination group.
+
+    Members join the group with their host name, every process can then
+    map a key, e.g. a storage id, to the host owning it. Only a few keys
+    move to another host when a member joins or leaves the group.
+
+    :param str group_id: The coordination group name.
+    :param coordinator: Coordinator object used to read the group members.
+        Defaults to the global coordinator.
+    """
+
+    MEMBER_PREFIX = 'delfin-member-'
+
+    def __init__(self, group_id, coordinator=None):
+        self.group_id = group_id.encode('ascii')
+        self.coordinator = coordinator or LOCK_COORDINATOR
+        self.member = None
+        self._lock = threading.Lock()
+        self._members = frozenset()
+        self._ring = None
+        self._refreshed_at = None
+
+    def join(self, host):
+        """Join the group as host.
+
+        The membership uses its own coordinator, whose member id is built
+        from the host name, so that the group members are the hosts to
+        direct RPC messages to.
+        """
+        if self.member:
+            return
+        member = Coordinator(agent_id=host, prefix=self.MEMBER_PREFIX)
+        member.start()
+        try:
+            member.coordinator.create_group(self.group_id).get()
+        except coordination.GroupAlreadyExist:
+            pass
+        try:
+            member.coordinator.join_group(self.group_id).get()
+        except coordination.MemberAlreadyExist:
+            pass
+        self.member = member
+        LOG.info('Host %(host)s joined group %(group)s.',
+                 {'host': host, 'group': self.group_id})
+
+    def leave(self):
+        """Leave the group and stop the membership coordinator."""
+        if not self.member:
+            return
+        try:
+            self.member.coordinator.leave_group(self.group_id).get()
+        except (coordination.GroupNotCreated,
+                coordination.MemberNotJoined):
+            pass
+        self.member.stop()
+        self.member = None
+
+    def _get_coordinator(self):
+        if self.member:
+            return self.member.coordinator
+        if not self.coordinator.started:
+            raise exception.CoordinatorNotStarted()
+        return self.coordinator.coordinator
+
+    def get_members(self, refresh=False):
+        """Return the hosts of the group, cached for a while."""
+        now = time.time()
+        with self._lock:
+            if not refresh and self._refreshed_at is not None and \
+                    now - self._refreshed_at < \
+                    CONF.coordination.partition_refresh_interval:
+                return self._members
+
+            try:
+                member_ids = self._get_coordinator().get_members(
+                    self.group_id).get()
+            except coordination.GroupNotCreated:
+                member_ids = set()
+
+            members = frozenset(
+                member_id.decode('ascii')[len(self.MEMBER_PREFIX):]
+                for member_id in member_ids)
+            if members != self._members:
+                LOG.info('Members of group %(group)s changed to '
+                         '%(members)s.',
+                         {'group': self.group_id,
+                          'members': sorted(members)})
+                self._members = members
+                self._ring = hashring.HashRing(members) if members else None
+            self._refreshed_at = now
+            return self._members
+
+    def get_owner(self, key):
+        """Return the host owning key, None if the group is empty."""
+        self.get_members()
+        ring = self._ring
+        if ring is None:
+            return None
+        nodes = ring.get_nodes(key.encode('utf-8'))
+        return next(iter(nodes))
+
+
+TASK_HASH_RING = ConsistentHashing('delfin-task')
+
+
 class Lock(locking.Lock):
     """Lock with dynamic name.
 
@@ -44,10 +44,16 @@ these objects be simple dictionaries.
 from oslo_config import cfg
 from oslo_db import api as db_api
 
+from delfin.db import cache
+
 db_opts = [
     cfg.StrOpt('db_backend',
                default='sqlalchemy',
                help='The backend to use for database.'),
+    cfg.IntOpt('bulk_batch_size',
+               default=1000,
+               help='Maximum number of rows handled by one statement in '
+                    'bulk create, update and delete operations.'),
 ]
 
 CONF = cfg.CONF
@@ -68,6 +74,16 @@ def storage_get(context, storage_id):
     return IMPL.storage_get(context, storage_id)
 
 
+def storage_get_cached(context, storage_id):
+    """Retrieve a storage device as a dict from the process cache.
+
+    Its sync_status is not kept up to date in the cache.
+    """
+    return cache.STORAGES.get(
+        (storage_id, context.read_deleted),
+        lambda: IMPL.storage_get(context, storage_id).to_dict())
+
+
 def storage_get_all(context, marker=None, limit=None, sort_keys=None,
                     sort_dirs=None, filters=None, offset=None):
     """Retrieves all storage devices.
@@ -95,17 +111,44 @@ def storage_get_all(context, marker=None, limit=None, sort_keys=None,
 
 def storage_create(context, values):
     """Add a storage device from the values dictionary."""
-    return IMPL.storage_create(context, values)
+    storage = IMPL.storage_create(context, values)
+    cache.STORAGES.invalidate(storage['id'])
+    return storage
 
 
 def storage_update(context, storage_id, values):
     """Update a storage device with the values dictionary."""
-    return IMPL.storage_update(context, storage_id, values)
+    result = IMPL.storage_update(context, storage_id, values)
+    cache.STORAGES.invalidate(storage_id)
+    return result
+
+
+def storage_sync_status_set_if_idle(context, storage_id, sync_status,
+                                    expired_before):
+    """Atomically set the sync status of a storage if it is not syncing.
+
+    A storage is syncing when its sync status is bigger than 0 and it was
+    updated after expired_before.
+
+    :returns: True if the sync status was set
+    """
+    return IMPL.storage_sync_status_set_if_idle(context, storage_id,
+                                                sync_status, expired_before)
+
+
+def storage_sync_status_decrease(context, storage_id, value):
+    """Atomically decrease the sync status of a storage being synced.
+
+    :returns: True if the sync status was decreased
+    """
+    return IMPL.storage_sync_status_decrease(context, storage_id, value)
 
 
 def storage_delete(context, storage_id):
     """Delete a storage device."""
-    return IMPL.storage_delete(context, storage_id)
+    result = IMPL.storage_delete(context, storage_id)
+    cache.STORAGES.invalidate(storage_id)
+    return result
 
 
 def volume_create(context, values):
@@ -133,6 +176,24 @@ def volumes_delete(context, values):
     return IMPL.volumes_delete(context, values)
 
 
+def volumes_get_by_native_ids(context, storage_id, native_volume_ids):
+    """Get the volumes of a device with the given native volume ids."""
+    return IMPL.volumes_get_by_native_ids(context, storage_id,
+                                          native_volume_ids)
+
+
+def volumes_mark_synced(context, volume_id_list, synced_at):
+    """Mark multiple volumes as synced at the given time."""
+    return IMPL.volumes_mark_synced(context, volume_id_list, synced_at)
+
+
+def volumes_delete_not_synced(context, storage_id, synced_at):
+    """Delete the volumes of a device which were not synced since
+    synced_at.
+    """
+    return IMPL.volumes_delete_not_synced(context, storage_id, synced_at)
+
+
 def volume_get(context, volume_id):
     """Get a volume or raise an exception if it does not exist."""
     return IMPL.volume_get(context, volume_id)
@@ -272,12 +333,16 @@ def access_info_create(context, values):
     """Create a storage access information that used to connect
     to a specific storage device.
     """
-    return IMPL.access_info_create(context, values)
+    access_info = IMPL.access_info_create(context, values)
+    cache.ACCESS_INFOS.invalidate(access_info['storage_id'])
+    return access_info
 
 
 def access_info_update(context, storage_id, values):
     """Update a storage access information with the values dictionary."""
-    return IMPL.access_info_update(context, storage_id, values)
+    access_info = IMPL.access_info_update(context, storage_id, values)
+    cache.ACCESS_INFOS.invalidate(storage_id)
+    return access_info
 
 
 def access_info_get(context, storage_id):
@@ -285,9 +350,18 @@ def access_info_get(context, storage_id):
     return IMPL.access_info_get(context, storage_id)
 
 
+def access_info_get_cached(context, storage_id):
+    """Get a storage access information as a dict from the process cache."""
+    return cache.ACCESS_INFOS.get(
+        (storage_id,),
+        lambda: IMPL.access_info_get(context, storage_id).to_dict())
+
+
 def access_info_delete(context, storage_id):
     """Delete a storage access information."""
-    return IMPL.access_info_delete(context, storage_id)
+    result = IMPL.access_info_delete(context, storage_id)
+    cache.ACCESS_INFOS.invalidate(storage_id)
+    return result
 
 
 def access_info_get_all(context, marker=None, limit=None, sort_keys=None,
@@ -322,12 +396,16 @@ def is_orm_value(obj):
 
 def alert_source_create(context, values):
     """Create an alert source."""
-    return IMPL.alert_source_create(context, values)
+    alert_source = IMPL.alert_source_create(context, values)
+    cache.ALERT_SOURCES.invalidate(alert_source['storage_id'])
+    return alert_source
 
 
 def alert_source_update(context, storage_id, values):
     """Update an alert source."""
-    return IMPL.alert_source_update(context, storage_id, values)
+    alert_source = IMPL.alert_source_update(context, storage_id, values)
+    cache.ALERT_SOURCES.invalidate(storage_id)
+    return alert_source
 
 
 def alert_source_get(context, storage_id):
@@ -335,9 +413,19 @@ def alert_source_get(context, storage_id):
     return IMPL.alert_source_get(context, storage_id)
 
 
+def alert_source_get_cached(context, storage_id):
+    """Get an alert source as a dict from the process cache."""
+    return cache.ALERT_SOURCES.get(
+        (storage_id,),
+        lambda: IMPL.alert_source_get(context, storage_id).to_dict())
+
+
 def alert_source_delete(context, storage_id):
     """Delete an alert source."""
-    return IMPL.alert_source_delete(context, storage_id)
+    try:
+        return IMPL.alert_source_delete(context, storage_id)
+    finally:
+        cache.ALERT_SOURCES.invalidate(storage_id)
 
 
 def alert_source_get_all(context, marker=None, limit=None, sort_keys=None,
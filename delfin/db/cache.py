@@ -0,0 +1,131 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process local cache of the rows read on every trap and resource task.
+
+The rows of a storage are dropped from the cache of the process changing
+them by delfin.db.api, the other processes drop them when they receive the
+invalidate_db_cache fanout cast, or at the latest after ttl seconds.
+"""
+
+import copy
+import threading
+import time
+
+from oslo_config import cfg
+
+from delfin import exception
+
+db_cache_opts = [
+    cfg.BoolOpt('enabled',
+                default=True,
+                help='Whether the storages, access info and alert sources '
+                     'read on the trap and sync paths are cached.'),
+    cfg.IntOpt('ttl',
+               default=60,
+               min=1,
+               help='Seconds a cached row is used before it is read again '
+                    'from the database.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(db_cache_opts, group='db_cache')
+
+
+class RowCache(object):
+    """TTL cache of rows keyed by tuples starting with the storage id.
+
+    Rows are cached as dicts and each caller gets its own copy. A row
+    which could not be found is cached as well, so looking up a missing
+    row does not reach the database either.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (expires at, row or NotFound exception)
+        self._rows = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """Return the row of key, read it with load on a miss."""
+        if not CONF.db_cache.enabled:
+            return load()
+
+        now = time.time()
+        with self._lock:
+            expires_at, row = self._rows.get(key, (0, None))
+            if expires_at > now:
+                self.hits += 1
+            else:
+                self.misses += 1
+                row = None
+        if row is None:
+            try:
+                row = load()
+            except exception.NotFound as e:
+                row = e
+            with self._lock:
+                self._rows[key] = (now + CONF.db_cache.ttl, row)
+
+        if isinstance(row, exception.NotFound):
+            raise row
+        return copy.deepcopy(row)
+
+    def invalidate(self, storage_id):
+        with self._lock:
+            for key in [key for key in self._rows if key[0] == storage_id]:
+                self._rows.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._rows),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+            }
+
+
+STORAGES = RowCache()
+ACCESS_INFOS = RowCache()
+ALERT_SOURCES = RowCache()
+
+_CACHES = {
+    'storage': STORAGES,
+    'access_info': ACCESS_INFOS,
+    'alert_source': ALERT_SOURCES,
+}
+
+
+def invalidate(storage_id):
+    """Drop the cached rows of a storage."""
+    for cache in _CACHES.values():
+        cache.invalidate(storage_id)
+
+
+def clear():
+    for cache in _CACHES.values():
+        cache.clear()
+
+
+def get_stats():
+    """Return size, hit, miss and hit ratio counters of each cache."""
+    return {name: cache.get_stats() for name, cache in _CACHES.items()}
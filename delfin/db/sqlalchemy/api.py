@@ -32,6 +32,7 @@ from oslo_utils import uuidutils, timeutils
 from sqlalchemy import create_engine
 
 from delfin import exception
+from delfin.common import constants
 from delfin.common import sqlalchemyutils
 from delfin.db.sqlalchemy import models
 from delfin.db.sqlalchemy.models import Storage, AccessInfo
@@ -80,6 +81,45 @@ def get_backend():
     return sys.modules[__name__]
 
 
+def _batches(items, batch_size=None):
+    """Split items into lists of at most batch_size elements."""
+    batch_size = batch_size or CONF.database.bulk_batch_size
+    items = list(items)
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def _bulk_create(session, model, values_list, native_key):
+    """Insert rows with executemany statements instead of ORM objects."""
+    for values in values_list:
+        LOG.debug('adding new %s for %s %s' % (model.__tablename__,
+                                               native_key,
+                                               values.get(native_key)))
+        if not values.get('id'):
+            values['id'] = uuidutils.generate_uuid()
+
+    for batch in _batches(values_list):
+        session.bulk_insert_mappings(model, batch)
+
+
+def _bulk_update(session, model, values_list):
+    """Update rows by primary key with executemany statements."""
+    for batch in _batches(values_list):
+        session.bulk_update_mappings(model, batch)
+
+
+def _bulk_delete(query, model, id_list):
+    """Delete rows with one IN (...) statement per batch.
+
+    :returns: the number of rows deleted
+    """
+    deleted = 0
+    for batch in _batches(id_list):
+        deleted += query.filter(model.id.in_(batch)).delete(
+            synchronize_session=False)
+    return deleted
+
+
 def register_db():
     """Create database and tables."""
     models = (Storage,
@@ -257,6 +297,36 @@ def storage_update(context, storage_id, values):
     return result
 
 
+def storage_sync_status_set_if_idle(context, storage_id, sync_status,
+                                    expired_before):
+    """Atomically set the sync status of a storage if it is not syncing."""
+    session = get_session()
+    with session.begin():
+        last_update = sqlalchemy.func.coalesce(models.Storage.updated_at,
+                                               models.Storage.created_at)
+        query = _storage_get_query(context, session).filter_by(
+            id=storage_id).filter(
+            sqlalchemy.or_(models.Storage.sync_status <= 0,
+                           last_update <= expired_before))
+        result = query.update({'sync_status': sync_status,
+                               'updated_at': timeutils.utcnow()},
+                              synchronize_session=False)
+    return result > 0
+
+
+def storage_sync_status_decrease(context, storage_id, value):
+    """Atomically decrease the sync status of a storage being synced."""
+    session = get_session()
+    with session.begin():
+        query = _storage_get_query(context, session).filter_by(
+            id=storage_id).filter(
+            models.Storage.sync_status != constants.SyncStatus.SYNCED)
+        result = query.update(
+            {'sync_status': models.Storage.sync_status - value},
+            synchronize_session=False)
+    return result > 0
+
+
 def storage_get(context, storage_id):
     """Retrieve a storage device."""
     return _storage_get(context, storage_id)
@@ -351,35 +421,22 @@ def volume_create(context, values):
 def volumes_create(context, volumes):
     """Create multiple volumes."""
     session = get_session()
-    vol_refs = []
     with session.begin():
+        _bulk_create(session, models.Volume, volumes, 'native_volume_id')
 
-        for vol in volumes:
-            LOG.debug('adding new volume for native_volume_id {0}:'
-                      .format(vol.get('native_volume_id')))
-            if not vol.get('id'):
-                vol['id'] = uuidutils.generate_uuid()
-
-            vol_ref = models.Volume()
-            vol_ref.update(vol)
-            vol_refs.append(vol_ref)
-
-        session.add_all(vol_refs)
-
-    return vol_refs
+    return volumes
 
 
 def volumes_delete(context, volumes_id_list):
     """Delete multiple volumes."""
     session = get_session()
     with session.begin():
-        for vol_id in volumes_id_list:
-            LOG.debug('deleting volume {0}:'.format(vol_id))
-            query = _volume_get_query(context, session)
-            result = query.filter_by(id=vol_id).delete()
+        query = _volume_get_query(context, session)
+        result = _bulk_delete(query, models.Volume, volumes_id_list)
 
-            if not result:
-                LOG.error(exception.VolumeNotFound(vol_id))
+        if result != len(volumes_id_list):
+            LOG.error('Only %s of %s volumes found to delete.'
+                      % (result, len(volumes_id_list)))
     return
 
 
@@ -395,14 +452,62 @@ def volumes_update(context, volumes):
     """Update multiple volumes."""
     session = get_session()
     with session.begin():
-        for vol in volumes:
-            LOG.debug('updating volume {0}:'.format(vol.get('id')))
-            query = _volume_get_query(context, session)
-            result = query.filter_by(id=vol.get('id')
-                                     ).update(vol)
+        _bulk_update(session, models.Volume, volumes)
+
+
+def volumes_get_by_native_ids(context, storage_id, native_volume_ids):
+    """Get the volumes of a device with the given native volume ids."""
+    session = get_session()
+    volumes = []
+    with session.begin():
+        query = _volume_get_query(context, session).filter_by(
+            storage_id=storage_id)
+        for batch in _batches(native_volume_ids):
+            volumes.extend(query.filter(
+                models.Volume.native_volume_id.in_(batch)).all())
+    return volumes
+
+
+def volumes_mark_synced(context, volume_id_list, synced_at):
+    """Mark multiple volumes as synced at the given time."""
+    session = get_session()
+    with session.begin():
+        query = _volume_get_query(context, session)
+        for batch in _batches(volume_id_list):
+            query.filter(models.Volume.id.in_(batch)).update(
+                {'updated_at': synced_at}, synchronize_session=False)
 
-            if not result:
-                LOG.error(exception.VolumeNotFound(vol.get('id')))
+
+def volumes_delete_not_synced(context, storage_id, synced_at):
+    """Delete the volumes of a device which were not synced since synced_at.
+
+    Volumes are swept in batches using keyset pagination on id, so that
+    neither the ids nor the transaction grow with the number of volumes.
+
+    :returns: the number of volumes deleted
+    """
+    deleted = 0
+    marker = None
+    while True:
+        session = get_session()
+        with session.begin():
+            query = _volume_get_query(context, session).filter_by(
+                storage_id=storage_id).filter(
+                sqlalchemy.func.coalesce(models.Volume.updated_at,
+                                         models.Volume.created_at)
+                < synced_at)
+            if marker is not None:
+                query = query.filter(models.Volume.id > marker)
+            id_list = [row.id for row in
+                       query.with_entities(models.Volume.id)
+                       .order_by(models.Volume.id)
+                       .limit(CONF.database.bulk_batch_size)]
+            if not id_list:
+                break
+            deleted += _bulk_delete(_volume_get_query(context, session),
+                                    models.Volume, id_list)
+            marker = id_list[-1]
+    return deleted
 
 
 def volume_get(context, volume_id):
@@ -476,35 +581,24 @@ def storage_pool_create(context, values):
 def storage_pools_create(context, storage_pools):
     """Create a storage_pool from the values dictionary."""
     session = get_session()
-    storage_pool_refs = []
     with session.begin():
+        _bulk_create(session, models.StoragePool, storage_pools,
+                     'native_storage_pool_id')
 
-        for storage_pool in storage_pools:
-            LOG.debug('adding new storage_pool for native_storage_pool_id {0}:'
-                      .format(storage_pool.get('native_storage_pool_id')))
-            if not storage_pool.get('id'):
-                storage_pool['id'] = uuidutils.generate_uuid()
-
-            storage_pool_ref = models.StoragePool()
-            storage_pool_ref.update(storage_pool)
-            storage_pool_refs.append(storage_pool_ref)
-
-        session.add_all(storage_pool_refs)
-
-    return storage_pool_refs
+    return storage_pools
 
 
 def storage_pools_delete(context, storage_pools_id_list):
     """Delete multiple storage_pools with the storage_pools dictionary."""
     session = get_session()
     with session.begin():
-        for storage_pool_id in storage_pools_id_list:
-            LOG.debug('deleting storage_pool {0}:'.format(storage_pool_id))
-            query = _storage_pool_get_query(context, session)
-            result = query.filter_by(id=storage_pool_id).delete()
+        query = _storage_pool_get_query(context, session)
+        result = _bulk_delete(query, models.StoragePool,
+                              storage_pools_id_list)
 
-            if not result:
-                LOG.error(exception.StoragePoolNotFound(storage_pool_id))
+        if result != len(storage_pools_id_list):
+            LOG.error('Only %s of %s storage_pools found to delete.'
+                      % (result, len(storage_pools_id_list)))
 
     return
 
@@ -528,22 +622,9 @@ def storage_pools_update(context, storage_pools):
     session = get_session()
 
     with session.begin():
-        storage_pool_refs = []
-
-        for storage_pool in storage_pools:
-            LOG.debug('updating storage_pool {0}:'.format(
-                storage_pool.get('id')))
-            query = _storage_pool_get_query(context, session)
-            result = query.filter_by(id=storage_pool.get('id')
-                                     ).update(storage_pool)
-
-            if not result:
-                LOG.error(exception.StoragePoolNotFound(storage_pool.get(
-                    'id')))
-            else:
-                storage_pool_refs.append(result)
-
-    return storage_pool_refs
+        _bulk_update(session, models.StoragePool, storage_pools)
+
+    return storage_pools
 
 
 def storage_pool_get(context, storage_pool_id):
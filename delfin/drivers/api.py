@@ -12,21 +12,350 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import six
+import contextlib
+import copy
+import datetime
+import json
+import socket
+import threading
+import time
 
+import requests
+import six
+from eventlet import event
+from paramiko import ssh_exception
+from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 
 from delfin import db
+from delfin import exception
 from delfin.drivers import helper
 from delfin.drivers import manager
 
 LOG = log.getLogger(__name__)
 
+circuit_breaker_opts = [
+    cfg.BoolOpt('enabled',
+                default=True,
+                help='Whether calls to a storage fail immediately after '
+                     'it was found unreachable several times in a row.'),
+    cfg.IntOpt('failure_threshold',
+               default=3,
+               min=1,
+               help='Number of consecutive connection failures opening '
+                    'the circuit of a storage.'),
+    cfg.IntOpt('probe_interval',
+               default=30,
+               min=1,
+               help='Seconds an open circuit rejects calls before one call '
+                    'is let through to probe the storage. The interval '
+                    'doubles after every failed probe.'),
+    cfg.IntOpt('max_probe_interval',
+               default=600,
+               min=1,
+               help='Maximum seconds between two probes of an unreachable '
+                    'storage.'),
+]
+
+driver_call_opts = [
+    cfg.BoolOpt('coalesce',
+                default=True,
+                help='Whether identical read-only calls to a storage made '
+                     'at the same time share one call to the storage.'),
+    cfg.IntOpt('result_cache_ttl',
+               default=0,
+               min=0,
+               help='Seconds the result of a read-only call to a storage '
+                    'is reused by identical calls, 0 disables it.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(circuit_breaker_opts, group='circuit_breaker')
+CONF.register_opts(driver_call_opts, group='driver_call')
+
+# Failures showing that a storage can not be reached at all
+CONNECTION_FAILURES = (exception.ConnectTimeout,
+                       exception.InvalidIpOrPort,
+                       exception.SSHConnectTimeout,
+                       exception.HTTPConnectionTimeout,
+                       requests.exceptions.ConnectionError,
+                       ssh_exception.NoValidConnectionsError,
+                       socket.timeout,
+                       ConnectionError)
+
+
+def is_connection_failure(error):
+    """Whether error, or an error it was raised from, is a connection one.
+
+    Drivers often wrap the error of the transport in one of their own,
+    e.g. StorageBackendException or SSHException, so the causes of the
+    error are looked at as well.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, CONNECTION_FAILURES):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _format_time(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).isoformat()
+
+
+class CircuitBreaker(object):
+    """Circuit breaker of the calls to one storage.
+
+    The circuit is closed while the storage answers. It opens after
+    failure_threshold connection failures in a row and then rejects calls
+    for the probe interval. The first call after it goes through as a probe
+    with the circuit half-open, other calls are still rejected meanwhile.
+    A successful probe closes the circuit, a failed one opens it again for
+    twice the interval.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, storage_id):
+        self.storage_id = storage_id
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_interval = 0
+        self.retry_at = None
+
+    def before_call(self):
+        """Raise StorageCircuitOpen if the call must not reach the storage."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and \
+                    timeutils.utcnow_ts() >= self.retry_at:
+                LOG.info('Probe storage %s after it was unreachable.',
+                         self.storage_id)
+                self.state = self.HALF_OPEN
+                return
+            raise exception.StorageCircuitOpen(
+                self.storage_id, _format_time(self.retry_at))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                LOG.info('Storage %s is reachable again, close its '
+                         'circuit.', self.storage_id)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_interval = 0
+            self.retry_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.OPEN:
+                # A call started before the circuit opened
+                return
+            if self.state == self.HALF_OPEN:
+                self.probe_interval = min(
+                    self.probe_interval * 2,
+                    CONF.circuit_breaker.max_probe_interval)
+            elif self.failures >= CONF.circuit_breaker.failure_threshold:
+                self.probe_interval = min(
+                    CONF.circuit_breaker.probe_interval,
+                    CONF.circuit_breaker.max_probe_interval)
+            else:
+                return
+            self.state = self.OPEN
+            self.retry_at = timeutils.utcnow_ts() + self.probe_interval
+            LOG.warning('Storage %s is unreachable after %s attempts, '
+                        'reject calls to it for %s seconds.',
+                        self.storage_id, self.failures, self.probe_interval)
+
+    @contextlib.contextmanager
+    def guard(self):
+        """Run a call to the storage under the circuit breaker."""
+        if not CONF.circuit_breaker.enabled:
+            yield
+            return
+        self.before_call()
+        failed = False
+        try:
+            yield
+        except Exception as e:
+            if is_connection_failure(e):
+                failed = True
+                self.record_failure()
+            raise
+        finally:
+            # Any other outcome means the storage could be reached
+            if not failed:
+                self.record_success()
+
+    def get_state(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'probe_interval': self.probe_interval,
+                'retry_at': _format_time(self.retry_at)
+                if self.retry_at else None,
+            }
+
+
+class CircuitBreakers(object):
+    """Circuit breakers of all the storages of a process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, storage_id):
+        with self._lock:
+            breaker = self._breakers.get(storage_id)
+            if breaker is None:
+                breaker = CircuitBreaker(storage_id)
+                self._breakers[storage_id] = breaker
+            return breaker
+
+    def remove(self, storage_id):
+        with self._lock:
+            self._breakers.pop(storage_id, None)
+
+    def get_state(self, storage_id):
+        with self._lock:
+            breaker = self._breakers.get(storage_id)
+        if breaker is None:
+            return CircuitBreaker(storage_id).get_state()
+        return breaker.get_state()
+
+
+CIRCUIT_BREAKERS = CircuitBreakers()
+
+
+class _Flight(object):
+    def __init__(self):
+        self.done = event.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """Coalesce identical calls to storages.
+
+    A call whose key matches a call in flight waits for it and gets a copy
+    of its result or its exception instead of calling the storage again.
+    With a ttl, the result is also reused by the identical calls made
+    during ttl seconds. Keys are tuples starting with the storage id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._results = {}
+
+    @staticmethod
+    def make_key(storage_id, method, *args):
+        return (storage_id, method,
+                json.dumps(args, sort_keys=True, default=six.text_type))
+
+    def _get_result(self, key, now):
+        expires_at, result = self._results.get(key, (None, None))
+        if expires_at is None:
+            return False, None
+        if expires_at <= now:
+            self._results.pop(key)
+            return False, None
+        return True, result
+
+    def _set_result(self, key, result, ttl, now):
+        for cached_key in [cached_key for cached_key, (expires_at, _)
+                           in self._results.items() if expires_at <= now]:
+            self._results.pop(cached_key)
+        self._results[key] = (now + ttl, result)
+
+    def call(self, key, func, ttl=0):
+        with self._lock:
+            if ttl:
+                found, result = self._get_result(key, time.time())
+                if found:
+                    return copy.deepcopy(result)
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                leader = True
+            else:
+                flight.waiters += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        landed = False
+        try:
+            result = func()
+            with self._lock:
+                # No follower can join the flight any more
+                self._flights.pop(key)
+                landed = True
+            # The caller may change its result, the followers and the
+            # cache share a private copy, only made when there are any
+            if flight.waiters or ttl:
+                flight.result = copy.deepcopy(result)
+            if ttl:
+                with self._lock:
+                    self._set_result(key, flight.result, ttl, time.time())
+            return result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            if not landed:
+                with self._lock:
+                    self._flights.pop(key)
+            flight.done.send()
+
+    def invalidate(self, storage_id):
+        """Drop the cached results of a storage."""
+        with self._lock:
+            for key in [key for key in self._results
+                        if key[0] == storage_id]:
+                self._results.pop(key)
+
+
+DRIVER_CALLS = SingleFlight()
+
 
 class API(object):
     def __init__(self):
         self.driver_manager = manager.DriverManager()
+        self.circuit_breakers = CIRCUIT_BREAKERS
+        self.driver_calls = DRIVER_CALLS
+
+    def _guard(self, storage_id):
+        return self.circuit_breakers.get(storage_id).guard()
+
+    def _call_driver(self, context, storage_id, method, *args):
+        with self._guard(storage_id), self.driver_manager.use_driver(
+                context, storage_id=storage_id) as driver:
+            return getattr(driver, method)(context, *args)
+
+    def _read(self, context, storage_id, method, *args):
+        """Call a read-only driver method, sharing identical calls."""
+        if not CONF.driver_call.coalesce:
+            return self._call_driver(context, storage_id, method, *args)
+        return self.driver_calls.call(
+            self.driver_calls.make_key(storage_id, method, *args),
+            lambda: self._call_driver(context, storage_id, method, *args),
+            CONF.driver_call.result_cache_ttl)
 
     def discover_storage(self, context, access_info):
         """Discover a storage system with access information."""
@@ -62,6 +391,7 @@ class API(object):
         helper.check_storage_consistency(context, storage_id, storage_new)
         access_info = db.access_info_update(context, storage_id, access_info)
         db.storage_update(context, storage_id, storage_new)
+        self.driver_calls.invalidate(storage_id)
 
         LOG.info("Access information updated successfully.")
         return access_info
@@ -69,21 +399,31 @@ class API(object):
     def remove_storage(self, context, storage_id):
         """Clear driver instance from driver factory."""
         self.driver_manager.remove_driver(storage_id)
+        self.circuit_breakers.remove(storage_id)
+        self.driver_calls.invalidate(storage_id)
+
+    def get_circuit_state(self, context, storage_id):
+        """Get the circuit breaker state of a storage in this process."""
+        return self.circuit_breakers.get_state(storage_id)
 
     def get_storage(self, context, storage_id):
         """Get storage device information from storage system"""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.get_storage(context)
+        return self._read(context, storage_id, 'get_storage')
 
     def list_storage_pools(self, context, storage_id):
         """List all storage pools from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.list_storage_pools(context)
+        return self._read(context, storage_id, 'list_storage_pools')
 
     def list_volumes(self, context, storage_id):
         """List all storage volumes from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.list_volumes(context)
+        return self._read(context, storage_id, 'list_volumes')
+
+    def iter_volumes(self, context, storage_id, page_size):
+        """Iterate storage volumes from storage system page by page."""
+        with self._guard(storage_id), self.driver_manager.use_driver(
+                context, storage_id=storage_id) as driver:
+            for volumes in driver.iter_volumes(context, page_size):
+                yield volumes
 
     def add_trap_config(self, context, storage_id, trap_config):
         """Config the trap receiver in storage system."""
@@ -95,7 +435,7 @@ class API(object):
 
     def parse_alert(self, context, storage_id, alert):
         """Parse alert data got from snmp trap server."""
-        access_info = db.access_info_get(context, storage_id)
+        access_info = db.access_info_get_cached(context, storage_id)
         driver = self.driver_manager.get_driver(context,
                                                 invoke_on_load=False,
                                                 **access_info)
@@ -103,10 +443,10 @@ class API(object):
 
     def clear_alert(self, context, storage_id, sequence_number):
         """Clear alert from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        driver.clear_alert(context, sequence_number)
+        self._call_driver(context, storage_id, 'clear_alert',
+                          sequence_number)
+        self.driver_calls.invalidate(storage_id)
 
     def list_alerts(self, context, storage_id, query_para=None):
         """List alert from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.list_alerts(context, query_para)
+        return self._read(context, storage_id, 'list_alerts', query_para)
@@ -16,3 +16,10 @@ SOCKET_TIMEOUT = 10
 ERROR_SESSION_INVALID_CODE = 403
 ERROR_SESSION_IS_BEING_USED_CODE = 409
 HEALTH_OK = (5, 7)
+PAGE_SIZE = 2000
+PAGE_FETCH_WORKERS = 4
+LUN_FIELDS = 'id,name,description,health,pool,wwn,isThinEnabled,' \
+             'isAdvancedDedupEnabled,sizeTotal,sizeAllocated'
+ALERT_FIELDS = 'id,timestamp,severity,component,messageId,message,' \
+               'description,descriptionId'
+ALERT_TIME_PATTERN = '%Y-%m-%dT%H:%M:%S'
@@ -13,14 +13,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 import requests
 import six
+from eventlet import greenpool
 from oslo_log import log as logging
+from six.moves.urllib import parse as urlparse
 
 from delfin import cryptor
 from delfin import exception
-from delfin import ssl_utils
 from delfin.drivers.dell_emc.unity import consts
+from delfin.drivers.utils import http_transport
+from delfin.drivers.utils import token_cache
 from delfin.drivers.utils.rest_client import RestClient
 
 LOG = logging.getLogger(__name__)
@@ -54,8 +59,9 @@ class RestHandler(RestClient):
                         res.status_code, res.text))
                 if RestHandler.REST_LOGOUT_URL in url:
                     return res
+                invalid_token = self.rest_auth_token
                 self.rest_auth_token = None
-                access_session = self.login()
+                access_session = self.login(invalid_token)
                 # if get token，Revisit url
                 if access_session is not None:
                     res = self. \
@@ -81,7 +87,7 @@ class RestHandler(RestClient):
     def init_rest_client(self):
         if self.session:
             self.session.close()
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
         self.session.headers.update({
             'Accept': 'application/json',
             "Content-Type": "application/json",
@@ -96,31 +102,39 @@ class RestHandler(RestClient):
                 self.verify))
             self.session.verify = self.verify
         self.session.trust_env = False
-        self.session.mount("https://", ssl_utils.HostNameIgnoreAdapter())
 
-    def login(self):
+    def _login(self):
+        url = RestHandler.REST_AUTH_URL
+        data = {}
+        res = self. \
+            do_call(url, data, 'GET',
+                    calltimeout=consts.SOCKET_TIMEOUT)
+        if res.status_code == 200:
+            # The CSRF token is only valid with the session cookies
+            return {'token': res.headers['EMC-CSRF-TOKEN'],
+                    'cookies': requests.utils.dict_from_cookiejar(
+                        self.session.cookies)}
+
+        LOG.error("Login error. URL: %(url)s\n"
+                  "Reason: %(reason)s.",
+                  {"url": url, "reason": res.text})
+        if 'invalid username or password' in res.text:
+            raise exception.InvalidUsernameOrPassword()
+        else:
+            raise exception.BadResponse(res.text)
+
+    def login(self, invalid_token=None):
         try:
             access_session = self.rest_auth_token
             if self.rest_auth_token is None:
-                url = RestHandler.REST_AUTH_URL
-                data = {}
                 self.init_rest_client()
-                res = self. \
-                    do_call(url, data, 'GET',
-                            calltimeout=consts.SOCKET_TIMEOUT)
-                if res.status_code == 200:
-                    access_session = res.headers['EMC-CSRF-TOKEN']
-                    self.rest_auth_token = access_session
-                    self.session.headers[
-                        RestHandler.REST_AUTH_KEY] = access_session
-                else:
-                    LOG.error("Login error. URL: %(url)s\n"
-                              "Reason: %(reason)s.",
-                              {"url": url, "reason": res.text})
-                    if 'invalid username or password' in res.text:
-                        raise exception.InvalidUsernameOrPassword()
-                    else:
-                        raise exception.BadResponse(res.text)
+                session_data = token_cache.get_or_login(
+                    self.token_key, self._login, invalid_token)
+                access_session = session_data['token']
+                self.rest_auth_token = access_session
+                self.session.headers[
+                    RestHandler.REST_AUTH_KEY] = access_session
+                self.session.cookies.update(session_data['cookies'])
             else:
                 LOG.error('Login Parameter error')
             return access_session
@@ -134,7 +148,9 @@ class RestHandler(RestClient):
             if self.rest_auth_token is not None:
                 url = '%s/%s' % (url, self.rest_auth_token)
             self.rest_auth_token = None
-            if self.san_address:
+            # A shared session is still used by other processes, it is
+            # left to expire on the storage
+            if self.san_address and not token_cache.is_enabled():
                 self.call(url, method='POST')
             if self.session:
                 self.session.close()
@@ -167,21 +183,83 @@ class RestHandler(RestClient):
         result_json = self.get_rest_info(url)
         return result_json
 
-    def get_all_luns(self, page_size):
-        url = '%s?%s&page=%s' % (RestHandler.REST_LUNS_URL,
-                                 'fields=id,name,health,type,sizeAllocated,'
-                                 'sizeTotal,sizeUsed,pool,wwn,isThinEnabled',
-                                 page_size)
-        result_json = self.get_rest_info(url)
+    def _get_page_json(self, url, page):
+        # A missing page must fail the query, a partial collection would be
+        # taken for the whole one and the missing resources deleted
+        result_json = self.get_rest_info('%s&page=%s' % (url, page))
+        if not result_json or 'entries' not in result_json:
+            raise exception.StorageBackendException(
+                'Failed to get page %s of %s' % (page, url))
         return result_json
 
-    def get_all_alerts(self, page_size):
-        url = '%s?%s&page=%s' % (RestHandler.REST_ALERTS_URL,
-                                 'fields=id,timestamp,severity,component,'
-                                 'messageId,message,description,descriptionId',
-                                 page_size)
-        result_json = self.get_rest_info(url)
-        return result_json
+    def get_page(self, url, page):
+        return self._get_page_json(url, page)['entries']
+
+    def get_all_pages(self, url, fields, filter_str=None):
+        """Return the entries of all pages of a collection.
+
+        The first page reports the total entry count, the remaining pages
+        are then fetched concurrently. Arrays which do not report the count
+        are read page by page until a page is not full. Raises
+        StorageBackendException if any page, or the filter, is rejected.
+        """
+        url = '%s?fields=%s&compact=true&with_entrycount=true&per_page=%s' \
+              % (url, fields, consts.PAGE_SIZE)
+        if filter_str:
+            url = '%s&filter=%s' % (url, urlparse.quote(filter_str))
+        result_json = self._get_page_json(url, 1)
+        entries = list(result_json['entries'])
+        entry_count = result_json.get('entryCount')
+        if entry_count is not None:
+            page_count = -(-int(entry_count) // consts.PAGE_SIZE)
+            pool = greenpool.GreenPool(consts.PAGE_FETCH_WORKERS)
+            for page_entries in pool.imap(lambda page: self.get_page(
+                    url, page), range(2, page_count + 1)):
+                entries.extend(page_entries)
+        else:
+            page = 1
+            page_entries = entries
+            while len(page_entries) >= consts.PAGE_SIZE:
+                page += 1
+                page_entries = self.get_page(url, page)
+                entries.extend(page_entries)
+        return {'entries': entries}
+
+    def get_all_luns(self):
+        return self.get_all_pages(RestHandler.REST_LUNS_URL,
+                                  consts.LUN_FIELDS)
+
+    @staticmethod
+    def _format_alert_time(time_ms):
+        time_ms = int(time_ms)
+        return '%s.%03dZ' % (time.strftime(
+            consts.ALERT_TIME_PATTERN, time.localtime(time_ms // 1000)),
+            time_ms % 1000)
+
+    def get_alert_filter(self, query_para):
+        """Build the server side timestamp filter of a query_para."""
+        if not query_para:
+            return None
+        conditions = []
+        try:
+            begin_time = query_para.get('begin_time')
+            if begin_time:
+                conditions.append('timestamp ge "%s"'
+                                  % self._format_alert_time(begin_time))
+            end_time = query_para.get('end_time')
+            if end_time:
+                conditions.append('timestamp le "%s"'
+                                  % self._format_alert_time(end_time))
+        except (TypeError, ValueError):
+            LOG.warning("Invalid alert query parameters %s, query all "
+                        "alerts", query_para)
+            return None
+        return ' and '.join(conditions) or None
+
+    def get_all_alerts(self, query_para=None):
+        return self.get_all_pages(RestHandler.REST_ALERTS_URL,
+                                  consts.ALERT_FIELDS,
+                                  self.get_alert_filter(query_para))
 
     def get_soft_version(self):
         url = '%s?%s' % (RestHandler.REST_SOFT_VERSION_URL,
@@ -153,32 +153,15 @@ class UNITYStorDriver(driver.StorageDriver):
                 volume_list.append(v)
 
     def list_volumes(self, context):
-        page_size = 1
         volume_list = []
-        while True:
-            luns = self.rest_handler.get_all_luns(page_size)
-            if 'entries' not in luns:
-                break
-            if len(luns['entries']) < 1:
-                break
-            self.volume_handler(luns, volume_list)
-            page_size = page_size + 1
-
+        self.volume_handler(self.rest_handler.get_all_luns(), volume_list)
         return volume_list
 
     def list_alerts(self, context, query_para=None):
-        page_size = 1
         alert_model_list = []
-        while True:
-            alert_list = self.rest_handler.get_all_alerts(page_size)
-            if 'entries' not in alert_list:
-                break
-            if len(alert_list['entries']) < 1:
-                break
-            alert_handler.AlertHandler() \
-                .parse_queried_alerts(alert_model_list, alert_list, query_para)
-            page_size = page_size + 1
-
+        alert_list = self.rest_handler.get_all_alerts(query_para)
+        alert_handler.AlertHandler() \
+            .parse_queried_alerts(alert_model_list, alert_list, query_para)
         return alert_model_list
 
     def add_trap_config(self, context, trap_config):
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from eventlet import greenpool
 from oslo_log import log
 from oslo_utils import units
 
@@ -22,6 +23,9 @@ from delfin.drivers.dell_emc.vmax import rest
 LOG = log.getLogger(__name__)
 
 EMBEDDED_UNISPHERE_ARRAY_COUNT = 1
+# Maximum number of REST requests sent at the same time, it is the
+# connection pool size of a requests session
+MAX_CONCURRENT_REQUESTS = 10
 
 
 class VMAXClient(object):
@@ -33,7 +37,14 @@ class VMAXClient(object):
         rest_access = kwargs.get('rest')
         if rest_access is None:
             raise exception.InvalidInput('Input rest_access is missing')
-        self.rest = rest.VMaxRest()
+        page_fetch_workers = kwargs.get('extra_attributes', {}).get(
+            'page_fetch_workers', rest.PAGE_FETCH_WORKERS)
+        try:
+            page_fetch_workers = int(page_fetch_workers)
+        except (TypeError, ValueError):
+            raise exception.InvalidInput(
+                'Invalid page_fetch_workers: {}'.format(page_fetch_workers))
+        self.rest = rest.VMaxRest(page_fetch_workers=page_fetch_workers)
         self.rest.set_rest_credentials(rest_access)
         self.reset_connection(**kwargs)
 
@@ -122,6 +133,12 @@ class VMAXClient(object):
             LOG.error(msg)
             raise exception.StorageBackendException(msg)
 
+    @staticmethod
+    def _fetch_all(func, items):
+        """Call func for each item concurrently, return results in order."""
+        pool = greenpool.GreenPool(MAX_CONCURRENT_REQUESTS)
+        return list(pool.imap(func, items))
+
     def list_storage_pools(self, storage_id):
 
         try:
@@ -162,6 +179,76 @@ class VMAXClient(object):
             LOG.error(msg)
             raise exception.StorageBackendException(msg)
 
+    def _get_volumes(self, storage_id, volumes, default_srps, sg_infos):
+        """Get the details of volumes.
+
+        :param sg_infos: storage groups already fetched, keyed by name,
+            it is updated with the storage groups fetched for volumes
+        """
+        # TODO: Update constants.VolumeStatus to make mapping more precise
+        switcher = {
+            'Ready': constants.VolumeStatus.AVAILABLE,
+            'Not Ready': constants.VolumeStatus.ERROR,
+            'Mixed': constants.VolumeStatus.ERROR,
+            'Write Disabled': constants.VolumeStatus.ERROR,
+            'N/A': constants.VolumeStatus.ERROR,
+        }
+
+        # Get volume details
+        vols = self._fetch_all(
+            lambda volume: self.rest.get_volume(
+                self.array_id, self.uni_version, volume), volumes)
+
+        # Get each storage group only once
+        sg_names = sorted(set(vol['storageGroupId'][0] for vol in vols
+                              if vol['num_of_storage_groups'] == 1)
+                          - set(sg_infos))
+        sg_infos.update(zip(sg_names, self._fetch_all(
+            lambda sg: self.rest.get_storage_group(
+                self.array_id, self.uni_version, sg), sg_names)))
+
+        volume_list = []
+        for volume, vol in zip(volumes, vols):
+            emulation_type = vol['emulation']
+            total_cap = vol['cap_mb'] * units.Mi
+            used_cap = (total_cap * vol['allocated_percent']) / 100.0
+            free_cap = total_cap - used_cap
+
+            status = switcher.get(vol['status'],
+                                  constants.VolumeStatus.ERROR)
+
+            description = "Dell EMC VMAX volume"
+            if vol['type'] == 'TDEV':
+                description = "Dell EMC VMAX 'thin device' volume"
+
+            name = volume
+            if vol.get('volume_identifier'):
+                name = volume + ':' + vol['volume_identifier']
+
+            v = {
+                "name": name,
+                "storage_id": storage_id,
+                "description": description,
+                "status": status,
+                "native_volume_id": vol['volumeId'],
+                "wwn": vol['wwn'],
+                "type": constants.VolumeType.THIN,
+                "total_capacity": int(total_cap),
+                "used_capacity": int(used_cap),
+                "free_capacity": int(free_cap),
+            }
+
+            if vol['num_of_storage_groups'] == 1:
+                sg_info = sg_infos[vol['storageGroupId'][0]]
+                v['native_storage_pool_id'] = sg_info['srp']
+                v['compressed'] = sg_info['compression']
+            else:
+                v['native_storage_pool_id'] = default_srps[emulation_type]
+
+            volume_list.append(v)
+
+        return volume_list
+
     def list_volumes(self, storage_id):
 
         try:
@@ -173,62 +260,35 @@ class VMAXClient(object):
                 self.array_id, version=self.uni_version,
                 params={'data_volume': 'false'})
 
-            # TODO: Update constants.VolumeStatus to make mapping more precise
-            switcher = {
-                'Ready': constants.VolumeStatus.AVAILABLE,
-                'Not Ready': constants.VolumeStatus.ERROR,
-                'Mixed': constants.VolumeStatus.ERROR,
-                'Write Disabled': constants.VolumeStatus.ERROR,
-                'N/A': constants.VolumeStatus.ERROR,
-            }
-
-            volume_list = []
-            for volume in volumes:
-                # Get volume details
-                vol = self.rest.get_volume(self.array_id,
-                                           self.uni_version, volume)
-
-                emulation_type = vol['emulation']
-                total_cap = vol['cap_mb'] * units.Mi
-                used_cap = (total_cap * vol['allocated_percent']) / 100.0
-                free_cap = total_cap - used_cap
-
-                status = switcher.get(vol['status'],
-                                      constants.VolumeStatus.ERROR)
-
-                description = "Dell EMC VMAX volume"
-                if vol['type'] == 'TDEV':
-                    description = "Dell EMC VMAX 'thin device' volume"
-
-                name = volume
-                if vol.get('volume_identifier'):
-                    name = volume + ':' + vol['volume_identifier']
-
-                v = {
-                    "name": name,
-                    "storage_id": storage_id,
-                    "description": description,
-                    "status": status,
-                    "native_volume_id": vol['volumeId'],
-                    "wwn": vol['wwn'],
-                    "type": constants.VolumeType.THIN,
-                    "total_capacity": int(total_cap),
-                    "used_capacity": int(used_cap),
-                    "free_capacity": int(free_cap),
-                }
+            return self._get_volumes(storage_id, volumes, default_srps, {})
 
-                if vol['num_of_storage_groups'] == 1:
-                    sg = vol['storageGroupId'][0]
-                    sg_info = self.rest.get_storage_group(
-                        self.array_id, self.uni_version, sg)
-                    v['native_storage_pool_id'] = sg_info['srp']
-                    v['compressed'] = sg_info['compression']
-                else:
-                    v['native_storage_pool_id'] = default_srps[emulation_type]
+        except exception.SSLCertificateFailed:
+            LOG.error('SSL certificate failed when list volumes for VMax')
+            raise
+        except Exception as err:
+            msg = "Failed to get list volumes from VMAX: {}".format(err)
+            LOG.error(msg)
+            raise exception.StorageBackendException(msg)
 
-                volume_list.append(v)
+    def iter_volumes(self, storage_id, page_size):
+        """Yield volumes page by page while the volume list is retrieved.
 
-            return volume_list
+        The details of a page of volumes are fetched as soon as its ids
+        arrive from the Unisphere iterator.
+        """
+        try:
+            default_srps = self.rest.get_default_srps(
+                self.array_id, version=self.uni_version)
+            sg_infos = {}
+            for volumes in self.rest.iter_volume_list(
+                    self.array_id, version=self.uni_version,
+                    params={'data_volume': 'false'}):
+                if not volumes:
+                    yield []
+                for start in range(0, len(volumes), page_size):
+                    yield self._get_volumes(
+                        storage_id, volumes[start:start + page_size],
+                        default_srps, sg_infos)
 
         except exception.SSLCertificateFailed:
             LOG.error('SSL certificate failed when list volumes for VMax')
@@ -22,12 +22,13 @@ import requests.auth
 import requests.exceptions as r_exc
 import six
 import urllib3
+from eventlet import greenpool
 from oslo_log import log as logging
 
 from delfin import cryptor
 from delfin import exception
-from delfin import ssl_utils
 from delfin.common import alert_util
+from delfin.drivers.utils import http_transport
 from delfin.i18n import _
 
 LOG = logging.getLogger(__name__)
@@ -47,17 +48,20 @@ STATUS_401 = 401
 
 # Default expiration time(in sec) for vmax connect request
 VERSION_GET_TIME_OUT = 10
+# Default number of iterator pages retrieved at the same time
+PAGE_FETCH_WORKERS = 4
 
 
 class VMaxRest(object):
     """Rest class based on Unisphere for VMax Rest API."""
 
-    def __init__(self):
+    def __init__(self, page_fetch_workers=PAGE_FETCH_WORKERS):
         self.session = None
         self.base_uri = None
         self.user = None
         self.passwd = None
         self.verify = None
+        self.page_fetch_workers = page_fetch_workers
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     def set_rest_credentials(self, array_info):
@@ -80,10 +84,10 @@ class VMaxRest(object):
                  {'base_uri': self.base_uri})
         if self.session:
             self.session.close()
-        session = requests.session()
-        session.headers = {'content-type': 'application/json',
-                           'accept': 'application/json',
-                           'Application-Type': 'delfin'}
+        session = http_transport.create_session()
+        session.headers.update({'content-type': 'application/json',
+                                'accept': 'application/json',
+                                'Application-Type': 'delfin'})
         session.auth = requests.auth.HTTPBasicAuth(
             self.user, cryptor.decode(self.passwd))
 
@@ -93,7 +97,6 @@ class VMaxRest(object):
             LOG.debug("Enable certificate verification, ca_path: {0}".format(
                 self.verify))
             session.verify = self.verify
-        session.mount("https://", ssl_utils.get_host_name_ignore_adapter())
 
         self.session = session
         return session
@@ -340,6 +343,21 @@ class VMaxRest(object):
             resource_object = self.list_pagination(resource_object)
         return resource_object
 
+    def iter_request(self, target_uri, resource_type, params=None):
+        """Send a GET request to the array and yield the result pages.
+        :param target_uri: the target uri
+        :param resource_type: the resource type, e.g. maskingview
+        :param params: optional dict of filter params
+        :returns: generator of result lists
+        :raises: StorageBackendException if the request failed
+        """
+        sc, message = self.request(target_uri, GET, params=params)
+        operation = 'get %(res)s' % {'res': resource_type}
+        # An empty result would be taken for an empty list
+        self.check_status_code_success(operation, sc, message)
+        for page in self.iter_pagination(message):
+            yield page
+
     def get_alert_request(self, target_uri):
         """Send a GET request to the array.
         :param target_uri: the target uri
@@ -529,36 +547,123 @@ class VMaxRest(object):
             pass
         return device_ids
 
+    def iter_volume_list(self, array, version, params):
+        """Get a filtered list of VMax volumes page by page.
+        :param array: the array serial number
+        :param version: the unisphere version
+        :param params: filter parameters
+        :returns: generator of device_ids lists
+        :raises: StorageBackendException if a page can not be read
+        """
+        target_uri = self.build_uri(array, SLOPROVISIONING, 'volume',
+                                    version=version)
+        for page in self.iter_request(target_uri, 'volume', params):
+            try:
+                device_ids = [vol_dict['volumeId'] for vol_dict in page]
+            except (KeyError, TypeError):
+                msg = "Failed to read a page of the volume list."
+                LOG.error(msg)
+                raise exception.StorageBackendException(msg)
+            yield device_ids
+
     def list_pagination(self, list_info):
         """Process lists under or over the maxPageSize
         :param list_info: the object list information
         :returns: the result list
         """
+        if not self._is_paginated(list_info):
+            return list_info
         result_list = []
+        for page in self.iter_pagination(list_info):
+            result_list += page
+        return result_list
+
+    @staticmethod
+    def _is_paginated(list_info):
         try:
-            result_list = list_info['resultList']['result']
-            iterator_id = list_info['id']
-            list_count = list_info['count']
-            max_page_size = list_info['maxPageSize']
-            start_position = list_info['resultList']['from']
-            end_position = list_info['resultList']['to']
+            list_info['resultList']['result']
+            list_info['id']
+            list_info['count']
+            list_info['maxPageSize']
+            list_info['resultList']['from']
+            list_info['resultList']['to']
         except (KeyError, TypeError):
-            return list_info
+            return False
+        return True
+
+    def iter_pagination(self, list_info):
+        """Yield the pages of a list in order, as soon as each arrives.
+        :param list_info: the object list information
+        :returns: generator of result lists
+        """
+        if not self._is_paginated(list_info):
+            yield list_info
+            return
+        yield list_info['resultList']['result']
+        list_count = list_info['count']
+        max_page_size = list_info['maxPageSize']
+        end_position = list_info['resultList']['to']
         if list_count > max_page_size:
             LOG.info("More entries exist in the result list, retrieving "
                      "remainder of results from iterator.")
-
             start_position = end_position + 1
-            if list_count < (end_position + max_page_size):
-                end_position = list_count
-            else:
-                end_position += max_page_size
-            iterator_response = self.get_iterator_page_list(
-                iterator_id, list_count, start_position, end_position,
-                max_page_size)
+            for page in self.iter_iterator_pages(
+                    list_info['id'], list_count, start_position,
+                    start_position + max_page_size - 1, max_page_size):
+                yield page
 
-            result_list += iterator_response
-        return result_list
+    @staticmethod
+    def get_page_ranges(result_count, start_position, end_position,
+                        max_page_size):
+        """Compute the positions of all the remaining iterator pages.
+        :returns: list of (start_position, end_position) tuples
+        """
+        page_ranges = []
+        while start_position <= result_count:
+            page_ranges.append((start_position,
+                                min(end_position, result_count)))
+            start_position += max_page_size
+            end_position += max_page_size
+        return page_ranges
+
+    def get_iterator_page(self, iterator_id, start_position, end_position):
+        """Get one page of results from an iterator.
+        :returns: list -- results of the page
+        :raises: StorageBackendException if the page can not be read
+        """
+        params = {'to': end_position, 'from': start_position}
+        target_uri = ('/common/Iterator/%(iterator_id)s/page' % {
+            'iterator_id': iterator_id})
+        iterator_response = self.get_request(target_uri, 'iterator', params)
+        try:
+            return iterator_response['result']
+        except (KeyError, TypeError):
+            # A partial list would be taken for the whole one
+            msg = ("Failed to get results %(start)s to %(end)s from "
+                   "iterator %(id)s." % {'start': start_position,
+                                         'end': end_position,
+                                         'id': iterator_id})
+            LOG.error(msg)
+            raise exception.StorageBackendException(msg)
+
+    def iter_iterator_pages(self, iterator_id, result_count, start_position,
+                            end_position, max_page_size):
+        """Retrieve iterator pages in parallel and yield them in order.
+
+        Up to page_fetch_workers pages are requested at the same time.
+        :param iterator_id: the iterator ID
+        :param result_count: the amount of results in the iterator
+        :param start_position: position to begin iterator from
+        :param end_position: position to stop the first page
+        :param max_page_size: the max page size
+        :returns: generator of result lists
+        """
+        page_ranges = self.get_page_ranges(result_count, start_position,
+                                           end_position, max_page_size)
+        pool = greenpool.GreenPool(max(self.page_fetch_workers, 1))
+        return pool.starmap(
+            self.get_iterator_page,
+            [(iterator_id, start, end) for start, end in page_ranges])
 
     def get_iterator_page_list(self, iterator_id, result_count, start_position,
                                end_position, max_page_size):
@@ -571,25 +676,10 @@ class VMaxRest(object):
         :returns: list -- merged results from multiple pages
         """
         iterator_result = []
-        has_more_entries = True
-
-        while has_more_entries:
-            if start_position <= result_count <= end_position:
-                end_position = result_count
-                has_more_entries = False
-
-            params = {'to': end_position, 'from': start_position}
-            target_uri = ('/common/Iterator/%(iterator_id)s/page' % {
-                'iterator_id': iterator_id})
-            iterator_response = self.get_request(target_uri, 'iterator',
-                                                 params)
-            try:
-                iterator_result += iterator_response['result']
-                start_position += max_page_size
-                end_position += max_page_size
-            except (KeyError, TypeError):
-                pass
-
+        for page in self.iter_iterator_pages(iterator_id, result_count,
+                                             start_position, end_position,
+                                             max_page_size):
+            iterator_result += page
         return iterator_result
 
     def get_alerts(self, query_para, array, version):
@@ -33,6 +33,14 @@ class StorageDriver(object):
         """ Reset connection with backend with new args """
         pass
 
+    def close_connection(self):
+        """Close the connection with backend.
+
+        It is called when the driver instance is dropped from the driver
+        cache, drivers keeping sessions should override it to log out.
+        """
+        pass
+
     @abc.abstractmethod
     def get_storage(self, context):
         """Get storage device information from storage system"""
@@ -48,6 +56,26 @@ class StorageDriver(object):
         """List all storage volumes from storage system."""
         pass
 
+    def iter_volumes(self, context, page_size):
+        """Iterate storage volumes from storage system page by page.
+
+        Drivers able to query volumes in pages should override this, so
+        that all the volumes of a storage never need to be held in memory
+        at once. By default the result of list_volumes is split into pages.
+
+        A failure to read a page must raise. A storage without volumes
+        yields one empty list, yielding no list at all is taken as an
+        incomplete iteration and the volumes in database are kept.
+
+        :param page_size: maximum number of volumes in one page
+        :return: an iterator of volume lists
+        """
+        volumes = self.list_volumes(context)
+        if not volumes:
+            yield []
+        for start in range(0, len(volumes), page_size):
+            yield volumes[start:start + page_size]
+
     @abc.abstractmethod
     def add_trap_config(self, context, trap_config):
         """Config the trap receiver in storage system."""
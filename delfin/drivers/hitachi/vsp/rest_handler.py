@@ -14,6 +14,7 @@
 #    under the License.
 import threading
 
+import eventlet
 import requests
 import six
 from oslo_log import log as logging
@@ -21,6 +22,7 @@ from oslo_log import log as logging
 from delfin import cryptor
 from delfin import exception
 from delfin.drivers.hitachi.vsp import consts
+from delfin.drivers.utils import token_cache
 from delfin.drivers.utils.rest_client import RestClient
 
 LOG = logging.getLogger(__name__)
@@ -53,8 +55,9 @@ class RestHandler(RestClient):
                 if method == 'DELETE' and RestHandler. \
                         LOGOUT_URL in url:
                     return res
+                invalid_token = self.rest_auth_token
                 self.rest_auth_token = None
-                access_session = self.login()
+                access_session = self.login(invalid_token)
                 if access_session is not None:
                     res = self. \
                         do_call(url, data, method, calltimeout)
@@ -77,16 +80,31 @@ class RestHandler(RestClient):
             result_json = res.json()
         return result_json
 
-    def login(self):
+    def _login(self):
+        url = '%s/%s/sessions' % \
+              (RestHandler.COMM_URL,
+               self.storage_device_id)
+        data = {}
+        res = self. \
+            do_call(url, data, 'POST', 10)
+        if res.status_code == 200:
+            result = res.json()
+            return {'token': 'Session %s' % result.get('token'),
+                    'session_id': result.get('sessionId')}
+
+        LOG.error("Login error. URL: %(url)s\n"
+                  "Reason: %(reason)s.",
+                  {"url": url, "reason": res.text})
+        if 'authentication failed' in res.text:
+            raise exception.InvalidUsernameOrPassword()
+        else:
+            raise exception.BadResponse(res.text)
+
+    def login(self, invalid_token=None):
         try:
             self.get_device_id()
             access_session = self.rest_auth_token
             if self.san_address:
-                url = '%s/%s/sessions' % \
-                      (RestHandler.COMM_URL,
-                       self.storage_device_id)
-                data = {}
-
                 with self.session_lock:
                     if self.session is None:
                         self.init_http_head()
@@ -94,23 +112,13 @@ class RestHandler(RestClient):
                         requests.auth.HTTPBasicAuth(
                             self.rest_username,
                             cryptor.decode(self.rest_password))
-                    res = self. \
-                        do_call(url, data, 'POST', 10)
-                    if res.status_code == 200:
-                        result = res.json()
-                        self.session_id = result.get('sessionId')
-                        access_session = 'Session %s' % result.get('token')
-                        self.rest_auth_token = access_session
-                        self.session.headers[
-                            RestHandler.AUTH_KEY] = access_session
-                    else:
-                        LOG.error("Login error. URL: %(url)s\n"
-                                  "Reason: %(reason)s.",
-                                  {"url": url, "reason": res.text})
-                        if 'authentication failed' in res.text:
-                            raise exception.InvalidUsernameOrPassword()
-                        else:
-                            raise exception.BadResponse(res.text)
+                    session_data = token_cache.get_or_login(
+                        self.token_key, self._login, invalid_token)
+                    self.session_id = session_data['session_id']
+                    access_session = session_data['token']
+                    self.rest_auth_token = access_session
+                    self.session.headers[
+                        RestHandler.AUTH_KEY] = access_session
             else:
                 LOG.error('Login Parameter error')
 
@@ -128,7 +136,10 @@ class RestHandler(RestClient):
                        self.storage_device_id,
                        self.session_id)
                 if self.san_address:
-                    self.call(url, method='DELETE')
+                    # A shared session is still used by other processes,
+                    # it is left to expire on the storage
+                    if not token_cache.is_enabled():
+                        self.call(url, method='DELETE')
                     self.session_id = None
                     self.storage_device_id = None
                     self.device_model = None
@@ -189,13 +200,51 @@ class RestHandler(RestClient):
         result_json = self.get_rest_info(url)
         return result_json
 
-    def get_all_volumes(self):
-        url = '%s/%s/ldevs?ldevOption=defined&count=%s' % \
+    def get_volumes(self, head_ldev_id=0,
+                    count=consts.MAX_LDEV_NUMBER_OF_RESTAPI):
+        url = '%s/%s/ldevs?ldevOption=defined&headLdevId=%s&count=%s' % \
               (RestHandler.COMM_URL, self.storage_device_id,
-               consts.MAX_LDEV_NUMBER_OF_RESTAPI)
+               head_ldev_id, count)
         result_json = self.get_rest_info(url)
         return result_json
 
+    def iter_volume_pages(self, count=consts.MAX_LDEV_NUMBER_OF_RESTAPI):
+        """Yield the defined LDEVs page by page in LDEV id order.
+
+        A page starts after the last LDEV of the previous one, so pages
+        can not be requested all at once. The next page is requested while
+        the caller handles the current one, at most two pages are held in
+        memory. A page which can not be read raises, the LDEVs read so far
+        are not the whole list. The last page may be empty.
+        """
+        count = min(count, consts.MAX_LDEV_NUMBER_OF_RESTAPI)
+        next_page = eventlet.spawn(self.get_volumes, 0, count)
+        try:
+            while next_page is not None:
+                result_json = next_page.wait()
+                next_page = None
+                if not result_json or result_json.get('data') is None:
+                    raise exception.StorageBackendException(
+                        'Failed to get the LDEVs of storage %s'
+                        % self.storage_device_id)
+                volumes = result_json['data']
+                if len(volumes) >= count:
+                    next_page = eventlet.spawn(
+                        self.get_volumes,
+                        int(volumes[-1].get('ldevId')) + 1, count)
+                    # Let the request go out before the page is handled
+                    eventlet.sleep(0)
+                yield volumes
+        finally:
+            if next_page is not None:
+                next_page.kill()
+
+    def get_all_volumes(self):
+        volumes = []
+        for page in self.iter_volume_pages():
+            volumes.extend(page)
+        return {'data': volumes}
+
     def get_system_info(self):
         result_json = self.get_rest_info(RestHandler.COMM_URL, timeout=10)
 
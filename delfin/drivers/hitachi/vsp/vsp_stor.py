@@ -155,64 +155,58 @@ class HitachiVspDriver(driver.StorageDriver):
             LOG.error(err_msg)
             raise exception.InvalidResults(err_msg)
 
-    def list_volumes(self, context):
-        try:
-            volumes_info = self.rest_handler.get_all_volumes()
-
-            volume_list = []
-            volumes = volumes_info.get('data')
-            for volume in volumes:
-                if volume.get('emulationType') == 'NOT DEFINED':
-                    continue
-                orig_pool_id = volume.get('poolId')
-                compressed = False
-                deduplicated = False
-                if volume.get('dataReductionMode') == \
-                        'compression_deduplication':
-                    deduplicated = True
-                    compressed = True
-                if volume.get('dataReductionMode') == 'compression':
-                    compressed = True
-                if volume.get('status') == 'NML':
-                    status = 'normal'
-                else:
-                    status = 'abnormal'
-
-                vol_type = constants.VolumeType.THICK
-                for voltype in volume.get('attributes'):
-                    if voltype == 'HTI':
-                        vol_type = constants.VolumeType.THIN
+    def _get_volume_model(self, volume):
+        orig_pool_id = volume.get('poolId')
+        compressed = False
+        deduplicated = False
+        if volume.get('dataReductionMode') == \
+                'compression_deduplication':
+            deduplicated = True
+            compressed = True
+        if volume.get('dataReductionMode') == 'compression':
+            compressed = True
+        if volume.get('status') == 'NML':
+            status = 'normal'
+        else:
+            status = 'abnormal'
 
-                total_cap = \
-                    int(volume.get('blockCapacity')) * consts.BLOCK_SIZE
-                used_cap = \
-                    int(volume.get('blockCapacity')) * consts.BLOCK_SIZE
-                # Because there is only subscribed capacity in device,so free
-                # capacity always 0
-                free_cap = 0
-                if volume.get('label'):
-                    name = volume.get('label')
-                else:
-                    name = 'ldev_%s' % str(volume.get('ldevId'))
+        vol_type = constants.VolumeType.THICK
+        for voltype in volume.get('attributes'):
+            if voltype == 'HTI':
+                vol_type = constants.VolumeType.THIN
 
-                v = {
-                    'name': name,
-                    'storage_id': self.storage_id,
-                    'description': 'Hitachi VSP volume',
-                    'status': status,
-                    'native_volume_id': str(volume.get('ldevId')),
-                    'native_storage_pool_id': orig_pool_id,
-                    'type': vol_type,
-                    'total_capacity': total_cap,
-                    'used_capacity': used_cap,
-                    'free_capacity': free_cap,
-                    'compressed': compressed,
-                    'deduplicated': deduplicated,
-                }
+        total_cap = \
+            int(volume.get('blockCapacity')) * consts.BLOCK_SIZE
+        used_cap = \
+            int(volume.get('blockCapacity')) * consts.BLOCK_SIZE
+        # Because there is only subscribed capacity in device,so free
+        # capacity always 0
+        free_cap = 0
+        if volume.get('label'):
+            name = volume.get('label')
+        else:
+            name = 'ldev_%s' % str(volume.get('ldevId'))
 
-                volume_list.append(v)
+        return {
+            'name': name,
+            'storage_id': self.storage_id,
+            'description': 'Hitachi VSP volume',
+            'status': status,
+            'native_volume_id': str(volume.get('ldevId')),
+            'native_storage_pool_id': orig_pool_id,
+            'type': vol_type,
+            'total_capacity': total_cap,
+            'used_capacity': used_cap,
+            'free_capacity': free_cap,
+            'compressed': compressed,
+            'deduplicated': deduplicated,
+        }
 
-            return volume_list
+    def iter_volumes(self, context, page_size):
+        try:
+            for volumes in self.rest_handler.iter_volume_pages(page_size):
+                yield [self._get_volume_model(volume) for volume in volumes
+                       if volume.get('emulationType') != 'NOT DEFINED']
         except exception.DelfinException as err:
             err_msg = "Failed to get volumes metrics from hitachi vsp: %s" % \
                       (six.text_type(err))
@@ -224,6 +218,13 @@ class HitachiVspDriver(driver.StorageDriver):
             LOG.error(err_msg)
             raise exception.InvalidResults(err_msg)
 
+    def list_volumes(self, context):
+        volume_list = []
+        for volumes in self.iter_volumes(
+                context, consts.MAX_LDEV_NUMBER_OF_RESTAPI):
+            volume_list.extend(volumes)
+        return volume_list
+
     @staticmethod
     def parse_queried_alerts(alerts, alert_list, query_para=None):
         for alert in alerts:
@@ -58,6 +58,7 @@ class Hpe3parStorDriver(driver.StorageDriver):
         self.rest_handler.login()
 
     def close_connection(self):
+        self.ssh_handler.close()
         self.rest_handler.logout()
 
     def get_storage(self, context):
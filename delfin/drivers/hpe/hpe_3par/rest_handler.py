@@ -21,6 +21,7 @@ from oslo_log import log as logging
 from delfin import cryptor
 from delfin import exception
 from delfin.drivers.hpe.hpe_3par import consts
+from delfin.drivers.utils import token_cache
 
 LOG = logging.getLogger(__name__)
 
@@ -73,8 +74,9 @@ class RestHandler(object):
                     if method == 'DELETE' and RestHandler.\
                             REST_LOGOUT_URL in url:
                         return res
+                    invalid_token = self.rest_client.rest_auth_token
                     self.rest_client.rest_auth_token = None
-                    access_session = self.login()
+                    access_session = self.login(invalid_token)
                     # if get token，Revisit url
                     if access_session is not None:
                         res = self.rest_client. \
@@ -103,48 +105,53 @@ class RestHandler(object):
                 rejson = res.json()
         return rejson
 
-    def login(self):
-        """Login Hpe3par storage array."""
+    def _login(self):
+        url = RestHandler.REST_AUTH_URL
+        data = {"user": self.rest_client.rest_username,
+                "password": cryptor.decode(
+                    self.rest_client.rest_password)
+                }
+        res = self.rest_client. \
+            do_call(url, data, 'POST',
+                    calltimeout=consts.SOCKET_TIMEOUT)
+
+        if res is None:
+            LOG.error('Login res is None')
+            raise exception.InvalidResults('res is None')
+
+        if res.status_code == consts. \
+                LOGIN_SUCCESS_STATUS_CODES:
+            result = res.json()
+            return {'token': result.get('key')}
+
+        LOG.error("Login error. URL: %(url)s\n"
+                  "Reason: %(reason)s.",
+                  {"url": url, "reason": res.text})
+        if 'invalid username or password' in res.text:
+            raise exception.InvalidUsernameOrPassword()
+        else:
+            raise exception.BadResponse(res.text)
+
+    def login(self, invalid_token=None):
+        """Login Hpe3par storage array.
+
+        :param invalid_token: session key rejected by the array, if any
+        """
         try:
             access_session = self.rest_client.rest_auth_token
             if self.rest_client.san_address:
-                url = RestHandler.REST_AUTH_URL
-
-                data = {"user": self.rest_client.rest_username,
-                        "password": cryptor.decode(
-                            self.rest_client.rest_password)
-                        }
-
                 self.session_lock.acquire()
 
                 if self.rest_client.rest_auth_token is not None:
                     return self.rest_client.rest_auth_token
 
                 self.rest_client.init_http_head()
-                res = self.rest_client. \
-                    do_call(url, data, 'POST',
-                            calltimeout=consts.SOCKET_TIMEOUT)
-
-                if res is None:
-                    LOG.error('Login res is None')
-                    raise exception.InvalidResults('res is None')
-
-                if res.status_code == consts. \
-                        LOGIN_SUCCESS_STATUS_CODES:
-                    result = res.json()
-
-                    access_session = result.get('key')
-                    self.rest_client.rest_auth_token = access_session
-                    self.rest_client.session.headers[
-                        RestHandler.REST_AUTH_KEY] = access_session
-                else:
-                    LOG.error("Login error. URL: %(url)s\n"
-                              "Reason: %(reason)s.",
-                              {"url": url, "reason": res.text})
-                    if 'invalid username or password' in res.text:
-                        raise exception.InvalidUsernameOrPassword()
-                    else:
-                        raise exception.BadResponse(res.text)
+                access_session = token_cache.get_or_login(
+                    self.rest_client.token_key, self._login,
+                    invalid_token)['token']
+                self.rest_client.rest_auth_token = access_session
+                self.rest_client.session.headers[
+                    RestHandler.REST_AUTH_KEY] = access_session
             else:
                 LOG.error('Login Parameter error')
 
@@ -162,7 +169,10 @@ class RestHandler(object):
             if self.rest_client.rest_auth_token is not None:
                 url = '%s%s' % (url, self.rest_client.rest_auth_token)
             self.rest_client.rest_auth_token = None
-            if self.rest_client.san_address:
+            # A shared session is still used by other processes, it is
+            # left to expire on the array
+            if self.rest_client.san_address and \
+                    not token_cache.is_enabled():
                 self.call(url, method='DELETE')
             if self.rest_client.session:
                 self.rest_client.session.close()
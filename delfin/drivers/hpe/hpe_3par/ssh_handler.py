@@ -20,7 +20,7 @@ from oslo_log import log as logging
 from delfin import exception
 from delfin import utils
 
-from delfin.drivers.utils.ssh_client import SSHClient
+from delfin.drivers.utils.ssh_client import SSHPool
 
 LOG = logging.getLogger(__name__)
 
@@ -37,13 +37,17 @@ class SSHHandler(object):
 
     def __init__(self, **kwargs):
         self.kwargs = kwargs
+        self.ssh_pool = SSHPool(**kwargs)
+
+    def close(self):
+        """Close the pooled ssh connections."""
+        self.ssh_pool.close_all()
 
     def login(self, context):
         """Test SSH connection """
         version = ''
         try:
-            ssh_client = SSHClient(**self.kwargs)
-            re = ssh_client.do_exec(SSHHandler.HPE3PAR_COMMAND_SHOWWSAPI)
+            re = self.ssh_pool.do_exec(SSHHandler.HPE3PAR_COMMAND_SHOWWSAPI)
             wsapi_infos = re.split('\n')
             if len(wsapi_infos) > 1:
                 version = self.get_version(wsapi_infos)
@@ -73,8 +77,7 @@ class SSHHandler(object):
         """
         re = ''
         try:
-            ssh_client = SSHClient(**self.kwargs)
-            re = ssh_client.do_exec(
+            re = self.ssh_pool.do_exec(
                 SSHHandler.HPE3PAR_COMMAND_CHECKHEALTH)
         except Exception as e:
             LOG.error("Get health state error: %s", six.text_type(e))
@@ -87,8 +90,7 @@ class SSHHandler(object):
         """
         re = ''
         try:
-            ssh_client = SSHClient(**self.kwargs)
-            re = ssh_client.do_exec(SSHHandler.HPE3PAR_COMMAND_SHOWALERT)
+            re = self.ssh_pool.do_exec(SSHHandler.HPE3PAR_COMMAND_SHOWALERT)
         except Exception as e:
             LOG.error("Get all alerts error: %s", six.text_type(e))
             raise e
@@ -98,10 +100,9 @@ class SSHHandler(object):
         """Clear alert from storage system.
             Currently not implemented   removes command : removealert
         """
-        ssh_client = SSHClient(**self.kwargs)
         utils.check_ssh_injection([alert_id])
         command_str = SSHHandler.HPE3PAR_COMMAND_REMOVEALERT % alert_id
-        res = ssh_client.do_exec(command_str)
+        res = self.ssh_pool.do_exec(command_str)
         if res:
             if self.ALERT_NOT_EXIST_MSG not in res:
                 raise exception.InvalidResults(six.text_type(res))
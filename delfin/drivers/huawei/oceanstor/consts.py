@@ -42,6 +42,8 @@ FILE_SYSTEM_POOL_TYPE = '2'
 
 SECTORS_SIZE = 512
 QUERY_PAGE_SIZE = 150
+# Number of pages of a query requested at the same time
+QUERY_PAGE_WORKERS = 4
 
 THICK_LUNTYPE = '0'
 THIN_LUNTYPE = '1'
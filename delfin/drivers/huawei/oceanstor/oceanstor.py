@@ -116,22 +116,27 @@ class OceanStorDriver(driver.StorageDriver):
             raise exception.StorageBackendException(
                 'Failed to get pool metrics from OceanStor')
 
-    def _get_orig_pool_id(self, pools, volume):
+    @staticmethod
+    def _get_pool_id_index(pools):
+        """Map pool names to pool ids, the first pool of a name wins."""
+        pool_ids = {}
         for pool in pools:
-            if volume['PARENTNAME'] == pool['NAME']:
-                return pool['ID']
-        return ''
+            pool_ids.setdefault(pool['NAME'], pool['ID'])
+        return pool_ids
+
+    def _get_orig_pool_id(self, pool_ids, volume):
+        return pool_ids.get(volume['PARENTNAME'], '')
 
     def list_volumes(self, context):
         try:
             # Get all volumes in OceanStor
             volumes = self.client.get_all_volumes()
-            pools = self.client.get_all_pools()
+            pool_ids = self._get_pool_id_index(self.client.get_all_pools())
 
             volume_list = []
             for volume in volumes:
                 # Get pool id of volume
-                orig_pool_id = self._get_orig_pool_id(pools, volume)
+                orig_pool_id = self._get_orig_pool_id(pool_ids, volume)
                 compressed = False
                 if volume['ENABLECOMPRESSION'] != 'false':
                     compressed = True
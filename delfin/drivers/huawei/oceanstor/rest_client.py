@@ -19,13 +19,15 @@ import json
 import requests
 import six
 import urllib3
+from eventlet import greenpool
 from urllib3.exceptions import InsecureRequestWarning
 from oslo_log import log as logging
 
 from delfin import cryptor
 from delfin import exception
 from delfin.drivers.huawei.oceanstor import consts
-from delfin.ssl_utils import HostNameIgnoreAdapter
+from delfin.drivers.utils import http_transport
+from delfin.drivers.utils import token_cache
 from delfin.i18n import _
 
 LOG = logging.getLogger(__name__)
@@ -43,6 +45,9 @@ class RestClient(object):
         self.rest_port = rest_access.get('port')
         self.rest_username = rest_access.get('username')
         self.rest_password = rest_access.get('password')
+        self.token_key = token_cache.get_key(
+            self.rest_host, self.rest_port, self.rest_username,
+            self.rest_password)
 
         # Lists of addresses to try, for authorization
         address = 'https://%(host)s:%(port)s/deviceManager/rest/' % \
@@ -66,7 +71,7 @@ class RestClient(object):
 
     def init_http_head(self):
         self.url = None
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
         self.session.headers.update({
             "Connection": "keep-alive",
             "Content-Type": "application/json"})
@@ -76,7 +81,6 @@ class RestClient(object):
             LOG.debug("Enable certificate verification, verify: {0}".format(
                 self.verify))
             self.session.verify = self.verify
-            self.session.mount("https://", HostNameIgnoreAdapter())
 
         self.session.trust_env = False
 
@@ -136,15 +140,13 @@ class RestClient(object):
 
         return res_json
 
-    def login(self):
-        """Login Huawei storage array."""
-        device_id = None
+    def _login(self):
+        unreachable = bool(self.san_address)
         for item_url in self.san_address:
             url = item_url + "xx/sessions"
             data = {"username": self.rest_username,
                     "password": cryptor.decode(self.rest_password),
                     "scope": "0"}
-            self.init_http_head()
             result = self.do_call(url, data, 'POST',
                                   calltimeout=consts.LOGIN_SOCKET_TIMEOUT,
                                   log_filter_flag=True)
@@ -153,28 +155,48 @@ class RestClient(object):
                 LOG.error("Login error. URL: %(url)s\n"
                           "Reason: %(reason)s.",
                           {"url": item_url, "reason": result})
+                if result['error']['code'] != \
+                        consts.ERROR_CONNECT_TO_SERVER:
+                    unreachable = False
                 continue
 
             LOG.debug('Login success: %(url)s', {'url': item_url})
             device_id = result['data']['deviceid']
-            self.device_id = device_id
-            self.url = item_url + device_id
-            self.session.headers['iBaseToken'] = result['data']['iBaseToken']
             if (result['data']['accountstate']
                     in (consts.PWD_EXPIRED, consts.PWD_RESET)):
+                self.url = item_url + device_id
+                self.session.headers['iBaseToken'] = \
+                    result['data']['iBaseToken']
                 self.logout()
                 msg = _("Password has expired or has been reset, "
                         "please change the password.")
                 LOG.error(msg)
                 raise exception.StorageBackendException(msg)
-            break
-
-        if device_id is None:
-            msg = _("Failed to login with all rest URLs.")
-            LOG.error(msg)
-            raise exception.StorageBackendException(msg)
-
-        return device_id
+            return {'token': result['data']['iBaseToken'],
+                    'device_id': device_id,
+                    'url': item_url + device_id,
+                    'cookies': requests.utils.dict_from_cookiejar(
+                        self.session.cookies)}
+
+        msg = _("Failed to login with all rest URLs.")
+        LOG.error(msg)
+        if unreachable:
+            raise exception.InvalidIpOrPort()
+        raise exception.StorageBackendException(msg)
+
+    def login(self, invalid_token=None):
+        """Login Huawei storage array.
+
+        :param invalid_token: iBaseToken rejected by the array, if any
+        """
+        self.init_http_head()
+        session_data = token_cache.get_or_login(
+            self.token_key, self._login, invalid_token)
+        self.device_id = session_data['device_id']
+        self.url = session_data['url']
+        self.session.headers['iBaseToken'] = session_data['token']
+        self.session.cookies.update(session_data['cookies'])
+        return self.device_id
 
     def call(self, url, data=None, method=None, log_filter_flag=False):
         """Send requests to server.
@@ -189,7 +211,7 @@ class RestClient(object):
         if (error_code == consts.ERROR_CONNECT_TO_SERVER
                 or error_code == consts.ERROR_UNAUTHORIZED_TO_SERVER):
             LOG.error("Can't open the recent url, relogin.")
-            device_id = self.login()
+            device_id = self.login(self.session.headers.get('iBaseToken'))
 
         if device_id is not None:
             LOG.debug('Replace URL: \n'
@@ -203,25 +225,61 @@ class RestClient(object):
                 result['error']['code'] = 0
         return result
 
+    def get_count(self, url, log_filter_flag=False):
+        """Get the number of objects of a resource."""
+        result = self.call('{0}/count'.format(url), None, 'GET',
+                           log_filter_flag)
+        msg = _('Query resource count error')
+        self._assert_rest_result(result, msg)
+        self._assert_data_in_result(result, msg)
+        return int(result['data']['COUNT'])
+
+    def _get_page(self, url, data, method, log_filter_flag, start, end):
+        url_p = '{0}?range=[{1}-{2}]'.format(url, start, end)
+        result = self.call(url_p, data, method, log_filter_flag)
+        self._assert_rest_result(result, _('Query resource volume error'))
+        return result.get('data', [])
+
     def paginated_call(self, url, data=None, method=None,
                        log_filter_flag=False,
                        page_size=consts.QUERY_PAGE_SIZE):
-        result_list = []
-        start, end = 0, page_size
-        msg = _('Query resource volume error')
-        while True:
-            url_p = '{0}?range=[{1}-{2}]'.format(url, start, end)
-            start, end = end, end + page_size
-            result = self.call(url_p, data, method, log_filter_flag)
-            self._assert_rest_result(result, msg)
+        """Query all the objects of a resource.
 
-            # Empty data if this is first page, OR last page got all data
-            if 'data' not in result:
-                break
+        The objects are counted first, so that all the page ranges are
+        known and requested concurrently. Pages after the counted ones,
+        e.g. objects created meanwhile, are then queried one by one.
+        """
+        result_list = []
+        try:
+            count = self.get_count(url, log_filter_flag)
+        except Exception as e:
+            LOG.debug('Failed to count %s, query it page by page: %s',
+                      url, six.text_type(e))
+            count = 0
+
+        start = 0
+        if count:
+            pool = greenpool.GreenPool(consts.QUERY_PAGE_WORKERS)
+            pages = pool.starmap(
+                self._get_page,
+                [(url, data, method, log_filter_flag, page_start,
+                  page_start + page_size)
+                 for page_start in range(0, count, page_size)])
+            page = []
+            for page in pages:
+                result_list.extend(page)
+            start = (count + page_size - 1) // page_size * page_size
+            # Check if the last counted page was the last one
+            if len(page) < page_size:
+                return result_list
 
-            result_list.extend(result['data'])
+        while True:
+            page = self._get_page(url, data, method, log_filter_flag,
+                                  start, start + page_size)
+            start += page_size
+            result_list.extend(page)
             # Check if this is last page
-            if len(result['data']) < page_size:
+            if len(page) < page_size:
                 break
 
         return result_list
@@ -16,6 +16,7 @@ import time
 
 import paramiko
 import six
+from eventlet import greenpool
 from oslo_log import log as logging
 from oslo_utils import units
 
@@ -47,6 +48,12 @@ class SSHHandler(object):
 
     SECONDS_TO_MS = 1000
 
+    POOL_FIELDS = ('id', 'name', 'status', 'capacity', 'free_capacity',
+                   'used_capacity', 'virtual_capacity')
+    VOLUME_FIELDS = ('id', 'name', 'status', 'mdisk_grp_id', 'capacity',
+                     'vdisk_UID', 'se_copy_count', 'compressed_copy_count')
+    VOLUME_USAGE_FIELDS = ('used_capacity', 'free_capacity')
+
     def __init__(self, **kwargs):
         self.ssh_pool = SSHPool(**kwargs)
 
@@ -231,21 +238,60 @@ class SSHHandler(object):
                     value = strinfo[1]
                 detail_map[key] = value
 
+    @staticmethod
+    def iter_delim_rows(output, delim=':'):
+        """Parse the delimited list output of a command row by row.
+
+        The first line is the header, each other line is returned as a
+        dict keyed by the header fields.
+        """
+        header = None
+        for line in six.StringIO(output):
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            values = line.split(delim)
+            if header is None:
+                header = values
+                continue
+            yield dict(zip(header, values))
+
+    def exec_ssh_commands(self, commands):
+        """Execute commands concurrently over the pooled connections."""
+        pool = greenpool.GreenPool(
+            self.ssh_pool.max_size * self.ssh_pool.max_channels)
+        return list(pool.imap(self.exec_ssh_command, commands))
+
+    def fill_missing_fields(self, rows, fields, detail_command):
+        """Get the fields absent from the list view from object details.
+
+        Only the rows lacking one of fields are queried, one detail
+        command per object, run concurrently.
+        """
+        missing_rows = [row for row in rows
+                        if any(row.get(field) is None for field in fields)]
+        if not missing_rows:
+            return
+        LOG.info('Get details of %s objects with %s.', len(missing_rows),
+                 detail_command % '<id>')
+        details = self.exec_ssh_commands(
+            [detail_command % row['id'] for row in missing_rows])
+        for row, detail_info in zip(missing_rows, details):
+            detail_map = {}
+            self.handle_detail(detail_info, detail_map, split=':')
+            for field in fields:
+                if row.get(field) is None:
+                    row[field] = detail_map.get(field)
+
     def list_storage_pools(self, storage_id):
         try:
-            pool_list = []
-            pool_info = self.exec_ssh_command('lsmdiskgrp')
-            pool_res = pool_info.split('\n')
-            for i in range(1, len(pool_res)):
-                if pool_res[i] is None or pool_res[i] == '':
-                    continue
+            pool_info = self.exec_ssh_command('lsmdiskgrp -delim : -bytes')
+            pool_maps = list(self.iter_delim_rows(pool_info))
+            self.fill_missing_fields(pool_maps, self.POOL_FIELDS,
+                                     'lsmdiskgrp -delim : -bytes %s')
 
-                pool_str = ' '.join(pool_res[i].split())
-                strinfo = pool_str.split(' ')
-                detail_command = 'lsmdiskgrp %s' % strinfo[0]
-                deltail_info = self.exec_ssh_command(detail_command)
-                pool_map = {}
-                self.handle_detail(deltail_info, pool_map, split=' ')
+            pool_list = []
+            for pool_map in pool_maps:
                 status = 'normal' if pool_map.get('status') == 'online' \
                     else 'offline'
                 total_cap = self.parse_string(pool_map.get('capacity'))
@@ -277,36 +323,63 @@ class SSHHandler(object):
             LOG.error(err_msg)
             raise exception.InvalidResults(err_msg)
 
+    def get_volume_usages(self, volume_maps):
+        """Fill used and free capacity of volumes.
+
+        A fully allocated volume uses its whole capacity. The usage of
+        thin and compressed volumes comes from the list of space
+        efficient copies, the first copy of a volume is used.
+        """
+        thin_volume_maps = {}
+        for volume_map in volume_maps:
+            if volume_map.get('se_copy_count', '0') == '0' and \
+                    volume_map.get('compressed_copy_count', '0') == '0':
+                volume_map.setdefault('used_capacity',
+                                      volume_map.get('capacity'))
+                volume_map.setdefault('free_capacity', '0')
+            else:
+                thin_volume_maps[volume_map.get('id')] = volume_map
+        if not thin_volume_maps:
+            return
+
+        try:
+            copy_info = self.exec_ssh_command('lssevdiskcopy -delim : -bytes')
+        except exception.SSHException as e:
+            LOG.warning('Failed to list space efficient volume copies, get '
+                        'volume details instead: %s', six.text_type(e))
+            return
+        for copy_map in self.iter_delim_rows(copy_info):
+            volume_map = thin_volume_maps.pop(copy_map.get('vdisk_id'), None)
+            if volume_map is None:
+                continue
+            for field in self.VOLUME_USAGE_FIELDS:
+                volume_map.setdefault(field, copy_map.get(field))
+
     def list_volumes(self, storage_id):
         try:
+            volume_info = self.exec_ssh_command('lsvdisk -delim : -bytes')
+            volume_maps = list(self.iter_delim_rows(volume_info))
+            self.get_volume_usages(volume_maps)
+            self.fill_missing_fields(
+                volume_maps, self.VOLUME_FIELDS + self.VOLUME_USAGE_FIELDS,
+                'lsvdisk -delim : -bytes %s')
+
             volume_list = []
-            volume_info = self.exec_ssh_command('lsvdisk')
-            volume_res = volume_info.split('\n')
-            for i in range(1, len(volume_res)):
-                if volume_res[i] is None or volume_res[i] == '':
-                    continue
-                volume_str = ' '.join(volume_res[i].split())
-                strinfo = volume_str.split(' ')
-                volume_name = strinfo[1]
-                detail_command = 'lsvdisk -delim : %s' % volume_name
-                deltail_info = self.exec_ssh_command(detail_command)
-                volume_map = {}
-                self.handle_detail(deltail_info, volume_map, split=':')
+            for volume_map in volume_maps:
                 status = 'normal' if volume_map.get('status') == 'online' \
                     else 'offline'
-                volume_type = 'thin' if volume_map.get('se_copy') == 'yes' \
+                volume_type = 'thin' \
+                    if volume_map.get('se_copy_count', '0') != '0' \
                     else 'thick'
                 total_capacity = self.parse_string(volume_map.get('capacity'))
                 free_capacity = self.parse_string(volume_map.
                                                   get('free_capacity'))
                 used_capacity = self.parse_string(volume_map.
                                                   get('used_capacity'))
-                compressed = True
-                deduplicated = True
-                if volume_map.get('compressed_copy') == 'no':
-                    compressed = False
-                if volume_map.get('deduplicated_copy') == 'no':
-                    deduplicated = False
+                compressed = \
+                    volume_map.get('compressed_copy_count', '0') != '0'
+                deduplicated = \
+                    volume_map.get('deduplicated_copy_count', '0') != '0'
 
                 v = {
                     'name': volume_map.get('name'),
@@ -27,6 +27,9 @@ class StorwizeSVCDriver(driver.StorageDriver):
     def reset_connection(self, context, **kwargs):
         self.ssh_hanlder.login()
 
+    def close_connection(self):
+        self.ssh_hanlder.ssh_pool.close_all()
+
     def get_storage(self, context):
         return self.ssh_hanlder.get_storage()
 
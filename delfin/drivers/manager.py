@@ -12,11 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import contextlib
 import copy
 import six
 import stevedore
 import threading
+import time
 
+from oslo_config import cfg
 from oslo_log import log
 
 from delfin import db
@@ -26,6 +30,170 @@ from delfin import ssl_utils
 
 LOG = log.getLogger(__name__)
 
+driver_cache_opts = [
+    cfg.IntOpt('max_size',
+               default=1000,
+               min=0,
+               help='Maximum number of driver instances cached in one '
+                    'process, the least recently used driver is closed and '
+                    'evicted when exceeded. 0 means no limitation.'),
+    cfg.IntOpt('idle_timeout',
+               default=3600,
+               min=0,
+               help='Seconds a cached driver instance may stay unused '
+                    'before it is closed and evicted. 0 means never.'),
+    cfg.BoolOpt('prewarm',
+                default=False,
+                help='Whether task manager creates the drivers of all '
+                     'registered storages when it starts.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(driver_cache_opts, group='driver_cache')
+
+
+class DriverCache(object):
+    """LRU cache of driver instances keyed by storage id.
+
+    A driver is evicted when the cache is full and it is the least
+    recently used one, or when it has not been used for idle_timeout
+    seconds. The connection of an evicted driver is closed, once the calls
+    which acquired it released it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # storage_id -> (driver, last used time), least recently used first
+        self._drivers = collections.OrderedDict()
+        # id(driver) -> number of calls using it
+        self._users = {}
+        # id(driver) -> driver evicted while in use, closed by its last user
+        self._closing = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, storage_id):
+        return storage_id in self._drivers
+
+    def __iter__(self):
+        return iter(list(self._drivers))
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def __getitem__(self, storage_id):
+        driver = self.get(storage_id)
+        if driver is None:
+            raise KeyError(storage_id)
+        return driver
+
+    def __setitem__(self, storage_id, driver):
+        self.add(storage_id, driver)
+
+    def add(self, storage_id, driver, acquire=False):
+        """Cache the driver of a storage, acquire it for the caller."""
+        evicted = []
+        with self._lock:
+            self._drivers.pop(storage_id, None)
+            self._drivers[storage_id] = (driver, time.time())
+            if acquire:
+                self._acquire(driver)
+            max_size = CONF.driver_cache.max_size
+            while max_size and len(self._drivers) > max_size:
+                evicted.append(self._drivers.popitem(last=False))
+            self.evictions += len(evicted)
+        self._close(evicted, 'cache is full')
+
+    def get(self, storage_id, default=None, acquire=False):
+        """Return the cached driver of a storage and mark it as used.
+
+        An acquired driver is not closed until it is released.
+        """
+        self.evict_idle()
+        with self._lock:
+            if storage_id not in self._drivers:
+                self.misses += 1
+                return default
+            driver, _ = self._drivers.pop(storage_id)
+            self._drivers[storage_id] = (driver, time.time())
+            if acquire:
+                self._acquire(driver)
+            self.hits += 1
+            return driver
+
+    def _acquire(self, driver):
+        self._users[id(driver)] = self._users.get(id(driver), 0) + 1
+
+    def release(self, driver):
+        """Release an acquired driver, close it if it was evicted."""
+        with self._lock:
+            users = self._users.get(id(driver), 0) - 1
+            if users > 0:
+                self._users[id(driver)] = users
+                return
+            self._users.pop(id(driver), None)
+            driver = self._closing.pop(id(driver), None)
+        if driver is not None:
+            close_driver(driver)
+
+    def pop(self, storage_id, default=None):
+        """Remove the driver of a storage from cache without closing it."""
+        with self._lock:
+            driver, _ = self._drivers.pop(storage_id, (default, None))
+            return driver
+
+    def evict_idle(self):
+        """Close and evict the drivers unused for idle_timeout seconds."""
+        idle_timeout = CONF.driver_cache.idle_timeout
+        if not idle_timeout:
+            return
+        expired_before = time.time() - idle_timeout
+        evicted = []
+        with self._lock:
+            while self._drivers:
+                storage_id, (driver, last_used) = \
+                    next(iter(self._drivers.items()))
+                if last_used > expired_before:
+                    break
+                evicted.append(self._drivers.popitem(last=False))
+            self.evictions += len(evicted)
+        self._close(evicted, 'it is idle')
+
+    def close(self, driver):
+        """Close a driver removed from cache, or let its last user do it."""
+        with self._lock:
+            if self._users.get(id(driver)):
+                self._closing[id(driver)] = driver
+                return
+        close_driver(driver)
+
+    def _close(self, evicted, reason):
+        for storage_id, (driver, _) in evicted:
+            LOG.info('Evict driver of storage %s because %s.',
+                     storage_id, reason)
+            self.close(driver)
+
+    def get_stats(self):
+        """Return size, hit, miss and eviction counters of the cache."""
+        with self._lock:
+            return {
+                'size': len(self._drivers),
+                'in_use': len(self._users),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def close_driver(driver):
+    """Close the connection of a driver, errors are only logged."""
+    try:
+        driver.close_connection()
+    except Exception:
+        LOG.exception('Failed to close connection of driver for storage '
+                      '%s.', getattr(driver, 'storage_id', None))
+
 
 @six.add_metaclass(utils.Singleton)
 class DriverManager(stevedore.ExtensionManager):
@@ -37,10 +205,10 @@ class DriverManager(stevedore.ExtensionManager):
         # The driver_factory will keep the driver instance for
         # each of storage systems so that the session between driver
         # and storage system is effectively used.
-        self.driver_factory = dict()
+        self.driver_factory = DriverCache()
 
     def get_driver(self, context, invoke_on_load=True,
-                   cache_on_load=True, **kwargs):
+                   cache_on_load=True, acquire=False, **kwargs):
         """Get a driver from manager.
 
         :param context: The context of delfin.
@@ -52,43 +220,79 @@ class DriverManager(stevedore.ExtensionManager):
             in driver_factory when generating a new driver object.
             It takes effect when invoke_on_load is True.
         :type cache_on_load: bool
+        :param acquire: Boolean to decide whether the cached driver is
+            acquired, it is then not closed until released.
+        :type acquire: bool
         :param kwargs: Parameters from access_info.
         """
         kwargs = copy.deepcopy(kwargs)
-        kwargs['verify'] = False
-        ca_path = ssl_utils.get_storage_ca_path()
-        if ca_path:
-            ssl_utils.verify_ca_path(ca_path)
-            kwargs['verify'] = ca_path
+        kwargs['verify'] = ssl_utils.get_storage_ca_path() or False
 
         if not invoke_on_load:
+            if kwargs['verify']:
+                ssl_utils.verify_ca_path(kwargs['verify'])
             return self._get_driver_cls(**kwargs)
         else:
-            return self._get_driver_obj(context, cache_on_load, **kwargs)
+            return self._get_driver_obj(context, cache_on_load, acquire,
+                                        **kwargs)
+
+    @contextlib.contextmanager
+    def use_driver(self, context, **kwargs):
+        """Get the driver of a storage, it is not closed while in use."""
+        driver = self.get_driver(context, acquire=True, **kwargs)
+        try:
+            yield driver
+        finally:
+            self.driver_factory.release(driver)
 
     def update_driver(self, storage_id, driver):
         self.driver_factory[storage_id] = driver
 
     def remove_driver(self, storage_id):
         """Clear driver instance from driver factory."""
-        self.driver_factory.pop(storage_id, None)
+        driver = self.driver_factory.pop(storage_id)
+        if driver is not None:
+            self.driver_factory.close(driver)
+
+    def prewarm(self, context, storage_ids):
+        """Create and cache the drivers of storages."""
+        for storage_id in storage_ids:
+            if storage_id in self.driver_factory:
+                continue
+            try:
+                self.get_driver(context, storage_id=storage_id)
+            except Exception as e:
+                LOG.warning('Failed to prewarm driver of storage %s, '
+                            'reason is %s', storage_id, e)
 
-    def _get_driver_obj(self, context, cache_on_load=True, **kwargs):
+    @staticmethod
+    def _load_certificates(ca_path):
+        # Only needed when a driver is created, cached drivers keep the
+        # ca_path they were created with.
+        if ca_path:
+            ssl_utils.verify_ca_path(ca_path)
+            ssl_utils.reload_certificate(ca_path)
+
+    def _get_driver_obj(self, context, cache_on_load=True, acquire=False,
+                        **kwargs):
         if not cache_on_load or not kwargs.get('storage_id'):
-            if kwargs['verify']:
-                ssl_utils.reload_certificate(kwargs['verify'])
+            self._load_certificates(kwargs['verify'])
             cls = self._get_driver_cls(**kwargs)
             return cls(**kwargs)
 
-        if kwargs['storage_id'] in self.driver_factory:
-            return self.driver_factory[kwargs['storage_id']]
+        driver = self.driver_factory.get(kwargs['storage_id'],
+                                         acquire=acquire)
+        if driver is not None:
+            return driver
 
         with self._instance_lock:
             if kwargs['storage_id'] in self.driver_factory:
-                return self.driver_factory[kwargs['storage_id']]
+                driver = self.driver_factory.get(kwargs['storage_id'],
+                                                 acquire=acquire)
+                if driver is not None:
+                    return driver
 
-            if kwargs['verify']:
-                ssl_utils.reload_certificate(kwargs['verify'])
+            self._load_certificates(kwargs['verify'])
             access_info = copy.deepcopy(kwargs)
             storage_id = access_info.pop('storage_id')
             access_info.pop('verify')
@@ -102,7 +306,7 @@ class DriverManager(stevedore.ExtensionManager):
                 cls = self._get_driver_cls(**access_info)
                 driver = cls(**access_info)
 
-            self.driver_factory[storage_id] = driver
+            self.driver_factory.add(storage_id, driver, acquire)
             return driver
 
     def _get_driver_cls(self, **kwargs):
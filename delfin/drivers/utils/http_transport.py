@@ -0,0 +1,202 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+HTTP transport shared by the REST drivers.
+
+All the sessions created here send their requests through one adapter, so
+the connections to a storage are pooled and capped per host whichever
+driver instance uses them. The adapter retries idempotent requests with
+backoff, fills in the default timeouts of each call class and records the
+request latency of each host.
+"""
+
+import bisect
+import threading
+import time
+
+import requests
+from oslo_config import cfg
+from oslo_log import log
+from six.moves.urllib import parse as urlparse
+from urllib3.util import retry
+
+from delfin import ssl_utils
+
+LOG = log.getLogger(__name__)
+
+http_transport_opts = [
+    cfg.IntOpt('max_connections_per_host',
+               default=10,
+               min=1,
+               help='Maximum number of connections kept and used at the '
+                    'same time to one storage host. It should match the '
+                    'number of concurrent requests a sync of a storage '
+                    'issues, requests above it wait for a free '
+                    'connection.'),
+    cfg.IntOpt('max_hosts',
+               default=100,
+               min=1,
+               help='Maximum number of storage hosts whose connection '
+                    'pools are kept.'),
+    cfg.IntOpt('max_retries',
+               default=3,
+               min=0,
+               help='Maximum number of retries of an idempotent request '
+                    'which timed out or got a 502, 503 or 504 response.'),
+    cfg.IntOpt('connect_retries',
+               default=0,
+               min=0,
+               help='Maximum number of retries of a request which failed '
+                    'to connect, within max_retries. A storage which can '
+                    'not be connected is better reported at once to its '
+                    'circuit breaker than retried.'),
+    cfg.FloatOpt('retry_backoff',
+                 default=0.5,
+                 min=0,
+                 help='Backoff factor in seconds between two retries, '
+                      'the n-th retry waits backoff * 2 ^ (n - 1).'),
+    cfg.FloatOpt('connect_timeout',
+                 default=10,
+                 min=1,
+                 help='Seconds to wait for the connection to a storage.'),
+    cfg.FloatOpt('read_timeout',
+                 default=60,
+                 min=1,
+                 help='Default seconds to wait for the response of a query '
+                      '(GET and HEAD).'),
+    cfg.FloatOpt('write_timeout',
+                 default=120,
+                 min=1,
+                 help='Default seconds to wait for the response of a '
+                      'request changing the storage (POST, PUT, PATCH and '
+                      'DELETE).'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(http_transport_opts, group='http_transport')
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+RETRY_STATUSES = frozenset([502, 503, 504])
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class LatencyHistogram(object):
+    """Request latency histograms of each host."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._histograms = {}
+
+    def record(self, host, latency):
+        index = bisect.bisect_left(self._buckets, latency)
+        with self._lock:
+            histogram = self._histograms.get(host)
+            if histogram is None:
+                histogram = {'count': 0, 'sum': 0.0, 'max': 0.0,
+                             'buckets': [0] * (len(self._buckets) + 1)}
+                self._histograms[host] = histogram
+            histogram['count'] += 1
+            histogram['sum'] += latency
+            histogram['max'] = max(histogram['max'], latency)
+            histogram['buckets'][index] += 1
+
+    def get_stats(self):
+        """Return the histogram of each host.
+
+        Buckets are keyed by their upper bound in seconds, 'inf' counts
+        the requests slower than the last bound.
+        """
+        bounds = [str(bound) for bound in self._buckets] + ['inf']
+        with self._lock:
+            return {host: {'count': histogram['count'],
+                           'sum': histogram['sum'],
+                           'max': histogram['max'],
+                           'buckets': dict(zip(bounds,
+                                               histogram['buckets']))}
+                    for host, histogram in self._histograms.items()}
+
+
+LATENCY = LatencyHistogram()
+
+
+class TransportAdapter(ssl_utils.HostNameIgnoreAdapter):
+    """Pooled adapter with retries, default timeouts and latency stats."""
+
+    def __init__(self):
+        super(TransportAdapter, self).__init__(
+            pool_connections=CONF.http_transport.max_hosts,
+            pool_maxsize=CONF.http_transport.max_connections_per_host,
+            pool_block=True,
+            max_retries=retry.Retry(
+                total=CONF.http_transport.max_retries,
+                connect=CONF.http_transport.connect_retries,
+                backoff_factor=CONF.http_transport.retry_backoff,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=IDEMPOTENT_METHODS,
+                raise_on_status=False))
+
+    @staticmethod
+    def get_timeout(method, timeout):
+        """Return the (connect, read) timeout of a request."""
+        if isinstance(timeout, tuple):
+            return timeout
+        if timeout is None:
+            timeout = CONF.http_transport.read_timeout \
+                if method in IDEMPOTENT_METHODS \
+                else CONF.http_transport.write_timeout
+        return CONF.http_transport.connect_timeout, timeout
+
+    def send(self, request, timeout=None, **kwargs):
+        timeout = self.get_timeout(request.method, timeout)
+        host = urlparse.urlsplit(request.url).netloc
+        start = time.time()
+        try:
+            return super(TransportAdapter, self).send(
+                request, timeout=timeout, **kwargs)
+        finally:
+            LATENCY.record(host, time.time() - start)
+
+    def close(self):
+        # The adapter is shared by all sessions, closing one session
+        # must not drop the connections of the others.
+        pass
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def get_adapter():
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = TransportAdapter()
+        return _adapter
+
+
+def create_session():
+    """Return a session sending its requests through the shared adapter."""
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    adapter = get_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_latency_stats():
+    return LATENCY.get_stats()
@@ -21,8 +21,9 @@ import six
 from oslo_log import log as logging
 
 from delfin import exception
-from delfin import ssl_utils
 from delfin.drivers.hpe.hpe_3par import consts
+from delfin.drivers.utils import http_transport
+from delfin.drivers.utils import token_cache
 from delfin.i18n import _
 
 LOG = logging.getLogger(__name__)
@@ -45,11 +46,13 @@ class RestClient(object):
 
         self.verify = kwargs.get('verify', False)
         self.rest_auth_token = None
+        self.token_key = token_cache.get_key(
+            self.san_address, self.rest_username, self.rest_password)
 
     def init_http_head(self):
         if self.session:
             self.session.close()
-        self.session = requests.Session()
+        self.session = http_transport.create_session()
         self.session.headers.update({
             "Connection": "keep-alive",
             'Accept': 'application/json',
@@ -61,8 +64,6 @@ class RestClient(object):
                 self.verify))
             self.session.verify = self.verify
         self.session.trust_env = False
-        self.session.mount("https://",
-                           ssl_utils.get_host_name_ignore_adapter())
 
     def do_call(self, url, data, method,
                 calltimeout=consts.SOCKET_TIMEOUT):
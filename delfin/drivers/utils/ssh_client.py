@@ -13,9 +13,13 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import time
+
 import paramiko
 import six
 from eventlet import pools
+from eventlet import queue
+from oslo_config import cfg
 from oslo_log import log as logging
 from paramiko.hostkeys import HostKeyEntry
 
@@ -24,6 +28,27 @@ from delfin import exception
 
 LOG = logging.getLogger(__name__)
 
+ssh_pool_opts = [
+    cfg.IntOpt('max_connections',
+               default=3,
+               min=1,
+               help='Maximum number of SSH connections to one storage.'),
+    cfg.IntOpt('max_channels',
+               default=4,
+               min=1,
+               help='Maximum number of commands running at the same time '
+                    'as channels of one SSH connection. It should not '
+                    'exceed the session limit of the storage SSH server.'),
+    cfg.IntOpt('idle_timeout',
+               default=300,
+               min=0,
+               help='Seconds an unused SSH connection is kept open before '
+                    'it is closed. 0 means never.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(ssh_pool_opts, group='ssh_pool')
+
 
 class SSHClient(object):
     SOCKET_TIMEOUT = 10
@@ -131,6 +156,14 @@ class SSHClient(object):
 
 
 class SSHPool(pools.Pool):
+    """Pool of SSH connections to one storage.
+
+    A connection is shared by up to max_channels users at the same time,
+    each command running in its own channel of the connection transport,
+    so commands do not pay a key exchange and login each. Connections are
+    kept alive, checked before reuse and closed when idle for too long.
+    """
+
     SOCKET_TIMEOUT = 10
 
     def __init__(self, **kwargs):
@@ -147,7 +180,16 @@ class SSHPool(pools.Pool):
         self.conn_timeout = self.SOCKET_TIMEOUT
         if self.ssh_conn_timeout is None:
             self.ssh_conn_timeout = SSHPool.SOCKET_TIMEOUT
-        super(SSHPool, self).__init__(min_size=0, max_size=3)
+        self.max_channels = CONF.ssh_pool.max_channels
+        self.idle_timeout = CONF.ssh_pool.idle_timeout
+        # id of connection -> number of users of the connection
+        self._users = {}
+        # id of connection -> last time the connection was released
+        self._last_used = {}
+        # ids of the connections to close once their last user released them
+        self._closing = set()
+        super(SSHPool, self).__init__(
+            min_size=0, max_size=CONF.ssh_pool.max_connections)
 
     def set_host_key(self, host_key, ssh):
         """
@@ -204,38 +246,130 @@ class SSHPool(pools.Pool):
             else:
                 raise exception.SSHException(err)
 
+    @staticmethod
+    def is_healthy(conn):
+        """Check that the transport of a connection is still usable."""
+        try:
+            transport = conn.get_transport()
+            if transport is None or not transport.is_active():
+                return False
+            transport.send_ignore()
+            return True
+        except Exception:
+            return False
+
+    def _is_idle(self, conn):
+        if not self.idle_timeout or self._users.get(id(conn)):
+            return False
+        last_used = self._last_used.get(id(conn))
+        return last_used is not None and \
+            time.time() - last_used > self.idle_timeout
+
+    def _discard(self, conn):
+        """Close a connection and forget it."""
+        try:
+            conn.close()
+        except Exception as e:
+            LOG.warning('Failed to close ssh connection to %s: %s',
+                        self.ssh_host, six.text_type(e))
+        if conn in self.free_items:
+            self.free_items.remove(conn)
+        self._users.pop(id(conn), None)
+        self._last_used.pop(id(conn), None)
+        self._closing.discard(id(conn))
+        if self.current_size > 0:
+            self.current_size -= 1
+        if self.channel.getting():
+            # Wake up a greenthread waiting for a connection, there is
+            # room to create one now
+            try:
+                self.channel.put(None, block=False)
+            except queue.Full:
+                pass
+
+    def _acquire(self, conn):
+        """Count a user of conn, keep it free while it has spare channels."""
+        users = self._users.get(id(conn), 0) + 1
+        self._users[id(conn)] = users
+        if users < self.max_channels and conn not in self.free_items:
+            self.free_items.append(conn)
+        return conn
+
     def get(self):
-        """Return an item from the pool, when one is available.
+        """Return a connection from the pool, when one is available.
 
-        This may cause the calling greenthread to block. Check if a
-        connection is active before returning it. For dead connections
-        create and return a new connection.
+        This may cause the calling greenthread to block. Idle and dead
+        free connections are closed, a live connection with a spare
+        channel is shared before a new connection is created.
         """
-        if self.free_items:
-            conn = self.free_items.popleft()
-            if conn:
-                if conn.get_transport().is_active():
-                    return conn
-                else:
-                    conn.close()
-            return self.create()
-        if self.current_size < self.max_size:
-            created = self.create()
-            self.current_size += 1
-            return created
-        return self.channel.get()
+        while True:
+            for conn in list(self.free_items):
+                if self._is_idle(conn):
+                    LOG.debug('Close idle ssh connection to %s.',
+                              self.ssh_host)
+                    self._discard(conn)
+            while self.free_items:
+                conn = self.free_items.popleft()
+                if self.is_healthy(conn):
+                    return self._acquire(conn)
+                if self._users.get(id(conn)):
+                    # Still used by others, let the last user discard it
+                    continue
+                self._discard(conn)
+            if self.current_size < self.max_size:
+                self.current_size += 1
+                try:
+                    created = self.create()
+                except Exception:
+                    self.current_size -= 1
+                    raise
+                return self._acquire(created)
+            conn = self.channel.get()
+            # None wakes us up after a connection was discarded
+            if conn is not None:
+                return self._acquire(conn)
 
     def remove(self, ssh):
-        """Close an ssh client and remove it from free_items."""
-        ssh.close()
-        if ssh in self.free_items:
-            self.free_items.remove(ssh)
-            if self.current_size > 0:
-                self.current_size -= 1
+        """Close an ssh client and remove it from the pool."""
+        self._discard(ssh)
 
     def put(self, conn):
-        if self.current_size > self.max_size:
-            conn.close()
-            self.current_size -= 1
+        users = self._users.get(id(conn), 0)
+        self._users[id(conn)] = max(users - 1, 0)
+        self._last_used[id(conn)] = time.time()
+        if id(conn) in self._closing or not self.is_healthy(conn) \
+                or self.current_size > self.max_size:
+            if not self._users[id(conn)]:
+                self._discard(conn)
+            return
+        if conn in self.free_items:
             return
         super(SSHPool, self).put(conn)
+
+    def close_all(self):
+        """Close all the free connections of the pool.
+
+        Connections still executing commands are closed when their last
+        user puts them back.
+        """
+        for conn in list(self.free_items):
+            if self._users.get(id(conn)):
+                self.free_items.remove(conn)
+                self._closing.add(id(conn))
+            else:
+                self._discard(conn)
+
+    def do_exec(self, command_str):
+        """Execute a command in a channel of a pooled connection."""
+        try:
+            with self.item() as ssh:
+                stdin, stdout, stderr = ssh.exec_command(command_str)
+                res, err = stdout.read(), stderr.read()
+                re = res if res else err
+                return re.decode()
+        except exception.DelfinException:
+            raise
+        except Exception as e:
+            LOG.error('Failed to execute ssh command on %s: %s',
+                      self.ssh_host, six.text_type(e))
+            raise exception.SSHException(six.text_type(e))
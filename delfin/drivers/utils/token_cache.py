@@ -0,0 +1,172 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Login sessions of storages shared by the delfin processes of a node.
+
+A REST driver logs in through get_or_login with a key identifying the
+storage account. The session data returned by its login function, e.g.
+the token and the cookies, is kept in a file under the cache path, so the
+API and task manager processes reuse one session instead of logging in
+each on their own.
+
+Only one caller logs in at a time for a key, the others wait for it and
+then use its session. A session is renewed by one caller when it gets
+close to its ttl, while the others keep using it. A caller whose session
+was rejected by the storage passes the rejected token, the session is
+renewed unless another caller renewed it already.
+
+As the sessions are shared, drivers do not log them out when the cache is
+enabled, they expire on the storage.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import six
+from oslo_concurrency import lockutils
+from oslo_config import cfg
+from oslo_log import log
+
+from delfin import cryptor
+
+LOG = log.getLogger(__name__)
+
+token_cache_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Whether the login sessions of storages are shared '
+                     'by the delfin processes of a node.'),
+    cfg.StrOpt('path',
+               default='$state_path/token_cache',
+               help='Directory of the shared login sessions and of their '
+                    'lock files.'),
+    cfg.IntOpt('ttl',
+               default=1200,
+               min=60,
+               help='Seconds a login session is used. It should be '
+                    'shorter than the session timeout of the storages.'),
+    cfg.IntOpt('refresh_ahead',
+               default=120,
+               min=0,
+               help='Seconds before the end of its ttl from which a login '
+                    'session is renewed by the next caller.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(token_cache_opts, group='token_cache')
+
+LOCK_PREFIX = 'delfin-token-'
+
+_refresh_locks = {}
+_refresh_locks_lock = threading.Lock()
+
+
+def is_enabled():
+    return CONF.token_cache.enabled
+
+
+def get_key(*args):
+    """Return the cache key of a storage account, e.g. host and user."""
+    return hashlib.sha256(
+        ':'.join(six.text_type(arg) for arg in args).encode(
+            'utf-8')).hexdigest()
+
+
+def _get_file(key):
+    return os.path.join(CONF.token_cache.path, key)
+
+
+def _read(key):
+    try:
+        with open(_get_file(key)) as f:
+            return json.loads(cryptor.decode(f.read()))
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _write(key, data):
+    if not os.path.isdir(CONF.token_cache.path):
+        os.makedirs(CONF.token_cache.path, 0o700)
+    entry = {'data': data, 'created_at': time.time()}
+    file_name = _get_file(key)
+    tmp_name = '%s.%s.tmp' % (file_name, os.getpid())
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(cryptor.encode(json.dumps(entry)))
+    os.rename(tmp_name, file_name)
+
+
+def _is_valid(entry, invalid_token):
+    if not entry:
+        return False
+    if invalid_token is not None and \
+            entry['data'].get('token') == invalid_token:
+        return False
+    return time.time() - entry['created_at'] < CONF.token_cache.ttl
+
+
+def _needs_refresh(entry):
+    return time.time() - entry['created_at'] >= \
+        CONF.token_cache.ttl - CONF.token_cache.refresh_ahead
+
+
+def _get_refresh_lock(key):
+    with _refresh_locks_lock:
+        return _refresh_locks.setdefault(key, threading.Lock())
+
+
+def _login(key, login, invalid_token):
+    with lockutils.lock(key, lock_file_prefix=LOCK_PREFIX, external=True,
+                        lock_path=CONF.token_cache.path):
+        # Another caller may have logged in while this one waited
+        entry = _read(key)
+        if _is_valid(entry, invalid_token) and not _needs_refresh(entry):
+            return entry['data']
+        data = login()
+        try:
+            _write(key, data)
+        except (IOError, OSError) as e:
+            LOG.warning('Failed to cache login session: %s',
+                        six.text_type(e))
+        return data
+
+
+def get_or_login(key, login, invalid_token=None):
+    """Return the shared session of key, log in with login if needed.
+
+    :param key: key of the storage account, see get_key
+    :param login: function logging in and returning the session data, a
+        JSON serializable dict whose 'token' identifies the session
+    :param invalid_token: token the storage rejected, if any
+    :returns: the session data
+    """
+    if not is_enabled():
+        return login()
+
+    entry = _read(key)
+    if not _is_valid(entry, invalid_token):
+        return _login(key, login, invalid_token)
+    if _needs_refresh(entry):
+        refresh_lock = _get_refresh_lock(key)
+        # Only one caller renews the session, the others keep using it
+        if refresh_lock.acquire(False):
+            try:
+                return _login(key, login, invalid_token)
+            finally:
+                refresh_lock.release()
+    return entry['data']
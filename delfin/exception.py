@@ -199,6 +199,10 @@ class LockCreationFailed(DelfinException):
     msg_fmt = _('Unable to create lock. Coordination backend not started.')
 
 
+class CoordinatorNotStarted(DelfinException):
+    msg_fmt = _('Coordination backend not started.')
+
+
 class LockAcquisitionFailed(DelfinException):
     msg_fmt = _('Lock acquisition failed.')
 
@@ -273,3 +277,9 @@ class StorageIsSyncing(Invalid):
 class InvalidIpOrPort(DelfinException):
     msg_fmt = _("Invalid ip or port.")
     code = 400
+
+
+class StorageCircuitOpen(DelfinException):
+    msg_fmt = _("Storage {0} is unreachable, calls to it are rejected "
+                "until {1}.")
+    code = 503
@@ -52,11 +52,14 @@ This module provides Manager, a base class for managers.
 
 """
 
+import logging
+
 from oslo_config import cfg
 from oslo_log import log
 from oslo_service import periodic_task
 
 from delfin.db import base
+from delfin.db import cache as db_cache
 from delfin import version
 
 CONF = cfg.CONF
@@ -105,6 +108,31 @@ class Manager(base.Base, PeriodicTasks):
         """
         pass
 
+    def cleanup_host(self):
+        """Handle clean up before the service stops.
+
+        Child classes should override this method.
+
+        """
+        pass
+
+    def get_stats(self):
+        """Return the counters of this process, by component.
+
+        Child classes should extend this method.
+
+        """
+        return {'db_cache': db_cache.get_stats()}
+
+    @periodic_task.periodic_task
+    def report_stats(self, context):
+        """Periodical task to log the counters of get_stats."""
+        if not LOG.isEnabledFor(logging.DEBUG):
+            return
+        for name, stats in sorted(self.get_stats().items()):
+            LOG.debug('Stats of %(name)s: %(stats)s',
+                      {'name': name, 'stats': stats})
+
     def service_version(self, context):
         return version.version_string()
 
@@ -68,6 +68,14 @@ service_opts = [
     cfg.PortOpt('trap_receiver_port',
                 default=162,
                 help='Port at which trap receiver listens.'),
+    cfg.IntOpt('trap_receiver_workers',
+               default=1,
+               min=1,
+               help='Number of delfin-alert processes receiving traps. With '
+                    'more than one, all of them listen on the trap '
+                    'receiver port with SO_REUSEPORT and the kernel spreads '
+                    'the traps between them by sender. The heart beat '
+                    'check of the alert sources runs in one of them.'),
 ]
 
 CONF = cfg.CONF
@@ -180,6 +188,10 @@ class Service(service.Service):
         self.stop()
 
     def stop(self):
+        try:
+            self.manager.cleanup_host()
+        except Exception:
+            LOG.exception("Unable to clean up %s.", self.topic)
         # Try to shut the connection down, but if we get any sort of
         # errors, go ahead and ignore them.. as we're shutting down anyway
         try:
@@ -13,10 +13,14 @@
 # limitations under the License.
 
 import os
+import ssl
+import threading
+
 import requests
 from oslo_config import cfg
 from oslo_log import log
 from urllib3 import PoolManager
+from urllib3.util import ssl_
 from OpenSSL.crypto import load_certificate, FILETYPE_PEM
 
 from delfin import exception
@@ -25,6 +29,12 @@ LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 FILE = 'configs.json'
 
+_lock = threading.Lock()
+# ca_path -> mtime of the directory once its certificates were linked
+_reloaded = {}
+# ca_path -> (mtime of the directory, SSL context verifying with it)
+_contexts = {}
+
 
 def get_storage_ca_path():
     return CONF.storage_driver.ca_path
@@ -56,6 +66,13 @@ def _load_cert(fpath, file, ca_path):
             os.symlink(fpath, linkfile)
 
 
+def _get_mtime(ca_path):
+    try:
+        return os.stat(ca_path).st_mtime
+    except OSError:
+        return None
+
+
 def reload_certificate(ca_path):
     """
     Checking the driver security config validation.
@@ -64,16 +81,45 @@ def reload_certificate(ca_path):
     Once new certificate added, this function can be called for update.
     If there is a CA certificate chain, all CA certificates along this
     chain should be included in a single file.
+    The directory is only read again once its mtime changed, that is once
+    certificates were added, removed or renamed in it.
     """
 
-    suffixes = ['.pem', '.cer', '.crt', '.crl']
-    files = os.listdir(ca_path)
-    for file in files:
-        if not os.path.isdir(file):
-            suf = os.path.splitext(file)[1]
-            if suf in suffixes:
-                fpath = ca_path + file
-                _load_cert(fpath, file, ca_path)
+    with _lock:
+        mtime = _get_mtime(ca_path)
+        if mtime is not None and _reloaded.get(ca_path) == mtime:
+            return
+
+        suffixes = ['.pem', '.cer', '.crt', '.crl']
+        files = os.listdir(ca_path)
+        for file in files:
+            if not os.path.isdir(file):
+                suf = os.path.splitext(file)[1]
+                if suf in suffixes:
+                    fpath = ca_path + file
+                    _load_cert(fpath, file, ca_path)
+        # Linking the certificates changes the mtime of the directory
+        _reloaded[ca_path] = _get_mtime(ca_path)
+
+
+def get_ssl_context(ca_path):
+    """Return the SSL context verifying certificates with ca_path.
+
+    The context is shared by the connections to the storages and built
+    again once the mtime of the directory changed. As the connection pools
+    are keyed by their context, the connections opened with the previous
+    one are not reused then.
+    """
+    mtime = _get_mtime(ca_path)
+    with _lock:
+        cached_mtime, context = _contexts.get(ca_path, (None, None))
+        if context is not None and cached_mtime == mtime:
+            return context
+        LOG.info("Load SSL context of CA directory {0}.".format(ca_path))
+        context = ssl_.create_urllib3_context(cert_reqs=ssl.CERT_REQUIRED)
+        context.load_verify_locations(capath=ca_path)
+        _contexts[ca_path] = (mtime, context)
+        return context
 
 
 def get_host_name_ignore_adapter():
@@ -81,10 +127,24 @@ def get_host_name_ignore_adapter():
 
 
 class HostNameIgnoreAdapter(requests.adapters.HTTPAdapter):
+    def build_connection_pool_key_attributes(self, request, verify,
+                                             cert=None):
+        host_params, pool_kwargs = super(
+            HostNameIgnoreAdapter, self).build_connection_pool_key_attributes(
+            request, verify, cert)
+        ca_cert_dir = pool_kwargs.pop('ca_cert_dir', None)
+        if ca_cert_dir:
+            pool_kwargs['ssl_context'] = get_ssl_context(ca_cert_dir)
+        return host_params, pool_kwargs
+
     def cert_verify(self, conn, url, verify, cert):
         conn.assert_hostname = False
-        return super(HostNameIgnoreAdapter, self).cert_verify(
+        super(HostNameIgnoreAdapter, self).cert_verify(
             conn, url, verify, cert)
+        if conn.conn_kw.get('ssl_context') is not None:
+            # The shared context already holds the CA directory, loading
+            # it again on each new connection is not needed.
+            conn.ca_cert_dir = None
 
     def init_poolmanager(self, connections, maxsize, block=False,
                          **pool_kwargs):
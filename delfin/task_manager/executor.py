@@ -0,0 +1,181 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Executor running storage sync tasks with bounded concurrency.
+
+A task waits for a slot of its storage, then a slot of its vendor/model
+if limited, then a global slot. Slots are always taken in this order so
+waiting tasks can not deadlock each other, and tasks blocked by a busy
+storage or vendor never occupy a global slot.
+"""
+
+import threading
+import time
+
+import eventlet
+from eventlet import semaphore
+from oslo_config import cfg
+from oslo_log import log
+
+from delfin import db
+from delfin import exception
+
+LOG = log.getLogger(__name__)
+
+sync_executor_opts = [
+    cfg.IntOpt('max_workers',
+               default=20,
+               min=1,
+               help='Maximum number of sync tasks running at the same time '
+                    'in one task manager.'),
+    cfg.IntOpt('storage_max_workers',
+               default=3,
+               min=1,
+               help='Maximum number of sync tasks running at the same time '
+                    'for one storage.'),
+    cfg.DictOpt('vendor_max_workers',
+                default={},
+                help='Maximum number of sync tasks running at the same time '
+                     'for storages of a vendor or a vendor model, keyed by '
+                     'the driver name, for example: '
+                     '"hpe 3par:4,dellemc:8". A vendor model limit takes '
+                     'precedence over its vendor limit.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(sync_executor_opts, group='sync_executor')
+
+
+class _KeyedSemaphores(object):
+    """Semaphores created on demand and dropped when no one uses them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def acquire(self, key, limit):
+        with self._lock:
+            sem, users = self._semaphores.get(key, (None, 0))
+            if sem is None:
+                sem = semaphore.Semaphore(limit)
+            self._semaphores[key] = (sem, users + 1)
+        sem.acquire()
+
+    def release(self, key):
+        with self._lock:
+            sem, users = self._semaphores[key]
+            if users <= 1:
+                self._semaphores.pop(key)
+            else:
+                self._semaphores[key] = (sem, users - 1)
+        sem.release()
+
+
+class SyncExecutor(object):
+    """Run sync tasks in green threads under concurrency limits."""
+
+    def __init__(self):
+        self._global_semaphore = semaphore.Semaphore(
+            CONF.sync_executor.max_workers)
+        self._storage_semaphores = _KeyedSemaphores()
+        self._vendor_semaphores = _KeyedSemaphores()
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @staticmethod
+    def _get_vendor_limit(context, storage_id):
+        """Return the limit key and limit of the vendor of a storage."""
+        limits = CONF.sync_executor.vendor_max_workers
+        if not limits:
+            return None, None
+        try:
+            access_info = db.access_info_get_cached(context, storage_id)
+        except exception.AccessInfoNotFound:
+            return None, None
+
+        vendor = access_info['vendor']
+        for key in ('%s %s' % (vendor, access_info['model']), vendor):
+            if key in limits:
+                try:
+                    return key, max(int(limits[key]), 1)
+                except ValueError:
+                    LOG.warning('Invalid sync worker limit %s for %s.',
+                                limits[key], key)
+        return None, None
+
+    def submit(self, context, storage_id, func, *args, **kwargs):
+        """Queue func to run for a storage, return without waiting."""
+        vendor_key, vendor_limit = self._get_vendor_limit(context,
+                                                          storage_id)
+        with self._stats_lock:
+            self._queued += 1
+        eventlet.spawn_n(self._run, time.time(), storage_id, vendor_key,
+                         vendor_limit, func, *args, **kwargs)
+
+    def _run(self, queued_at, storage_id, vendor_key, vendor_limit, func,
+             *args, **kwargs):
+        self._storage_semaphores.acquire(
+            storage_id, CONF.sync_executor.storage_max_workers)
+        try:
+            if vendor_key:
+                self._vendor_semaphores.acquire(vendor_key, vendor_limit)
+            try:
+                with self._global_semaphore:
+                    self._on_start(storage_id, queued_at)
+                    try:
+                        func(*args, **kwargs)
+                    except Exception:
+                        LOG.exception('Sync task failed for storage %s.',
+                                      storage_id)
+                    finally:
+                        self._on_finish()
+            finally:
+                if vendor_key:
+                    self._vendor_semaphores.release(vendor_key)
+        finally:
+            self._storage_semaphores.release(storage_id)
+
+    def _on_start(self, storage_id, queued_at):
+        wait = time.time() - queued_at
+        with self._stats_lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            queued = self._queued
+        LOG.debug('Sync task for storage %s started after waiting %.3fs, '
+                  '%s tasks still queued.', storage_id, wait, queued)
+
+    def _on_finish(self):
+        with self._stats_lock:
+            self._running -= 1
+            self._completed += 1
+
+    def get_stats(self):
+        """Return queue depth, running tasks and wait time statistics."""
+        with self._stats_lock:
+            started = self._completed + self._running
+            return {
+                'queued': self._queued,
+                'running': self._running,
+                'completed': self._completed,
+                'average_wait': (self._total_wait / started
+                                 if started else 0.0),
+                'max_wait': self._max_wait,
+            }
@@ -17,12 +17,22 @@
 
 """
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log
+from oslo_service import periodic_task
 from oslo_utils import importutils
 
+from delfin import context as ctxt
+from delfin import coordination
+from delfin import db
 from delfin import manager
+from delfin.db import cache as db_cache
 from delfin.drivers import manager as driver_manager
+from delfin.drivers.utils import http_transport
+from delfin.task_manager import executor
+from delfin.task_manager import rpcapi
+from delfin.task_manager import scheduler
 from delfin.task_manager.tasks import alerts
 
 LOG = log.getLogger(__name__)
@@ -37,14 +47,85 @@ class TaskManager(manager.Manager):
 
     def __init__(self, service_name=None, *args, **kwargs):
         self.alert_task = alerts.AlertSyncTask()
+        self.sync_scheduler = scheduler.SyncScheduler(rpcapi.TaskAPI())
+        self.sync_executor = executor.SyncExecutor()
+        self.partition_members = None
         super(TaskManager, self).__init__(*args, **kwargs)
 
+    def init_host(self):
+        if CONF.coordination.partition_enabled:
+            coordination.TASK_HASH_RING.join(self.host)
+        if CONF.driver_cache.prewarm:
+            eventlet.spawn_n(self.prewarm_drivers,
+                             ctxt.get_admin_context())
+
+    def cleanup_host(self):
+        # Let the other nodes take over the storages of this one now,
+        # instead of when its membership expires
+        if CONF.coordination.partition_enabled:
+            coordination.TASK_HASH_RING.leave()
+
+    def prewarm_drivers(self, context):
+        """Create the drivers of the storages handled by this node."""
+        storage_ids = [storage['id'] for storage in
+                       db.storage_get_all(context)]
+        if CONF.coordination.partition_enabled:
+            storage_ids = [
+                storage_id for storage_id in storage_ids
+                if coordination.TASK_HASH_RING.get_owner(storage_id)
+                in (None, self.host)]
+        LOG.info('Prewarm drivers of %s storages.', len(storage_ids))
+        driver_manager.DriverManager().prewarm(context, storage_ids)
+
+    @periodic_task.periodic_task(run_immediately=True)
+    def schedule_storage_sync(self, context):
+        """Periodical task to trigger the resource sync of storages
+        whose sync interval has elapsed.
+        """
+        if not CONF.periodic_sync.enabled:
+            return
+        self.sync_scheduler.schedule(context)
+
+    def get_stats(self):
+        stats = super(TaskManager, self).get_stats()
+        stats.update({
+            'sync_executor': self.sync_executor.get_stats(),
+            'driver_cache':
+                driver_manager.DriverManager().driver_factory.get_stats(),
+            'http_latency': http_transport.get_latency_stats(),
+        })
+        return stats
+
+    @periodic_task.periodic_task
+    def evict_idle_drivers(self, context):
+        driver_manager.DriverManager().driver_factory.evict_idle()
+
+    @periodic_task.periodic_task(run_immediately=True)
+    def rebalance_storages(self, context):
+        """Periodical task to drop the cached drivers of storages owned
+        by other task managers after the task manager group changed.
+        """
+        if not CONF.coordination.partition_enabled:
+            return
+        members = coordination.TASK_HASH_RING.get_members(refresh=True)
+        if members == self.partition_members:
+            return
+        self.partition_members = members
+
+        drivers = driver_manager.DriverManager()
+        for storage_id in list(drivers.driver_factory):
+            owner = coordination.TASK_HASH_RING.get_owner(storage_id)
+            if owner and owner != self.host:
+                LOG.info('Storage %s moved to task manager %s, remove its '
+                         'driver in memory.', storage_id, owner)
+                drivers.remove_driver(storage_id)
+
     def sync_storage_resource(self, context, storage_id, resource_task):
         LOG.debug("Received the sync_storage task: {0} request for storage"
                   " id:{1}".format(resource_task, storage_id))
         cls = importutils.import_class(resource_task)
         device_obj = cls(context, storage_id)
-        device_obj.sync()
+        self.sync_executor.submit(context, storage_id, device_obj.sync)
 
     def remove_storage_resource(self, context, storage_id, resource_task):
         cls = importutils.import_class(resource_task)
@@ -56,6 +137,11 @@ class TaskManager(manager.Manager):
                  .format(storage_id))
         drivers = driver_manager.DriverManager()
         drivers.remove_driver(storage_id)
+        db_cache.invalidate(storage_id)
+
+    def invalidate_db_cache(self, context, storage_id):
+        LOG.debug('Invalidate cached rows of storage %s.', storage_id)
+        db_cache.invalidate(storage_id)
 
     def sync_storage_alerts(self, context, storage_id, query_para):
         LOG.info('Alert sync called for storage id:{0}'
@@ -18,9 +18,12 @@ Client side of the task manager RPC API.
 
 import oslo_messaging as messaging
 from oslo_config import cfg
+from oslo_log import log
 
+from delfin import coordination
 from delfin import rpc
 
+LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 
 
@@ -40,15 +43,32 @@ class TaskAPI(object):
                                   version=self.RPC_API_VERSION)
         self.client = rpc.get_client(target, version_cap=self.RPC_API_VERSION)
 
+    def _prepare(self, storage_id):
+        """Prepare a call to the task manager owning the storage.
+
+        Without partitioning, or when the owner is unknown, any task
+        manager listening on the topic may handle the call.
+        """
+        if CONF.coordination.partition_enabled:
+            try:
+                server = coordination.TASK_HASH_RING.get_owner(storage_id)
+            except Exception as e:
+                LOG.warning('Failed to get the task manager owning storage '
+                            '%s, reason is %s', storage_id, e)
+                server = None
+            if server:
+                return self.client.prepare(version='1.0', server=server)
+        return self.client.prepare(version='1.0')
+
     def sync_storage_resource(self, context, storage_id, resource_task):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare(storage_id)
         return call_context.cast(context,
                                  'sync_storage_resource',
                                  storage_id=storage_id,
                                  resource_task=resource_task)
 
     def remove_storage_resource(self, context, storage_id, resource_task):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare(storage_id)
         return call_context.cast(context,
                                  'remove_storage_resource',
                                  storage_id=storage_id,
@@ -60,15 +80,21 @@ class TaskAPI(object):
                                  'remove_storage_in_cache',
                                  storage_id=storage_id)
 
+    def invalidate_db_cache(self, context, storage_id):
+        call_context = self.client.prepare(version='1.0', fanout=True)
+        return call_context.cast(context,
+                                 'invalidate_db_cache',
+                                 storage_id=storage_id)
+
     def sync_storage_alerts(self, context, storage_id, query_para):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare(storage_id)
         return call_context.cast(context,
                                  'sync_storage_alerts',
                                  storage_id=storage_id,
                                  query_para=query_para)
 
     def clear_storage_alerts(self, context, storage_id, sequence_number_list):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare(storage_id)
         return call_context.call(context,
                                  'clear_storage_alerts',
                                  storage_id=storage_id,
@@ -0,0 +1,182 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Scheduler of periodic storage resource sync.
+
+Each storage gets a fixed start offset inside its sync interval, derived
+from its id, so that the registered storages are spread evenly over the
+interval instead of being synced at once.
+
+With partition enabled, a task manager only schedules the storages it owns
+in the task hash ring, and max_in_flight is shared among the members.
+"""
+
+import calendar
+import hashlib
+
+from oslo_config import cfg
+from oslo_log import log
+from oslo_utils import timeutils
+
+from delfin import coordination
+from delfin import db
+from delfin import exception
+from delfin.common import constants
+from delfin.task_manager.tasks import resources
+
+LOG = log.getLogger(__name__)
+
+periodic_sync_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Whether task manager syncs the resources of all '
+                     'registered storages periodically.'),
+    cfg.IntOpt('interval',
+               default=3600,
+               min=60,
+               help='Default seconds between two periodic resource syncs '
+                    'of a storage.'),
+    cfg.DictOpt('storage_intervals',
+                default={},
+                help='Sync interval in seconds of specific storages, '
+                     'for example: <storage_id>:<interval>,...'),
+    cfg.IntOpt('max_in_flight',
+               default=0,
+               min=0,
+               help='Maximum number of storages being synced at the same '
+                    'time, 0 means no limitation. With partition enabled, '
+                    'it is split among the task managers and should not be '
+                    'lower than their number.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(periodic_sync_opts, group='periodic_sync')
+
+
+def _to_timestamp(date_time):
+    return calendar.timegm(date_time.utctimetuple())
+
+
+class SyncScheduler(object):
+    """Trigger resource sync of storages whose sync slot has arrived."""
+
+    def __init__(self, task_rpcapi):
+        self.task_rpcapi = task_rpcapi
+
+    @staticmethod
+    def get_interval(storage_id):
+        interval = CONF.periodic_sync.storage_intervals.get(storage_id)
+        try:
+            return max(int(interval), 1) if interval \
+                else CONF.periodic_sync.interval
+        except ValueError:
+            LOG.warning('Invalid sync interval %s for storage %s, use '
+                        'default interval.', interval, storage_id)
+            return CONF.periodic_sync.interval
+
+    @staticmethod
+    def get_offset(storage_id, interval):
+        """Stable start offset of a storage inside its sync interval."""
+        digest = hashlib.md5(storage_id.encode('utf-8')).hexdigest()
+        return int(digest, 16) % interval
+
+    def get_slot_start(self, storage_id, now):
+        """Start time of the current sync slot of a storage."""
+        interval = self.get_interval(storage_id)
+        offset = self.get_offset(storage_id, interval)
+        return now - (now - offset) % interval
+
+    @staticmethod
+    def _is_syncing(storage, now):
+        if storage['sync_status'] == constants.SyncStatus.SYNCED:
+            return False
+        last_update = storage['updated_at'] or storage['created_at']
+        return now - _to_timestamp(last_update) < CONF.sync_task_expiration
+
+    def get_due_storages(self, storages, now):
+        """Return storages whose sync is due, the most overdue first."""
+        due_storages = []
+        for storage in storages:
+            last_update = storage['updated_at'] or storage['created_at']
+            last_sync = _to_timestamp(last_update)
+            if last_sync < self.get_slot_start(storage['id'], now):
+                due_storages.append((last_sync, storage))
+
+        due_storages.sort(key=lambda item: item[0])
+        return [storage for _, storage in due_storages]
+
+    @staticmethod
+    def get_max_in_flight():
+        """Share of max_in_flight of this task manager.
+
+        Members are ordered by host name, the first ones get one more
+        sync when max_in_flight can not be split evenly.
+        """
+        max_in_flight = CONF.periodic_sync.max_in_flight
+        if not max_in_flight or not CONF.coordination.partition_enabled:
+            return max_in_flight
+        members = sorted(coordination.TASK_HASH_RING.get_members())
+        if CONF.host not in members:
+            return max_in_flight
+        share, remainder = divmod(max_in_flight, len(members))
+        if members.index(CONF.host) < remainder:
+            share += 1
+        if not share:
+            LOG.warning('max_in_flight %s is lower than the number of task '
+                        'managers %s, storages of %s are not synced.',
+                        max_in_flight, len(members), CONF.host)
+        return share
+
+    @staticmethod
+    def get_owned_storages(storages):
+        """Return the storages this task manager schedules."""
+        if not CONF.coordination.partition_enabled:
+            return storages
+        return [storage for storage in storages
+                if coordination.TASK_HASH_RING.get_owner(storage['id'])
+                in (None, CONF.host)]
+
+    def schedule(self, context):
+        now = timeutils.utcnow_ts()
+        storages = self.get_owned_storages(db.storage_get_all(context))
+        syncing_count = len([storage for storage in storages
+                             if self._is_syncing(storage, now)])
+        due_storages = self.get_due_storages(storages, now)
+
+        if CONF.periodic_sync.max_in_flight:
+            budget = max(self.get_max_in_flight() - syncing_count, 0)
+            if len(due_storages) > budget:
+                LOG.info('%s storages are due for sync, %s are syncing, '
+                         'only %s will be synced this time.',
+                         len(due_storages), syncing_count, budget)
+                due_storages = due_storages[:budget]
+
+        for storage in due_storages:
+            self.sync_storage(context, storage['id'])
+
+    def sync_storage(self, context, storage_id):
+        subclasses = resources.StorageResourceTask.__subclasses__()
+        try:
+            resources.set_synced_if_ok(context, storage_id, len(subclasses))
+        except (exception.InvalidInput, exception.StorageIsSyncing) as e:
+            LOG.warning('Can not start periodic sync task for %s, '
+                        'reason is %s', storage_id, e.msg)
+            return
+
+        LOG.info('Periodic sync triggered for storage id:%s', storage_id)
+        for subclass in subclasses:
+            self.task_rpcapi.sync_storage_resource(
+                context, storage_id,
+                subclass.__module__ + '.' + subclass.__name__)
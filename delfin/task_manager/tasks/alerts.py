@@ -35,7 +35,7 @@ class AlertSyncTask(object):
 
         LOG.info('Syncing alerts for storage id:{0}'.format(storage_id))
         try:
-            storage = db.storage_get(ctx, storage_id)
+            storage = db.storage_get_cached(ctx, storage_id)
 
             current_alert_list = self.driver_manager.list_alerts(ctx,
                                                                  storage_id,
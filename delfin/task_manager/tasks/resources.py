@@ -12,18 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
 import inspect
 
 import decorator
+from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 
-from delfin import coordination
 from delfin import db
 from delfin import exception
 from delfin.common import constants
 from delfin.drivers import api as driverapi
+from delfin.task_manager import rpcapi
 from delfin.i18n import _
 
+CONF = cfg.CONF
 LOG = log.getLogger(__name__)
 
 
@@ -38,26 +42,43 @@ def set_synced_after():
             ret = func(*args, **kwargs)
         except Exception:
             sync_result = constants.ResourceSync.FAILED
-        lock = coordination.Lock(self.storage_id)
-        with lock:
-            try:
-                storage = db.storage_get(self.context, self.storage_id)
-            except exception.StorageNotFound:
-                LOG.warn('Storage %s not found when set synced'
-                         % self.storage_id)
-            else:
-                # One sync task done, sync status minus 1
-                # When sync status get to 0
-                # means all the sync tasks are completed
-                if storage['sync_status'] != constants.SyncStatus.SYNCED:
-                    storage['sync_status'] -= sync_result
-                    db.storage_update(self.context, self.storage_id, storage)
+        # One sync task done, sync status minus 1
+        # When sync status get to 0
+        # means all the sync tasks are completed.
+        # The decrement is done in one atomic update, no lock is needed.
+        if not db.storage_sync_status_decrease(self.context, self.storage_id,
+                                               sync_result):
+            LOG.warn('Storage %s not found or not syncing when set synced'
+                     % self.storage_id)
 
         return ret
 
     return _set_synced_after
 
 
+def set_synced_if_ok(context, storage_id, resource_count):
+    # If last synchronization was within
+    # CONF.sync_task_expiration(in seconds), and the sync status
+    # is bigger than 0, it means some sync task is still running,
+    # the new sync task should not launch.
+    # The check and the update are done in one atomic update, so no
+    # distributed lock is needed.
+    expired_before = timeutils.utcnow() - datetime.timedelta(
+        seconds=CONF.sync_task_expiration)
+    sync_status = resource_count * constants.ResourceSync.START
+    if db.storage_sync_status_set_if_idle(context, storage_id, sync_status,
+                                          expired_before):
+        return
+
+    try:
+        db.storage_get(context, storage_id)
+    except exception.StorageNotFound:
+        msg = 'Storage %s not found when try to set sync_status' \
+              % storage_id
+        raise exception.InvalidInput(message=msg)
+    raise exception.StorageIsSyncing(storage_id)
+
+
 def check_deleted():
     @decorator.decorator
     def _check_deleted(func, *args, **kwargs):
@@ -68,7 +89,7 @@ def check_deleted():
         # only get the storage whose 'deleted' tag is not default value
         self.context.read_deleted = 'yes'
         try:
-            db.storage_get(self.context, self.storage_id)
+            db.storage_get_cached(self.context, self.storage_id)
         except exception.StorageNotFound:
             LOG.debug('Storage %s not found when checking deleted'
                       % self.storage_id)
@@ -93,26 +114,49 @@ class StorageResourceTask(object):
         :param db_resources:
         :return: it will return three list add_list: the items present in
         storage but not in current_db. update_list:the items present in
-        storage and in current_db. delete_id_list:the items present not in
-        storage but present in current_db.
+        storage and in current_db whose fields differ from current_db.
+        delete_id_list:the items present not in storage but present in
+        current_db.
         """
-        original_ids_in_db = [resource[key]
-                              for resource in db_resources]
-        delete_id_list = [resource['id'] for resource in db_resources]
+        # Index db resources by native id so that classification is linear
+        # in the number of resources instead of quadratic.
+        db_resources_map = {}
+        for db_resource in db_resources:
+            db_resources_map.setdefault(db_resource[key], db_resource)
+
         add_list = []
         update_list = []
+        matched_ids = set()
 
         for resource in storage_resources:
-            if resource[key] in original_ids_in_db:
-                resource['id'] = db_resources[original_ids_in_db.index(
-                    resource[key])]['id']
-                delete_id_list.remove(resource['id'])
-                update_list.append(resource)
-            else:
+            native_id = resource[key]
+            db_resource = db_resources_map.get(native_id)
+            if db_resource is None:
                 add_list.append(resource)
+                continue
+            if db_resource['id'] in matched_ids:
+                LOG.warning('Duplicate resource %s reported by storage %s, '
+                            'ignoring it.', native_id, self.storage_id)
+                continue
+
+            matched_ids.add(db_resource['id'])
+            resource['id'] = db_resource['id']
+            if self._is_resource_changed(resource, db_resource):
+                update_list.append(resource)
+
+        delete_id_list = [db_resource['id'] for db_resource in db_resources
+                          if db_resource['id'] not in matched_ids]
 
         return add_list, update_list, delete_id_list
 
+    @staticmethod
+    def _is_resource_changed(resource, db_resource):
+        """Check whether any field reported by driver differs from db."""
+        for field, value in resource.items():
+            if db_resource.get(field) != value:
+                return True
+        return False
+
 
 class StorageDeviceTask(StorageResourceTask):
     def __init__(self, context, storage_id):
@@ -148,6 +192,8 @@ class StorageDeviceTask(StorageResourceTask):
             db.alert_source_delete(self.context, self.storage_id)
         except Exception as e:
             LOG.error('Failed to update storage entry in DB: {0}'.format(e))
+        # Other task managers may still hold the storage as not deleted
+        rpcapi.TaskAPI().invalidate_db_cache(self.context, self.storage_id)
 
 
 class StoragePoolTask(StorageResourceTask):
@@ -208,36 +254,97 @@ class StorageVolumeTask(StorageResourceTask):
         """
         LOG.info('Syncing volumes for storage id:{0}'.format(self.storage_id))
         try:
-            # collect the volumes list from driver and database
-            storage_volumes = self.driver_api.list_volumes(self.context,
-                                                           self.storage_id)
-            db_volumes = db.volume_get_all(self.context,
-                                           filters={"storage_id":
-                                                    self.storage_id})
+            if CONF.paged_sync_enabled:
+                self._sync_paged()
+            else:
+                self._sync_all()
+        except Exception as e:
+            msg = _('Failed to sync volumes entry in DB: {0}'
+                    .format(e))
+            LOG.error(msg)
+            raise
+        else:
+            LOG.info("Syncing volumes successful!!!")
 
-            add_list, update_list, delete_id_list = self._classify_resources(
-                storage_volumes, db_volumes, 'native_volume_id'
-            )
-            LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
-                     'update={3}'.format(self.storage_id,
-                                         len(add_list),
-                                         len(delete_id_list),
-                                         len(update_list)))
-            if delete_id_list:
-                db.volumes_delete(self.context, delete_id_list)
+    def _sync_all(self):
+        # collect the volumes list from driver and database
+        storage_volumes = self.driver_api.list_volumes(self.context,
+                                                       self.storage_id)
+        db_volumes = db.volume_get_all(self.context,
+                                       filters={"storage_id":
+                                                self.storage_id})
+
+        add_list, update_list, delete_id_list = self._classify_resources(
+            storage_volumes, db_volumes, 'native_volume_id'
+        )
+        LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
+                 'update={3}'.format(self.storage_id,
+                                     len(add_list),
+                                     len(delete_id_list),
+                                     len(update_list)))
+        if delete_id_list:
+            db.volumes_delete(self.context, delete_id_list)
+
+        if update_list:
+            db.volumes_update(self.context, update_list)
+
+        if add_list:
+            db.volumes_create(self.context, add_list)
+
+    def _sync_paged(self):
+        """Reconcile volumes one page at a time, then sweep the volumes
+        not reported by the storage any more.
+
+        Every volume seen in a page is marked by its updated_at, volumes
+        whose updated_at(or created_at) is still older than the start of
+        the sync are deleted at last. The sweep is skipped if the driver
+        yielded no page, not even the empty one of a storage without
+        volumes.
+        """
+        # Database may not store fractional seconds
+        synced_at = timeutils.utcnow().replace(microsecond=0)
+        page_count = add_count = update_count = 0
+
+        for storage_volumes in self.driver_api.iter_volumes(
+                self.context, self.storage_id, CONF.sync_page_size):
+            page_count += 1
+            native_ids = [volume['native_volume_id']
+                          for volume in storage_volumes]
+            db_volumes = db.volumes_get_by_native_ids(
+                self.context, self.storage_id, native_ids)
+
+            # Duplicated db volumes left in delete_id_list are not marked
+            # and will be removed by the sweep.
+            add_list, update_list, _ = self._classify_resources(
+                storage_volumes, db_volumes, 'native_volume_id')
+            synced_id_list = [volume['id'] for volume in storage_volumes
+                              if volume.get('id')]
+
+            if synced_id_list:
+                db.volumes_mark_synced(self.context, synced_id_list,
+                                       synced_at)
 
             if update_list:
                 db.volumes_update(self.context, update_list)
 
             if add_list:
                 db.volumes_create(self.context, add_list)
-        except Exception as e:
-            msg = _('Failed to sync volumes entry in DB: {0}'
-                    .format(e))
-            LOG.error(msg)
-            raise
+
+            add_count += len(add_list)
+            update_count += len(update_list)
+
+        if not page_count:
+            LOG.warning('No volume page received for storage {0}, the '
+                        'volumes not synced are kept.'
+                        .format(self.storage_id))
+            delete_count = 0
         else:
-            LOG.info("Syncing volumes successful!!!")
+            delete_count = db.volumes_delete_not_synced(self.context,
+                                                        self.storage_id,
+                                                        synced_at)
+        LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
+                 'update={3}'.format(self.storage_id, add_count,
+                                     delete_count, update_count))
 
     def remove(self):
         LOG.info('Remove volumes for storage id:{0}'.format(self.storage_id))
@@ -34,6 +34,7 @@ import oslotest.base as base_test
 
 from delfin.common import config  # noqa
 from delfin import coordination
+from delfin.db import cache as db_cache
 from delfin.db.sqlalchemy import api as db_api
 from delfin.db.sqlalchemy import models as db_models
 from delfin import rpc
@@ -86,6 +87,7 @@ class TestCase(base_test.BaseTestCase):
                 db_api,
                 sql_connection=CONF.database.connection)
         self.useFixture(_DB_CACHE)
+        self.addCleanup(db_cache.clear)
 
         self.injected = []
         self._services = []
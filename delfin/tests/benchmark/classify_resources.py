@@ -0,0 +1,98 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Microbenchmark for StorageResourceTask._classify_resources.
+
+Run it with::
+
+    python -m delfin.tests.benchmark.classify_resources [count ...]
+
+Synthetic volumes are generated where about 1% are changed, 1% are new
+and 1% are removed compared with the database.
+"""
+
+import sys
+import time
+from unittest import mock
+
+from delfin.common import config  # noqa
+from delfin import context
+from delfin.task_manager.tasks import resources
+
+DEFAULT_COUNTS = (10000, 100000, 1000000)
+STORAGE_ID = '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6'
+
+
+def _fake_volume(index):
+    return {
+        'name': 'vol_%s' % index,
+        'storage_id': STORAGE_ID,
+        'native_storage_pool_id': 'pool_%s' % (index % 64),
+        'description': 'Synthetic volume',
+        'status': 'available',
+        'native_volume_id': 'native_vol_%s' % index,
+        'wwn': 'wwn_%s' % index,
+        'type': 'thin',
+        'total_capacity': 1024 * 1024,
+        'used_capacity': 1024,
+        'free_capacity': 1024 * 1023,
+        'compressed': False,
+        'deduplicated': False,
+    }
+
+
+def _generate(count):
+    step = 100
+    db_volumes = []
+    for i in range(count):
+        volume = _fake_volume(i)
+        volume['id'] = 'id_%s' % i
+        db_volumes.append(volume)
+
+    storage_volumes = []
+    for i in range(count + count // step):
+        if i % step == 1:
+            # Removed from storage, should be deleted from db
+            continue
+        volume = _fake_volume(i)
+        if i % step == 2:
+            volume['used_capacity'] += 1
+        storage_volumes.append(volume)
+    return storage_volumes, db_volumes
+
+
+def run(count):
+    storage_volumes, db_volumes = _generate(count)
+    with mock.patch('delfin.drivers.api.API'):
+        task = resources.StorageResourceTask(context.get_admin_context(),
+                                             STORAGE_ID)
+
+    start = time.time()
+    add_list, update_list, delete_id_list = task._classify_resources(
+        storage_volumes, db_volumes, 'native_volume_id')
+    elapsed = time.time() - start
+
+    print('%9d volumes: %8.3fs (add=%d, update=%d, delete=%d)'
+          % (count, elapsed, len(add_list), len(update_list),
+             len(delete_id_list)))
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or DEFAULT_COUNTS
+    for count in counts:
+        run(count)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
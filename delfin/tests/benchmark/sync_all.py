@@ -0,0 +1,106 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of sync_all and of the sync status accounting.
+
+Run it with::
+
+    python -m delfin.tests.benchmark.sync_all [storage_count]
+
+It registers the storages in a temporary sqlite database, calls
+StorageController.sync_all with the RPC casts mocked out, then completes
+every resource task of every storage the way set_synced_after does, and
+reports the time and the number of SQL statements of each phase.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from oslo_config import cfg
+from sqlalchemy import event
+
+from delfin.common import config  # noqa
+from delfin import context
+from delfin import db
+from delfin.common import constants
+from delfin.db.sqlalchemy import api as db_api
+from delfin.db.sqlalchemy import models
+
+CONF = cfg.CONF
+DEFAULT_COUNT = 5000
+
+
+class _StatementCounter(object):
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def _report(name, count, elapsed, statements):
+    print('%-18s %6d storages: %8.3fs, %6d statements, %.2f per storage'
+          % (name, count, elapsed, statements, float(statements) / count))
+
+
+def run(count):
+    from delfin.api.v1 import storages
+    from delfin.task_manager.tasks import resources
+
+    ctxt = context.get_admin_context()
+    for i in range(count):
+        db.storage_create(ctxt, {'id': 'storage-%s' % i,
+                                 'name': 'storage-%s' % i})
+
+    with mock.patch('delfin.task_manager.rpcapi.TaskAPI'), \
+            mock.patch('delfin.drivers.api.API'):
+        controller = storages.StorageController()
+    req = mock.Mock(environ={'delfin.context': ctxt})
+    resource_count = len(resources.StorageResourceTask.__subclasses__())
+
+    counter = _StatementCounter(db_api.get_engine())
+    start = time.time()
+    controller.sync_all(req)
+    _report('sync_all', count, time.time() - start, counter.count)
+
+    counter.count = 0
+    start = time.time()
+    for i in range(count):
+        for _ in range(resource_count):
+            db.storage_sync_status_decrease(ctxt, 'storage-%s' % i,
+                                            constants.ResourceSync.SUCCEED)
+    _report('tasks completed', count, time.time() - start, counter.count)
+
+    synced = db.storage_get_all(
+        ctxt, filters={'sync_status': constants.SyncStatus.SYNCED})
+    print('%d of %d storages synced' % (len(synced), count))
+
+
+def main(argv):
+    count = int(argv[0]) if argv else DEFAULT_COUNT
+    CONF([], project='delfin')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        CONF.set_override('connection',
+                          'sqlite:///' + os.path.join(tmp_dir, 'delfin.db'),
+                          group='database')
+        models.BASE.metadata.create_all(db_api.get_engine())
+        run(count)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
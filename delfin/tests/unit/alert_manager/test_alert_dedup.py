@@ -0,0 +1,91 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import test
+from delfin.alert_manager import alert_dedup
+from delfin.common import constants
+
+
+def fake_alert(category=constants.Category.FAULT, location='disk 1'):
+    return {'storage_id': 'abcd-1234-56789',
+            'alert_id': '1050',
+            'resource_type': constants.DEFAULT_RESOURCE_TYPE,
+            'location': location,
+            'category': category}
+
+
+class TestAlertDeduplicator(test.TestCase):
+
+    def setUp(self):
+        super(TestAlertDeduplicator, self).setUp()
+        self.override_config('repeat_window', 300, 'alert_dedup')
+        self.override_config('flap_window', 600, 'alert_dedup')
+        self.override_config('flap_threshold', 3, 'alert_dedup')
+        self.now = 1000.0
+        self.mock_object(alert_dedup, 'time',
+                         mock.Mock(time=lambda: self.now))
+        self.deduplicator = alert_dedup.AlertDeduplicator()
+
+    def test_disabled(self):
+        self.override_config('enabled', False, 'alert_dedup')
+        for _ in range(2):
+            self.assertEqual(fake_alert(),
+                             self.deduplicator.process(fake_alert()))
+
+    def test_repeated_alert(self):
+        self.assertEqual(fake_alert(), self.deduplicator.process(fake_alert()))
+        self.assertIsNone(self.deduplicator.process(fake_alert()))
+        self.assertIsNone(self.deduplicator.process(fake_alert()))
+        # Alerts of another location are not repeats
+        self.assertIsNotNone(
+            self.deduplicator.process(fake_alert(location='disk 2')))
+
+        self.now += 300
+        alert = self.deduplicator.process(fake_alert())
+        self.assertEqual(2, alert['repeat_count'])
+        self.assertEqual({'size': 2, 'received': 5, 'exported': 3,
+                          'suppressed': 2, 'evicted': 0},
+                         self.deduplicator.get_stats())
+
+    def test_flapping_alert(self):
+        categories = [constants.Category.FAULT,
+                      constants.Category.RECOVERY] * 3
+        exported = [self.deduplicator.process(fake_alert(category))
+                    for category in categories]
+        # The third change makes the alert flapping
+        self.assertEqual(3, len([alert for alert in exported if alert]))
+        self.assertEqual([], self.deduplicator.flush())
+
+        # It is exported in its last category once it settled down
+        self.now += 600
+        alert, = self.deduplicator.flush()
+        self.assertEqual(constants.Category.RECOVERY, alert['category'])
+        self.assertEqual(3, alert['repeat_count'])
+        # and forgotten when seen last before both windows
+        self.assertEqual([], self.deduplicator.flush())
+        self.assertEqual(0, self.deduplicator.get_stats()['size'])
+
+    def test_max_entries(self):
+        self.override_config('max_entries', 2, 'alert_dedup')
+        for location in ('disk 1', 'disk 2', 'disk 1', 'disk 3'):
+            self.deduplicator.process(fake_alert(location=location))
+
+        # disk 2 was the least recently received
+        self.assertIsNotNone(
+            self.deduplicator.process(fake_alert(location='disk 2')))
+        self.assertIsNone(
+            self.deduplicator.process(fake_alert(location='disk 3')))
+        self.assertEqual(2, self.deduplicator.get_stats()['evicted'])
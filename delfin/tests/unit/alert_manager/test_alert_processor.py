@@ -33,7 +33,7 @@ class AlertProcessorTestCase(unittest.TestCase):
         alert_processor = alert_processor_class()
         return alert_processor
 
-    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.db.storage_get_cached')
     @mock.patch('delfin.drivers.api.API.parse_alert')
     @mock.patch('delfin.exporter.base_exporter'
                 '.AlertExporterManager.dispatch')
@@ -89,7 +89,7 @@ class AlertProcessorTestCase(unittest.TestCase):
         mock_export_model.assert_called_once_with(expected_ctxt,
                                                   expected_alert_model)
 
-    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.db.storage_get_cached')
     @mock.patch('delfin.drivers.api.API.parse_alert',
                 fakes.parse_alert_exception)
     def test_process_alert_info_exception(self, mock_storage):
@@ -105,3 +105,21 @@ class AlertProcessorTestCase(unittest.TestCase):
         self.assertRaisesRegex(exception.InvalidResults,
                                "Failed to fill the alert model from driver.",
                                alert_processor_inst.process_alert_info, alert)
+
+    @mock.patch('delfin.db.storage_get_cached')
+    @mock.patch('delfin.drivers.api.API.parse_alert')
+    @mock.patch('delfin.exporter.base_exporter'
+                '.AlertExporterManager.dispatch')
+    def test_process_alert_info_suppressed(self, mock_export_model,
+                                           mock_parse_alert, mock_storage):
+        mock_storage.return_value = fakes.fake_storage_info()
+        mock_parse_alert.side_effect = lambda *args: fakes.fake_alert_model()
+        alert_processor_inst = self._get_alert_processor()
+        for _ in range(3):
+            alert_processor_inst.process_alert_info(
+                {'storage_id': 'abcd-1234-56789'})
+
+        # Repeats of the exported alert are not exported again
+        self.assertEqual(1, mock_export_model.call_count)
+        self.assertEqual(
+            2, alert_processor_inst.deduplicator.get_stats()['suppressed'])
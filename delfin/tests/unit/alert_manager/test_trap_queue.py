@@ -0,0 +1,128 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest import mock
+
+import eventlet
+import fixtures
+
+from delfin import test
+from delfin.alert_manager import trap_queue
+
+
+class TestTrapQueue(test.TestCase):
+
+    def setUp(self):
+        super(TestTrapQueue, self).setUp()
+        self.spill_path = self.useFixture(fixtures.TempDir()).path
+        self.override_config('spill_path', self.spill_path, 'trap_queue')
+        self.override_config('max_size', 2, 'trap_queue')
+        self.override_config('spill_segment_size', 2, 'trap_queue')
+
+    def test_workers_process_traps(self):
+        self.override_config('workers', 2, 'trap_queue')
+        queue = trap_queue.TrapQueue()
+        processed = []
+
+        def handler(trap):
+            if trap['id'] == 2:
+                raise ValueError('invalid trap')
+            processed.append(trap['id'])
+
+        queue.start(handler)
+        for i in range(3):
+            queue.put({'id': i})
+            eventlet.sleep(0)
+        eventlet.sleep(0)
+        queue.stop()
+
+        self.assertEqual([0, 1], processed)
+        self.assertEqual({'received': 3, 'queued': 0, 'dropped': 0,
+                          'spilled': 0, 'processed': 2, 'failed': 1},
+                         queue.get_stats())
+
+    def test_drop_oldest(self):
+        queue = trap_queue.TrapQueue()
+        for i in range(3):
+            queue.put({'id': i})
+
+        self.assertEqual([1, 2], [queue.get()['id'] for _ in range(2)])
+        stats = queue.get_stats()
+        self.assertEqual((3, 1, 0), (stats['received'], stats['dropped'],
+                                     stats['queued']))
+
+    def test_spill_to_disk(self):
+        self.override_config('overflow_policy', trap_queue.SPILL_TO_DISK,
+                             'trap_queue')
+        queue = trap_queue.TrapQueue()
+        for i in range(5):
+            queue.put({'id': i})
+        spill_dir = os.path.join(self.spill_path, str(os.getpid()))
+        self.assertEqual(2, len(os.listdir(spill_dir)))
+        self.assertEqual(5, queue.get_stats()['queued'])
+
+        ids = [queue.get()['id'] for _ in range(3)]
+        # Traps are spilled while older ones are still on disk
+        queue.put({'id': 5})
+        ids += [queue.get()['id'] for _ in range(3)]
+
+        self.assertEqual(list(range(6)), ids)
+        self.assertEqual([], os.listdir(spill_dir))
+        stats = queue.get_stats()
+        self.assertEqual((4, 0, 0), (stats['spilled'], stats['dropped'],
+                                     stats['queued']))
+
+    def test_spill_max_size(self):
+        self.override_config('overflow_policy', trap_queue.SPILL_TO_DISK,
+                             'trap_queue')
+        self.override_config('spill_max_size', 1, 'trap_queue')
+        queue = trap_queue.TrapQueue()
+        for i in range(4):
+            queue.put({'id': i})
+        self.assertEqual([0, 1, 2], [queue.get()['id'] for _ in range(3)])
+        self.assertEqual(1, queue.get_stats()['dropped'])
+
+    def test_load_spilled_traps(self):
+        self.override_config('overflow_policy', trap_queue.SPILL_TO_DISK,
+                             'trap_queue')
+        queue = trap_queue.TrapQueue()
+        for i in range(4):
+            queue.put({'id': i})
+
+        # Traps left on disk by a previous run are processed first
+        queue = trap_queue.TrapQueue()
+        queue._load_segments()
+        self.assertEqual(2, queue.get_stats()['queued'])
+        queue.put({'id': 4})
+        self.assertEqual([2, 3, 4], [queue.get()['id'] for _ in range(3)])
+
+    @mock.patch.object(trap_queue, '_is_running')
+    def test_take_over_spilled_traps(self, mock_is_running):
+        self.override_config('overflow_policy', trap_queue.SPILL_TO_DISK,
+                             'trap_queue')
+        mock_is_running.side_effect = lambda pid: pid == 100
+        for pid, ids in (('100', [0, 1]), ('101', [2, 3]), ('102', [4])):
+            spill_dir = os.path.join(self.spill_path, pid)
+            os.makedirs(spill_dir)
+            with open(os.path.join(spill_dir, '%020d.json' % 1), 'w') as f:
+                f.write(''.join('{"id": %s}\n' % i for i in ids))
+
+        # Segments of the processes which are gone are taken over
+        queue = trap_queue.TrapQueue()
+        queue._load_segments()
+        self.assertEqual(3, queue.get_stats()['queued'])
+        self.assertEqual([2, 3, 4], [queue.get()['id'] for _ in range(3)])
+        self.assertEqual(sorted(['100', str(os.getpid())]),
+                         sorted(os.listdir(self.spill_path)))
@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import socket
 from unittest import mock
 
+import fixtures
 from oslo_utils import importutils
 from pysnmp.carrier.asyncore.dgram import udp
 from pysnmp.entity import engine, config
@@ -32,13 +34,16 @@ class TrapReceiverTestCase(test.TestCase):
     def setUp(self):
         super(TrapReceiverTestCase, self).setUp()
         self.alert_rpc_api = mock.Mock()
-        trap_receiver_class = importutils.import_class(
-            self.TRAP_RECEIVER_CLASS)
-        self.trap_receiver = trap_receiver_class(self.DEF_TRAP_RECV_ADDR,
-                                                 self.DEF_TRAP_RECV_PORT)
+        self.trap_receiver = self._get_trap_receiver_instance()
         self.mock_object(self.trap_receiver,
                          'alert_rpc_api', self.alert_rpc_api)
 
+    def _get_trap_receiver_instance(self):
+        trap_receiver_class = importutils.import_class(
+            self.TRAP_RECEIVER_CLASS)
+        return trap_receiver_class(self.DEF_TRAP_RECV_ADDR,
+                                   self.DEF_TRAP_RECV_PORT)
+
     def _get_trap_receiver(self):
         return self.trap_receiver
 
@@ -85,6 +90,21 @@ class TrapReceiverTestCase(test.TestCase):
         # Verify that snmp engine transport config is set after _add_transport
         self.assertTrue(get_transport is not None)
 
+    @mock.patch('pysnmp.entity.config.addTransport')
+    @mock.patch('pysnmp.carrier.asyncore.dgram.udp.UdpTransport')
+    def test_add_transport_reuse_port(self, mock_transport, mock_add):
+        self.override_config('trap_receiver_workers', 4)
+        trap_receiver_inst = self._get_trap_receiver()
+        trap_receiver_inst.trap_receiver_address = self.DEF_TRAP_RECV_ADDR
+        trap_receiver_inst.trap_receiver_port = self.DEF_TRAP_RECV_PORT
+        trap_receiver_inst._add_transport()
+        transport = mock_transport.return_value
+        transport.socket.setsockopt.assert_called_once_with(
+            socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        transport.openServerMode.assert_called_once_with(
+            (self.DEF_TRAP_RECV_ADDR, int(self.DEF_TRAP_RECV_PORT)))
+        self.assertTrue(mock_add.called)
+
     def test_add_transport_exception(self):
         trap_receiver_inst = self._get_trap_receiver()
 
@@ -247,10 +267,11 @@ class TrapReceiverTestCase(test.TestCase):
         # Verify that config is added to engine
         self.assertTrue(mock_add_config.called)
 
-    @mock.patch('delfin.db.alert_source_get_all')
+    @mock.patch('pysnmp.entity.config.addV3User', mock.Mock())
+    @mock.patch('delfin.db.api.alert_source_get_all')
     def test_get_alert_source_by_host_success(self, mock_alert_source_list):
-        # alert_source_config = fakes.fake_v3_alert_source()
         expected_alert_source = {'storage_id': 'abcd-1234-5678',
+                                 'host': '127.0.0.1',
                                  'version': 'snmpv3',
                                  'engine_id': '800000d30300000e112245',
                                  'username': 'test1',
@@ -259,21 +280,111 @@ class TrapReceiverTestCase(test.TestCase):
                                  'privacy_key': 'YWJjZDEyMzQ1Njc=',
                                  'privacy_protocol': 'DES'
                                  }
-        mock_alert_source_list.return_value = fakes. \
-            fake_v3_alert_source_list_with_one()
+        alert_source_list = fakes.fake_v3_alert_source_list_with_one()
+        alert_source_list[0]['host'] = '127.0.0.1'
+        mock_alert_source_list.return_value = alert_source_list
         trap_receiver_inst = self._get_trap_receiver()
         trap_receiver_inst.snmp_engine = engine.SnmpEngine()
+        trap_receiver_inst._load_snmp_config()
+
         alert_source = trap_receiver_inst. \
             _get_alert_source_by_host('127.0.0.1')
         self.assertDictEqual(expected_alert_source, alert_source)
+        # Traps are routed without querying the database
+        mock_alert_source_list.assert_called_once()
 
-    @mock.patch('delfin.db.alert_source_get_all')
-    def test_get_alert_source_by_host_without_storage(self,
-                                                      mock_alert_source_list):
-        # alert_source_config = fakes.fake_v3_alert_source()
-        mock_alert_source_list.return_value = fakes.null_alert_source_list()
+    def test_get_alert_source_by_host_without_storage(self):
         trap_receiver_inst = self._get_trap_receiver()
         trap_receiver_inst.snmp_engine = engine.SnmpEngine()
         self.assertRaisesRegex(exception.AlertSourceNotFoundWithHost, "",
                                trap_receiver_inst._get_alert_source_by_host,
                                '127.0.0.1')
+
+    @mock.patch('delfin.cryptor.decode', mock.Mock(return_value='public'))
+    @mock.patch('delfin.alert_manager.snmp_validator.SNMPValidator.validate',
+                mock.Mock())
+    @mock.patch('pysnmp.entity.config.addV1System', mock.Mock())
+    @mock.patch('pysnmp.entity.config.delV1System', mock.Mock())
+    def test_sync_snmp_config_updates_index(self):
+        ctxt = {}
+        alert_config = {'storage_id': 'abcd-1234-5678',
+                        'host': '127.0.0.1',
+                        'version': 'snmpv2c',
+                        'community_string': 'cHVibGlj'}
+        trap_receiver_inst = self._get_trap_receiver()
+        trap_receiver_inst.snmp_engine = engine.SnmpEngine()
+        trap_receiver_inst.sync_snmp_config(ctxt,
+                                            snmp_config_to_add=alert_config)
+        alert_source = trap_receiver_inst._get_alert_source_by_host(
+            '127.0.0.1')
+        self.assertEqual('public', alert_source['community_string'])
+
+        # Same host configured for another storage
+        other_config = dict(alert_config, storage_id='abcd-1234-5677')
+        trap_receiver_inst.sync_snmp_config(ctxt,
+                                            snmp_config_to_add=other_config)
+        self.assertRaises(exception.InvalidResults,
+                          trap_receiver_inst._get_alert_source_by_host,
+                          '127.0.0.1')
+
+        # Host of the alert source changed
+        trap_receiver_inst.sync_snmp_config(
+            ctxt, snmp_config_to_del={'storage_id': 'abcd-1234-5677',
+                                      'version': 'snmpv2c'},
+            snmp_config_to_add=dict(other_config, host='127.0.0.2'))
+        self.assertEqual('abcd-1234-5678',
+                         trap_receiver_inst._get_alert_source_by_host(
+                             '127.0.0.1')['storage_id'])
+        self.assertEqual('abcd-1234-5677',
+                         trap_receiver_inst._get_alert_source_by_host(
+                             '127.0.0.2')['storage_id'])
+
+    @mock.patch('pysnmp.entity.config.addV1System', mock.Mock())
+    def test_cb_fun_queues_trap(self):
+        trap_receiver_inst = self._get_trap_receiver()
+        trap_receiver_inst.snmp_engine = mock.Mock()
+        trap_receiver_inst.snmp_engine.observer.getExecutionContext. \
+            return_value = {'transportAddress': ('127.0.0.1', 1162),
+                            'securityModel': 2}
+        trap_receiver_inst._cb_fun(None, None, 'public',
+                                   [('1.3.6.1.2.1.1.3.0', 100)], None)
+        trap = trap_receiver_inst.trap_queue.get()
+        self.assertEqual({'source_ip': '127.0.0.1', 'security_model': 2,
+                          'context_name': 'public',
+                          'var_binds': [('1.3.6.1.2.1.1.3.0', '100')]},
+                         trap)
+
+        trap_receiver_inst._add_snmp_config(
+            {}, {'storage_id': 'abcd-1234-5678', 'host': '127.0.0.1',
+                 'version': 'snmpv2c', 'community_string': 'cHVibGlj'})
+        self.mock_object(trap_receiver_inst, 'alert_processor', mock.Mock())
+        trap_receiver_inst._process_trap(trap)
+        trap_receiver_inst.alert_processor.process_alert_info. \
+            assert_called_once_with({'1.3.6.1.2.1.1.3.0': '100',
+                                     'transport_address': '127.0.0.1',
+                                     'storage_id': 'abcd-1234-5678'})
+
+        trap['context_name'] = 'private'
+        self.assertRaises(exception.InvalidResults,
+                          trap_receiver_inst._process_trap, trap)
+
+    @mock.patch('delfin.db.alert_source_get_all')
+    def test_heart_beat_in_one_process(self, mock_alert_sources):
+        self.override_config('trap_receiver_workers', 2)
+        self.override_config('state_path',
+                             self.useFixture(fixtures.TempDir()).path)
+        mock_alert_sources.return_value = [fakes.fake_v3_alert_source()]
+        ctxt = mock.Mock()
+        trap_receiver_inst = self._get_trap_receiver()
+        trap_receiver_inst.heart_beat_task_spawn(ctxt)
+        self.assertEqual(1, self.alert_rpc_api.check_snmp_config.call_count)
+
+        # The lock is held by another trap receiver process
+        other_lock = mock.Mock(acquired=False)
+        with mock.patch('oslo_concurrency.lockutils.external_lock',
+                        return_value=other_lock):
+            other_inst = self._get_trap_receiver_instance()
+            self.mock_object(other_inst, 'alert_rpc_api', self.alert_rpc_api)
+            other_inst.heart_beat_task_spawn(ctxt)
+        other_lock.acquire.assert_called_once_with(blocking=False)
+        self.assertEqual(1, self.alert_rpc_api.check_snmp_config.call_count)
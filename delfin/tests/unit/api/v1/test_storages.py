@@ -168,6 +168,27 @@ class TestStorageController(test.TestCase):
         }
         self.assertDictEqual(expctd_dict, res_dict)
 
+    def test_circuit_breaker(self):
+        self.mock_object(
+            db, 'storage_get',
+            fakes.fake_storages_show)
+        req = fakes.HTTPRequest.blank(
+            '/storages/12c2d52f-01bc-41f5-b73f-7abf6f38a2a6/circuit-breaker')
+        state = {
+            'state': 'open',
+            'failures': 3,
+            'probe_interval': 30,
+            'retry_at': '2020-06-09T09:00:18',
+        }
+        self.driver_api.get_circuit_state.return_value = state
+
+        res_dict = self.controller.circuit_breaker(
+            req, '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6')
+        self.assertDictEqual({'circuit_breaker': state}, res_dict)
+        self.driver_api.get_circuit_state.assert_called_once_with(
+            req.environ['delfin.context'],
+            '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6')
+
     def test_show_with_invalid_id(self):
         self.mock_object(
             db, 'storage_get',
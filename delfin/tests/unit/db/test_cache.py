@@ -0,0 +1,93 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import context
+from delfin import exception
+from delfin import test
+from delfin.db import api as db_api
+from delfin.db import cache
+
+ctxt = context.get_admin_context()
+STORAGE_ID = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+
+
+class TestRowCache(test.TestCase):
+
+    def setUp(self):
+        super(TestRowCache, self).setUp()
+        self.now = 1000
+        self.mock_object(cache, 'time', mock.Mock(time=lambda: self.now))
+        self.cache = cache.RowCache()
+
+    def test_ttl(self):
+        load = mock.Mock(return_value={'name': 'storage_1'})
+        row = self.cache.get((STORAGE_ID,), load)
+        row['name'] = 'changed'
+        self.assertEqual({'name': 'storage_1'},
+                         self.cache.get((STORAGE_ID,), load))
+        self.assertEqual(1, load.call_count)
+
+        self.now += cache.CONF.db_cache.ttl
+        self.cache.get((STORAGE_ID,), load)
+        self.assertEqual(2, load.call_count)
+        self.assertEqual({'size': 1, 'hits': 1, 'misses': 2,
+                          'hit_ratio': 1.0 / 3}, self.cache.get_stats())
+
+    def test_not_found_cached(self):
+        load = mock.Mock(side_effect=exception.StorageNotFound(STORAGE_ID))
+        for _ in range(2):
+            self.assertRaises(exception.StorageNotFound,
+                              self.cache.get, (STORAGE_ID, 'no'), load)
+        self.assertEqual(1, load.call_count)
+
+        self.cache.invalidate(STORAGE_ID)
+        self.assertRaises(exception.StorageNotFound,
+                          self.cache.get, (STORAGE_ID, 'no'), load)
+        self.assertEqual(2, load.call_count)
+
+    def test_disabled(self):
+        self.override_config('enabled', False, 'db_cache')
+        load = mock.Mock(return_value={})
+        self.cache.get((STORAGE_ID,), load)
+        self.cache.get((STORAGE_ID,), load)
+        self.assertEqual(2, load.call_count)
+
+
+class TestCachedGet(test.TestCase):
+
+    def test_storage_get_cached(self):
+        db_api.storage_create(ctxt, {'id': STORAGE_ID, 'name': 'storage_1'})
+        self.assertEqual('storage_1',
+                         db_api.storage_get_cached(ctxt, STORAGE_ID)['name'])
+
+        # Updates of this process drop the cached row
+        db_api.storage_update(ctxt, STORAGE_ID, {'name': 'storage_2'})
+        self.assertEqual('storage_2',
+                         db_api.storage_get_cached(ctxt, STORAGE_ID)['name'])
+
+        db_api.storage_delete(ctxt, STORAGE_ID)
+        self.assertRaises(exception.StorageNotFound,
+                          db_api.storage_get_cached, ctxt, STORAGE_ID)
+        self.assertEqual(3, cache.get_stats()['storage']['misses'])
+
+    def test_access_info_get_cached(self):
+        self.assertRaises(exception.AccessInfoNotFound,
+                          db_api.access_info_get_cached, ctxt, STORAGE_ID)
+        db_api.access_info_create(ctxt, {'storage_id': STORAGE_ID,
+                                         'vendor': 'fake_vendor'})
+        self.assertEqual(
+            'fake_vendor',
+            db_api.access_info_get_cached(ctxt, STORAGE_ID)['vendor'])
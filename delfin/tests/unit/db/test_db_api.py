@@ -1,5 +1,8 @@
+import datetime
 from unittest import mock
 
+from oslo_utils import timeutils
+
 from delfin import context, exception
 from delfin import test
 from delfin.db import api as db_api
@@ -29,6 +32,40 @@ class TestSIMDBAPI(test.TestCase):
                                     'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         assert len(result) == 0
 
+    def test_storage_sync_status_set_if_idle(self):
+        storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+        db_api.storage_create(ctxt, {'id': storage_id, 'sync_status': 0})
+        expired_before = timeutils.utcnow() - datetime.timedelta(hours=1)
+
+        self.assertTrue(db_api.storage_sync_status_set_if_idle(
+            ctxt, storage_id, 300, expired_before))
+        self.assertEqual(300, db_api.storage_get(ctxt,
+                                                 storage_id)['sync_status'])
+        # Storage is syncing
+        self.assertFalse(db_api.storage_sync_status_set_if_idle(
+            ctxt, storage_id, 300, expired_before))
+        # Sync task expired
+        self.assertTrue(db_api.storage_sync_status_set_if_idle(
+            ctxt, storage_id, 300, timeutils.utcnow()))
+        self.assertFalse(db_api.storage_sync_status_set_if_idle(
+            ctxt, 'fake_id', 300, expired_before))
+
+    def test_storage_sync_status_decrease(self):
+        storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+        db_api.storage_create(ctxt, {'id': storage_id, 'sync_status': 200})
+
+        self.assertTrue(db_api.storage_sync_status_decrease(
+            ctxt, storage_id, 100))
+        self.assertTrue(db_api.storage_sync_status_decrease(
+            ctxt, storage_id, 100))
+        self.assertEqual(0, db_api.storage_get(ctxt,
+                                               storage_id)['sync_status'])
+        # Storage already synced
+        self.assertFalse(db_api.storage_sync_status_decrease(
+            ctxt, storage_id, 100))
+        self.assertFalse(db_api.storage_sync_status_decrease(
+            ctxt, 'fake_id', 100))
+
     @mock.patch('delfin.db.sqlalchemy.api.get_session')
     def test_storage_update(self, mock_session):
         fake_storage = models.Storage()
@@ -169,6 +206,54 @@ class TestSIMDBAPI(test.TestCase):
         result = db_api.volumes_update(ctxt, volumes)
         assert result is None
 
+    @mock.patch('delfin.db.sqlalchemy.api.get_session')
+    def test_volumes_bulk_operations_in_batches(self, mock_session):
+        self.override_config('bulk_batch_size', 2, 'database')
+        session = mock_session.return_value
+        volumes = [{'native_volume_id': 'vol_%s' % i} for i in range(5)]
+
+        db_api.volumes_create(ctxt, volumes)
+        self.assertEqual(3, session.bulk_insert_mappings.call_count)
+        self.assertTrue(all(vol.get('id') for vol in volumes))
+
+        db_api.volumes_update(ctxt, volumes)
+        self.assertEqual(3, session.bulk_update_mappings.call_count)
+
+        with mock.patch.object(api, '_volume_get_query') as mock_query:
+            mock_query.return_value.filter.return_value.delete.return_value \
+                = 2
+            db_api.volumes_delete(ctxt, [vol['id'] for vol in volumes])
+            self.assertEqual(
+                3, mock_query.return_value.filter.return_value.delete.
+                call_count)
+
+    @mock.patch('delfin.db.sqlalchemy.api.get_session')
+    def test_volumes_get_by_native_ids(self, mock_session):
+        result = db_api.volumes_get_by_native_ids(
+            ctxt, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bd', [])
+        assert len(result) == 0
+
+    @mock.patch('delfin.db.sqlalchemy.api.get_session')
+    def test_volumes_mark_synced(self, mock_session):
+        result = db_api.volumes_mark_synced(
+            ctxt, ['c5c91c98-91aa-40e6-85ac-37a1d3b32bd'], None)
+        assert result is None
+
+    def test_volumes_delete_not_synced(self):
+        with mock.patch.object(api, '_volume_get_query') as mock_query:
+            query = mock_query.return_value.filter_by.return_value.filter \
+                .return_value
+            query.with_entities.return_value.order_by.return_value.limit \
+                .side_effect = [[models.Volume(id='id_1')], []]
+            query.filter.return_value.with_entities.return_value.order_by \
+                .return_value.limit.return_value = []
+            mock_query.return_value.filter.return_value.delete \
+                .return_value = 1
+            result = db_api.volumes_delete_not_synced(
+                ctxt, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bd',
+                timeutils.utcnow())
+        assert result == 1
+
     @mock.patch('delfin.db.sqlalchemy.api.get_session')
     def test_volume_update(self, mock_session):
         volumes = [{'id': 'c5c91c98-91aa-40e6-85ac-37a1d3b32bd'}]
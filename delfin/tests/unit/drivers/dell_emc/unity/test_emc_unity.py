@@ -16,6 +16,8 @@ from unittest import TestCase, mock
 from requests import Session
 
 from delfin import context
+from delfin import exception
+from delfin.drivers.dell_emc.unity import consts
 from delfin.drivers.dell_emc.unity.rest_handler import RestHandler
 from delfin.drivers.dell_emc.unity.unity import UNITYStorDriver
 
@@ -558,6 +560,56 @@ class TestUNITYStorDriver(TestCase):
         self.assertEqual(alert[1].get('alert_id'),
                          alert_result[1].get('alert_id'))
 
+    def test_get_all_pages(self):
+        pages = {
+            1: {'entryCount': 5,
+                'entries': [{'content': {'id': 'sv_1'}},
+                            {'content': {'id': 'sv_2'}}]},
+            2: {'entries': [{'content': {'id': 'sv_3'}},
+                            {'content': {'id': 'sv_4'}}]},
+            3: {'entries': [{'content': {'id': 'sv_5'}}]},
+        }
+        urls = []
+
+        def _get_rest_info(url, data=None, method='GET'):
+            urls.append(url)
+            return pages[int(url.rsplit('page=', 1)[1])]
+
+        with mock.patch.object(consts, 'PAGE_SIZE', 2), \
+                mock.patch.object(RestHandler, 'get_rest_info',
+                                  side_effect=_get_rest_info):
+            luns = self.driver.rest_handler.get_all_luns()
+        self.assertEqual(['sv_1', 'sv_2', 'sv_3', 'sv_4', 'sv_5'],
+                         [lun['content']['id'] for lun in luns['entries']])
+        self.assertEqual(3, len(urls))
+        self.assertIn('fields=%s&compact=true&with_entrycount=true'
+                      '&per_page=2' % consts.LUN_FIELDS, urls[0])
+
+    def test_get_all_pages_failed_page(self):
+        first_page = {'entryCount': 3,
+                      'entries': [{'content': {'id': 'sv_1'}},
+                                  {'content': {'id': 'sv_2'}}]}
+        # A rejected later page or a rejected first page
+        for responses in ([first_page, None], [None]):
+            for list_func in (self.driver.list_volumes,
+                              self.driver.list_alerts):
+                with mock.patch.object(consts, 'PAGE_SIZE', 2), \
+                        mock.patch.object(RestHandler, 'get_rest_info',
+                                          side_effect=responses):
+                    self.assertRaises(exception.StorageBackendException,
+                                      list_func, context)
+
+    def test_list_alerts_with_time_filter(self):
+        query_para = {'begin_time': 1000000000000,
+                      'end_time': 4102444800936}
+        with mock.patch.object(RestHandler, 'get_rest_info',
+                               return_value=GET_ALL_ALERTS) as mock_get:
+            alert = self.driver.list_alerts(context, query_para)
+        self.assertEqual(2, len(alert))
+        url = mock_get.call_args[0][0]
+        self.assertIn('&filter=timestamp%20ge%20%22', url)
+        self.assertIn('.936Z%22', url)
+
     def test_parse_alert(self):
         trap = self.driver.parse_alert(context, TRAP_INFO)
         self.assertEqual(trap.get('alert_id'), trap_result.get('alert_id'))
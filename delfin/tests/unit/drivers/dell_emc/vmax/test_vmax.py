@@ -14,10 +14,14 @@
 
 
 from unittest import TestCase, mock
+
+import requests
 from requests.sessions import Session
+
 from delfin import exception
 from delfin import context
 from delfin.common import config # noqa
+from delfin.drivers import api as driver_api
 from delfin.drivers.dell_emc.vmax.vmax import VMAXStorageDriver
 from delfin.drivers.dell_emc.vmax.rest import VMaxRest
 
@@ -321,6 +325,46 @@ class TestVMAXStorageDriver(TestCase):
         self.assertIn('Failed to get list volumes from VMAX',
                       str(exc.exception))
 
+    @mock.patch.object(VMaxRest, 'get_system_capacity')
+    @mock.patch.object(VMaxRest, 'get_storage_group')
+    @mock.patch.object(VMaxRest, 'get_volume')
+    @mock.patch.object(VMaxRest, 'get_volume_list')
+    @mock.patch.object(VMaxRest, 'get_array_detail')
+    @mock.patch.object(VMaxRest, 'get_uni_version')
+    @mock.patch.object(VMaxRest, 'get_unisphere_version')
+    def test_list_volumes_storage_group_once(self, mock_unisphere_version,
+                                             mock_version, mock_array,
+                                             mock_vols, mock_vol, mock_sg,
+                                             mock_capacity):
+        mock_version.return_value = ['V9.0.2.7', '90']
+        mock_unisphere_version.return_value = ['V9.0.2.7', '90']
+        mock_array.return_value = {'symmetrixId': ['00112233']}
+        mock_capacity.return_value = {'default_fba_srp': 'SRP_1'}
+        volume_ids = ['%05d' % i for i in range(50)]
+        mock_vols.return_value = volume_ids
+        mock_vol.side_effect = lambda array, version, volume_id: {
+            'volumeId': volume_id,
+            'cap_mb': 100,
+            'allocated_percent': 10,
+            'status': 'Ready',
+            'type': 'TDEV',
+            'wwn': 'wwn' + volume_id,
+            'num_of_storage_groups': 1,
+            'storageGroupId': ['SG_%s' % (int(volume_id) % 2)],
+            'emulation': 'FBA'
+        }
+        mock_sg.side_effect = lambda array, version, sg: {
+            'srp': 'SRP_' + sg, 'compression': False}
+
+        driver = VMAXStorageDriver(**VMAX_STORAGE_CONF)
+        ret = driver.list_volumes(context)
+
+        self.assertEqual(volume_ids,
+                         [vol['native_volume_id'] for vol in ret])
+        self.assertEqual('SRP_SG_1', ret[1]['native_storage_pool_id'])
+        self.assertEqual(50, mock_vol.call_count)
+        self.assertEqual(2, mock_sg.call_count)
+
     @mock.patch.object(Session, 'request')
     @mock.patch.object(VMaxRest, 'get_array_detail')
     @mock.patch.object(VMaxRest, 'get_uni_version')
@@ -345,3 +389,117 @@ class TestVMAXStorageDriver(TestCase):
         driver.client.rest.session = None
         driver.client.rest.request('/session', 'GET')
         self.assertEqual(driver.client.uni_version, '90')
+
+    @mock.patch.object(VMaxRest, 'get_request')
+    def test_list_pagination(self, mock_get_request):
+        def _get_page(target_uri, resource_type, params):
+            return {'result': list(range(params['from'], params['to'] + 1))}
+
+        mock_get_request.side_effect = _get_page
+        list_info = {
+            'id': 'iterator_1',
+            'count': 10,
+            'maxPageSize': 3,
+            'resultList': {'result': [1, 2, 3], 'from': 1, 'to': 3}
+        }
+        rest = VMaxRest(page_fetch_workers=3)
+
+        self.assertEqual(list(range(1, 11)), rest.list_pagination(list_info))
+        self.assertEqual([{'from': 4, 'to': 6}, {'from': 7, 'to': 9},
+                          {'from': 10, 'to': 10}],
+                         [c[0][2] for c in mock_get_request.call_args_list])
+        self.assertEqual([[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]],
+                         list(rest.iter_pagination(list_info)))
+        self.assertEqual({'volumeId': '1'},
+                         rest.list_pagination({'volumeId': '1'}))
+
+    @mock.patch.object(VMaxRest, 'get_request')
+    def test_list_pagination_failed_page(self, mock_get_request):
+        mock_get_request.side_effect = [{'result': [4, 5, 6]}, None]
+        list_info = {
+            'id': 'iterator_1',
+            'count': 9,
+            'maxPageSize': 3,
+            'resultList': {'result': [1, 2, 3], 'from': 1, 'to': 3}
+        }
+        rest = VMaxRest(page_fetch_workers=1)
+
+        self.assertRaises(exception.StorageBackendException,
+                          rest.list_pagination, list_info)
+
+    @mock.patch.object(VMaxRest, 'get_volume')
+    @mock.patch.object(VMaxRest, 'get_iterator_page')
+    @mock.patch.object(VMaxRest, 'request')
+    @mock.patch.object(VMaxRest, 'get_system_capacity')
+    @mock.patch.object(VMaxRest, 'get_array_detail')
+    @mock.patch.object(VMaxRest, 'get_uni_version')
+    @mock.patch.object(VMaxRest, 'get_unisphere_version')
+    def test_iter_volumes(self, mock_unisphere_version, mock_version,
+                          mock_array, mock_capacity, mock_request,
+                          mock_page, mock_vol):
+        mock_version.return_value = ['V9.0.2.7', '90']
+        mock_unisphere_version.return_value = ['V9.0.2.7', '90']
+        mock_array.return_value = {'symmetrixId': ['00112233']}
+        mock_capacity.return_value = {'default_fba_srp': 'SRP_1'}
+        mock_request.return_value = (200, {
+            'id': 'iterator_1',
+            'count': 5,
+            'maxPageSize': 3,
+            'resultList': {'result': [{'volumeId': '00001'},
+                                      {'volumeId': '00002'},
+                                      {'volumeId': '00003'}],
+                           'from': 1, 'to': 3}
+        })
+        mock_page.return_value = [{'volumeId': '00004'},
+                                  {'volumeId': '00005'}]
+        mock_vol.side_effect = lambda array, version, volume_id: {
+            'volumeId': volume_id,
+            'cap_mb': 100,
+            'allocated_percent': 10,
+            'status': 'Ready',
+            'type': 'TDEV',
+            'wwn': 'wwn' + volume_id,
+            'num_of_storage_groups': 0,
+            'storageGroupId': [],
+            'emulation': 'FBA'
+        }
+
+        driver = VMAXStorageDriver(**VMAX_STORAGE_CONF)
+        pages = list(driver.iter_volumes(context, 2))
+
+        self.assertEqual([['00001', '00002'], ['00003'], ['00004', '00005']],
+                         [[vol['native_volume_id'] for vol in page]
+                          for page in pages])
+        mock_page.assert_called_once_with('iterator_1', 4, 5)
+
+    @mock.patch.object(VMaxRest, 'request')
+    def test_iter_volume_list_failed(self, mock_request):
+        rest = VMaxRest()
+
+        # A failed request or a malformed page must not end the list
+        mock_request.return_value = (500, {'message': 'Server error'})
+        self.assertRaises(exception.StorageBackendException, list,
+                          rest.iter_volume_list('00112233', '90', {}))
+        mock_request.return_value = (200, [{'name': 'vol'}])
+        self.assertRaises(exception.StorageBackendException, list,
+                          rest.iter_volume_list('00112233', '90', {}))
+
+    @mock.patch.object(Session, 'request')
+    @mock.patch.object(VMaxRest, 'get_array_detail')
+    @mock.patch.object(VMaxRest, 'get_uni_version')
+    @mock.patch.object(VMaxRest, 'get_unisphere_version')
+    def test_unreachable_opens_circuit(self, mock_unisphere_version,
+                                       mock_version, mock_array,
+                                       mock_request):
+        mock_version.return_value = ['V9.0.2.7', '90']
+        mock_unisphere_version.return_value = ['V9.0.2.7', '90']
+        mock_array.return_value = {'symmetrixId': ['00112233']}
+        driver = VMAXStorageDriver(**VMAX_STORAGE_CONF)
+
+        mock_request.side_effect = requests.exceptions.ConnectionError
+        breaker = driver_api.CircuitBreaker(VMAX_STORAGE_CONF['storage_id'])
+        for _ in range(3):
+            with self.assertRaises(exception.StorageBackendException):
+                with breaker.guard():
+                    driver.list_storage_pools(context)
+        self.assertEqual('open', breaker.get_state()['state'])
@@ -16,6 +16,7 @@ from unittest import TestCase, mock
 from requests import Session
 
 from delfin import context
+from delfin import exception
 from delfin.drivers.hitachi.vsp.rest_handler import RestHandler
 from delfin.drivers.hitachi.vsp.vsp_stor import HitachiVspDriver
 
@@ -328,6 +329,44 @@ class TestHitachiVspStorStorageDriver(TestCase):
         RestHandler.get_rest_info = mock.Mock(return_value=GET_ALL_VOLUMES)
         self.driver.list_volumes(context)
 
+    def test_iter_volumes(self):
+        ldevs = GET_ALL_VOLUMES['data']
+        pages = {
+            '0': {'data': ldevs[:2]},
+            str(ldevs[1]['ldevId'] + 1): {'data': ldevs[2:]},
+        }
+        urls = []
+
+        def _get_rest_info(url, timeout=None, data=None):
+            urls.append(url)
+            head = url.split('headLdevId=')[1].split('&')[0]
+            return pages.get(head, {'data': []})
+
+        with mock.patch.object(RestHandler, 'get_rest_info',
+                               side_effect=_get_rest_info):
+            volumes = list(self.driver.iter_volumes(context, 2))
+            # A storage without volumes yields one empty page
+            pages['0'] = {'data': []}
+            self.assertEqual([[]],
+                             list(self.driver.iter_volumes(context, 2)))
+        self.assertEqual(3, len(volumes))
+        self.assertEqual(['0', '1'], [volume['native_volume_id']
+                                      for volume in volumes[0]])
+        # The last page is full, so one more, empty, page is requested
+        self.assertEqual([], volumes[2])
+        self.assertEqual(4, len(urls))
+        self.assertIn('headLdevId=100&count=2', urls[2])
+
+    def test_iter_volumes_failed_page(self):
+        ldevs = GET_ALL_VOLUMES['data']
+        # A failed first page, a failed later one, a failed request
+        for responses in ([None], [{'data': ldevs[:2]}, {}],
+                          [{'data': ldevs[:2]}, ValueError('reset')]):
+            with mock.patch.object(RestHandler, 'get_rest_info',
+                                   side_effect=responses):
+                self.assertRaises(exception.DelfinException, list,
+                                  self.driver.iter_volumes(context, 2))
+
     def test_list_alerts(self):
         RestHandler.get_rest_info = mock.Mock(return_value=ALERT_INFO)
         RestHandler.get_rest_info = mock.Mock(return_value=ALERT_INFO)
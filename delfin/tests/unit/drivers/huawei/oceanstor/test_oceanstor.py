@@ -170,6 +170,13 @@ class TestOceanStorStorageDriver(TestCase):
         ]
 
         ret = [
+            {
+                'data': {'COUNT': '2'},
+                'error': {
+                    'code': 0,
+                    'description': '0'
+                }
+            },
             {
                 'data': [
                     {
@@ -257,6 +264,13 @@ class TestOceanStorStorageDriver(TestCase):
         ]
 
         ret = [
+            {
+                'data': {'COUNT': '2'},
+                'error': {
+                    'code': 0,
+                    'description': '0'
+                }
+            },
             {
                 'data': [
                     {
@@ -297,6 +311,13 @@ class TestOceanStorStorageDriver(TestCase):
                     'description': '0'
                 }
             },
+            {
+                'data': {'COUNT': '1'},
+                'error': {
+                    'code': 0,
+                    'description': '0'
+                }
+            },
             {
                 'data': [{
                     'NAME': 'OceanStor_1',
@@ -13,10 +13,13 @@
 # limitations under the License.
 
 from unittest import TestCase, mock
+
+import requests
 from requests.sessions import Session
 
 from delfin import exception
 from delfin.common import config # noqa
+from delfin.drivers import api as driver_api
 from delfin.drivers.huawei.oceanstor.rest_client import RestClient
 
 
@@ -155,3 +158,56 @@ class TestOceanStorRestClient(TestCase):
         self.assertEqual(data['data']['data'], 'dummy')
         mock_call.assert_called_with("/lun", None, 'GET',
                                      log_filter_flag=True)
+
+    @mock.patch.object(RestClient, 'call')
+    @mock.patch.object(RestClient, 'login')
+    def test_paginated_call(self, mock_login, mock_call):
+        objects = [{'ID': str(i)} for i in range(320)]
+
+        def _call(url, data, method, log_filter_flag):
+            if url == '/lun/count':
+                return {'error': {'code': 0}, 'data': {'COUNT': '300'}}
+            start, end = url.split('[')[1].rstrip(']').split('-')
+            return {'error': {'code': 0},
+                    'data': objects[int(start):int(end)]}
+
+        mock_login.return_value = None
+        mock_call.side_effect = _call
+        rest_client = RestClient(**ACCESS_INFO)
+
+        # 20 objects are created after the count
+        self.assertEqual(objects, rest_client.paginated_call('/lun'))
+        self.assertEqual(
+            ['/lun/count', '/lun?range=[0-150]', '/lun?range=[150-300]',
+             '/lun?range=[300-450]'],
+            [c[0][0] for c in mock_call.call_args_list])
+
+        mock_call.reset_mock()
+        mock_call.side_effect = [
+            {'error': {'code': 1}},
+            {'error': {'code': 0}, 'data': objects[:150]},
+            {'error': {'code': 0}, 'data': objects[150:300]},
+            {'error': {'code': 0}}]
+        self.assertEqual(objects[:300], rest_client.paginated_call('/lun'))
+        self.assertEqual(4, mock_call.call_count)
+
+    @mock.patch.object(Session, 'post')
+    def test_unreachable_opens_circuit(self, mock_post):
+        mock_post.side_effect = requests.exceptions.ConnectionError
+        breaker = driver_api.CircuitBreaker(ACCESS_INFO['storage_id'])
+        for _ in range(3):
+            with self.assertRaises(exception.InvalidCredential):
+                with breaker.guard():
+                    RestClient(**ACCESS_INFO)
+        self.assertEqual('open', breaker.get_state()['state'])
+
+    @mock.patch.object(Session, 'post')
+    @mock.patch.object(RestClient, 'login')
+    def test_login_rejected(self, mock_login, mock_post):
+        rest_client = RestClient(**ACCESS_INFO)
+        rest_client.init_http_head()
+        mock_post.return_value = self._mock_response(
+            json_data={'error': {'code': 1077949061}})
+        # The array answered, it is reachable
+        self.assertRaises(exception.StorageBackendException,
+                          rest_client._login)
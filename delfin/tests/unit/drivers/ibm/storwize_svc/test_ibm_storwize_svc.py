@@ -16,6 +16,9 @@ from unittest import TestCase, mock
 import paramiko
 
 from delfin import context
+from delfin import exception
+from delfin.common import config  # noqa
+from delfin.drivers import api as driver_api
 from delfin.drivers.ibm.storwize_svc.ssh_handler import SSHHandler
 from delfin.drivers.ibm.storwize_svc.storwize_svc import StorwizeSVCDriver
 from delfin.drivers.utils.ssh_client import SSHPool
@@ -134,8 +137,10 @@ enclosure_info = """id:status:type:managed:IO_id:IO_group_name:product_MTM
 1:online:control:yes:0:io_grp0:2076-124:78N16G4:2:2:2:2:24:0:0
 """
 
-pools_info = """id name      status mdisk_count vdisk_count capacity
-1  mdiskgrp0 online 1           101         8.13TB   1024        3.06TB
+pools_info = """id:name:status:mdisk_count:vdisk_count:capacity:extent_size:\
+free_capacity:virtual_capacity:used_capacity:real_capacity:overallocation
+1:mdiskgrp0:online:1:101:8939177443328:1024:3364530028544:6060360302018:\
+5552479358894:5563653619302:67
 """
 
 pool_info = """id 1
@@ -179,8 +184,20 @@ type parent
 encrypt no
 """
 
-volumes_info = """id  name            IO_group_id IO_group_name status
-0   V7000LUN_Mig    0           io_grp0       online 1
+volumes_info = """id:name:IO_group_id:IO_group_name:status:mdisk_grp_id:\
+mdisk_grp_name:capacity:type:FC_id:FC_name:RC_id:RC_name:vdisk_UID:\
+fc_map_count:copy_count:fast_write_state:se_copy_count:RC_change:\
+compressed_copy_count
+0:V7000LUN_Mig:0:io_grp0:online:1:mdiskgrp0:53687091200:striped:::::\
+60050768028401F87C00000000000000:0:1:empty:0:no:0
+1:V7000LUN_Thin:0:io_grp0:online:1:mdiskgrp0:53687091200:striped:::::\
+60050768028401F87C00000000000001:0:1:empty:1:no:0
+"""
+
+sevdiskcopy_info = """vdisk_id:vdisk_name:copy_id:mdisk_grp_id:mdisk_grp_name:\
+capacity:used_capacity:real_capacity:free_capacity:overallocation
+1:V7000LUN_Thin:0:1:mdiskgrp0:53687091200:1073741824:2147483648:1073741824:\
+2500
 """
 
 volume_info = """id:0
@@ -346,14 +363,36 @@ class TestStorwizeSvcStorageDriver(TestCase):
             return_value={paramiko.SSHClient()})
         SSHHandler.do_exec = mock.Mock(
             side_effect=[pools_info, pool_info])
-        self.driver.list_storage_pools(context)
+        pools = self.driver.list_storage_pools(context)
+        self.assertEqual(1, SSHHandler.do_exec.call_count)
+        self.assertEqual('1', pools[0]['native_storage_pool_id'])
+        self.assertEqual(8939177443328, pools[0]['total_capacity'])
+        self.assertEqual(6060360302018, pools[0]['subscribed_capacity'])
 
     def test_list_volumes(self):
         SSHPool.get = mock.Mock(
             return_value={paramiko.SSHClient()})
         SSHHandler.do_exec = mock.Mock(
-            side_effect=[volumes_info, volume_info])
-        self.driver.list_volumes(context)
+            side_effect=[volumes_info, sevdiskcopy_info])
+        volumes = self.driver.list_volumes(context)
+        self.assertEqual(2, SSHHandler.do_exec.call_count)
+        self.assertEqual(('thick', 53687091200, 0),
+                         (volumes[0]['type'], volumes[0]['used_capacity'],
+                          volumes[0]['free_capacity']))
+        self.assertEqual(('thin', 1073741824, 1073741824),
+                         (volumes[1]['type'], volumes[1]['used_capacity'],
+                          volumes[1]['free_capacity']))
+
+    def test_list_volumes_with_detail(self):
+        SSHPool.get = mock.Mock(
+            return_value={paramiko.SSHClient()})
+        SSHHandler.do_exec = mock.Mock(
+            side_effect=[volumes_info, Exception('unsupported'),
+                         volume_info])
+        volumes = self.driver.list_volumes(context)
+        SSHHandler.do_exec.assert_called_with('lsvdisk -delim : -bytes 1',
+                                              mock.ANY)
+        self.assertEqual(53687091200, volumes[1]['used_capacity'])
 
     def test_list_alerts(self):
         query_para = {
@@ -421,3 +460,18 @@ class TestStorwizeSvcStorageDriver(TestCase):
     def test_clear_alert(self):
         alert = ''
         self.driver.clear_alert(context, alert)
+
+    @mock.patch.object(SSHPool, 'get', lambda pool: pool.create())
+    @mock.patch('delfin.drivers.utils.ssh_client.cryptor.decode',
+                lambda password: password)
+    @mock.patch.object(paramiko.SSHClient, 'connect')
+    def test_unreachable_opens_circuit(self, mock_connect):
+        mock_connect.side_effect = paramiko.ssh_exception.\
+            NoValidConnectionsError({('110.143.132.231', 22):
+                                     ConnectionRefusedError()})
+        breaker = driver_api.CircuitBreaker(ACCESS_INFO['storage_id'])
+        for _ in range(3):
+            with self.assertRaises(exception.SSHException):
+                with breaker.guard():
+                    self.driver.list_storage_pools(context)
+        self.assertEqual('open', breaker.get_state()['state'])
@@ -16,12 +16,17 @@
 import copy
 from unittest import TestCase, mock
 
+import eventlet
+import requests
+import six
 import sys
 sys.modules['delfin.cryptor'] = mock.Mock()
 
 from delfin import context
 from delfin import exception
+from delfin import test
 from delfin.common import config # noqa
+from delfin.drivers import api as driver_api
 from delfin.drivers.api import API
 from delfin.drivers.fake_storage import FakeStorageDriver
 
@@ -254,7 +259,7 @@ class TestDriverAPI(TestCase):
 
     @mock.patch.object(FakeStorageDriver, 'parse_alert')
     @mock.patch('delfin.drivers.manager.DriverManager.get_driver')
-    @mock.patch('delfin.db.access_info_get')
+    @mock.patch('delfin.db.access_info_get_cached')
     def test_parse_alert(self, mock_access_info,
                          driver_manager, mock_fake):
         mock_access_info.return_value = ACCESS_INFO
@@ -268,3 +273,209 @@ class TestDriverAPI(TestCase):
         mock_access_info.assert_called_once()
         driver_manager.assert_called_once()
         mock_fake.assert_called_once()
+
+
+class TestCircuitBreaker(test.TestCase):
+
+    def setUp(self):
+        super(TestCircuitBreaker, self).setUp()
+        self.override_config('failure_threshold', 2, 'circuit_breaker')
+        self.override_config('probe_interval', 10, 'circuit_breaker')
+        self.override_config('max_probe_interval', 15, 'circuit_breaker')
+        self.now = 1000
+        self.mock_object(driver_api.timeutils, 'utcnow_ts',
+                         mock.Mock(side_effect=lambda: self.now))
+        self.api = API()
+        self.api.circuit_breakers = driver_api.CircuitBreakers()
+        self.driver = mock.Mock()
+        self.get_driver = self.mock_object(
+            self.api.driver_manager, 'get_driver',
+            mock.Mock(return_value=self.driver))
+
+    def test_open_and_probe(self):
+        self.driver.get_storage.side_effect = exception.InvalidIpOrPort
+        for _ in range(2):
+            self.assertRaises(exception.InvalidIpOrPort,
+                              self.api.get_storage, context, 'storage_1')
+        self.assertRaises(exception.StorageCircuitOpen,
+                          self.api.get_storage, context, 'storage_1')
+        self.assertEqual(2, self.driver.get_storage.call_count)
+        state = self.api.get_circuit_state(context, 'storage_1')
+        self.assertEqual('open', state['state'])
+        self.assertEqual('1970-01-01T00:16:50', state['retry_at'])
+
+        # A failed probe doubles the interval up to its maximum
+        self.now += 10
+        self.assertRaises(exception.InvalidIpOrPort,
+                          self.api.get_storage, context, 'storage_1')
+        state = self.api.get_circuit_state(context, 'storage_1')
+        self.assertEqual(('open', 15),
+                         (state['state'], state['probe_interval']))
+
+        self.now += 15
+        self.driver.get_storage.side_effect = None
+        self.api.get_storage(context, 'storage_1')
+        self.assertEqual('closed', self.api.get_circuit_state(
+            context, 'storage_1')['state'])
+
+    def test_half_open_rejects_other_calls(self):
+        breaker = self.api.circuit_breakers.get('storage_1')
+        breaker.record_failure()
+        breaker.record_failure()
+        self.now += 10
+
+        with breaker.guard():
+            self.assertEqual('half-open', breaker.get_state()['state'])
+            self.assertRaises(exception.StorageCircuitOpen,
+                              self.api.list_volumes, context, 'storage_1')
+        self.assertEqual('closed', breaker.get_state()['state'])
+
+    def test_storage_errors_keep_circuit_closed(self):
+        self.driver.list_alerts.side_effect = exception.InvalidResults
+        for _ in range(3):
+            self.assertRaises(exception.InvalidResults,
+                              self.api.list_alerts, context, 'storage_1')
+        self.assertEqual(3, self.driver.list_alerts.call_count)
+        self.assertEqual('closed', self.api.get_circuit_state(
+            context, 'storage_1')['state'])
+
+    def test_wrapped_connection_failure(self):
+        def _get_storage(*args):
+            try:
+                raise requests.exceptions.ConnectTimeout
+            except Exception as e:
+                raise exception.StorageBackendException(six.text_type(e))
+
+        self.driver.get_storage.side_effect = _get_storage
+        for _ in range(2):
+            self.assertRaises(exception.StorageBackendException,
+                              self.api.get_storage, context, 'storage_1')
+        self.assertEqual('open', self.api.get_circuit_state(
+            context, 'storage_1')['state'])
+
+    def test_disabled(self):
+        self.override_config('enabled', False, 'circuit_breaker')
+        self.driver.list_storage_pools.side_effect = \
+            exception.ConnectTimeout
+        for _ in range(3):
+            self.assertRaises(exception.ConnectTimeout,
+                              self.api.list_storage_pools, context,
+                              'storage_1')
+        self.assertEqual(3, self.driver.list_storage_pools.call_count)
+
+
+class TestDriverCallCoalescing(test.TestCase):
+
+    def setUp(self):
+        super(TestDriverCallCoalescing, self).setUp()
+        self.api = API()
+        self.api.circuit_breakers = driver_api.CircuitBreakers()
+        self.api.driver_calls = driver_api.SingleFlight()
+        self.driver = mock.Mock()
+        self.mock_object(self.api.driver_manager, 'get_driver',
+                         mock.Mock(return_value=self.driver))
+        self.release = eventlet.event.Event()
+
+    def _slow_call(self, result=None, error=None):
+        def call(*args):
+            self.release.wait()
+            if error:
+                raise error
+            return copy.deepcopy(result)
+        return call
+
+    def test_concurrent_calls_share_one_call(self):
+        self.driver.list_volumes.side_effect = self._slow_call(
+            [{'name': 'volume_1'}])
+        threads = [eventlet.spawn(self.api.list_volumes, context,
+                                  'storage_1') for _ in range(3)]
+        eventlet.sleep(0)
+        self.release.send()
+        results = [thread.wait() for thread in threads]
+
+        self.assertEqual(1, self.driver.list_volumes.call_count)
+        self.assertEqual([[{'name': 'volume_1'}]] * 3, results)
+        # Each caller gets its own copy
+        self.assertIsNot(results[0], results[1])
+
+    def test_concurrent_calls_share_error(self):
+        self.driver.get_storage.side_effect = self._slow_call(
+            error=exception.InvalidResults())
+        threads = [eventlet.spawn(self.api.get_storage, context,
+                                  'storage_1') for _ in range(2)]
+        eventlet.sleep(0)
+        self.release.send()
+        for thread in threads:
+            self.assertRaises(exception.InvalidResults, thread.wait)
+        self.assertEqual(1, self.driver.get_storage.call_count)
+
+    def test_different_arguments_not_shared(self):
+        self.release.send()
+        self.driver.list_alerts.side_effect = self._slow_call([])
+        threads = [eventlet.spawn(self.api.list_alerts, context,
+                                  'storage_1', query) for query in
+                   ({'begin_time': 1}, {'begin_time': 2})]
+        for thread in threads:
+            thread.wait()
+        self.assertEqual(2, self.driver.list_alerts.call_count)
+
+    def test_result_cache(self):
+        self.override_config('result_cache_ttl', 30, 'driver_call')
+        self.driver.list_storage_pools.return_value = [{'name': 'pool_1'}]
+        self.api.list_storage_pools(context, 'storage_1')
+        self.api.list_storage_pools(context, 'storage_1')
+        self.assertEqual(1, self.driver.list_storage_pools.call_count)
+
+        self.api.clear_alert(context, 'storage_1', '1')
+        self.api.list_storage_pools(context, 'storage_1')
+        self.assertEqual(2, self.driver.list_storage_pools.call_count)
+
+    def test_leader_changes_not_shared(self):
+        self.override_config('result_cache_ttl', 30, 'driver_call')
+        self.driver.list_volumes.side_effect = self._slow_call(
+            [{'name': 'volume_1'}])
+
+        def _list_and_set_id():
+            volumes = self.api.list_volumes(context, 'storage_1')
+            # As the sync does with the rows it creates
+            volumes[0]['id'] = 'id_1'
+            return volumes
+
+        leader = eventlet.spawn(_list_and_set_id)
+        follower = eventlet.spawn(self.api.list_volumes, context,
+                                  'storage_1')
+        eventlet.sleep(0)
+        self.release.send()
+
+        self.assertEqual([{'name': 'volume_1', 'id': 'id_1'}], leader.wait())
+        self.assertEqual([{'name': 'volume_1'}], follower.wait())
+        self.assertEqual([{'name': 'volume_1'}],
+                         self.api.list_volumes(context, 'storage_1'))
+        self.assertEqual(1, self.driver.list_volumes.call_count)
+
+    def test_result_copied_when_shared(self):
+        self.mock_object(driver_api, 'copy',
+                         mock.Mock(deepcopy=mock.Mock(
+                             side_effect=copy.deepcopy)))
+
+        # Neither a follower nor the cache shares the result
+        self.api.list_volumes(context, 'storage_1')
+        self.assertFalse(driver_api.copy.deepcopy.called)
+
+        self.driver.list_volumes.side_effect = self._slow_call([])
+        leader = eventlet.spawn(self.api.list_volumes, context, 'storage_1')
+        follower = eventlet.spawn(self.api.list_volumes, context,
+                                  'storage_1')
+        eventlet.sleep(0)
+        self.release.send()
+        leader.wait()
+        follower.wait()
+        # The copy shared by the leader, and the one the follower returns
+        self.assertEqual(2, driver_api.copy.deepcopy.call_count)
+
+    def test_coalesce_disabled(self):
+        self.override_config('coalesce', False, 'driver_call')
+        self.override_config('result_cache_ttl', 30, 'driver_call')
+        self.api.get_storage(context, 'storage_1')
+        self.api.get_storage(context, 'storage_1')
+        self.assertEqual(2, self.driver.get_storage.call_count)
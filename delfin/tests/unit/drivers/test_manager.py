@@ -0,0 +1,118 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import context
+from delfin import test
+from delfin.drivers import manager
+
+
+class TestDriverCache(test.TestCase):
+
+    def setUp(self):
+        super(TestDriverCache, self).setUp()
+        self.now = 1000
+        self.mock_object(manager.time, 'time',
+                         mock.Mock(side_effect=lambda: self.now))
+        self.cache = manager.DriverCache()
+
+    def test_lru_eviction(self):
+        self.override_config('max_size', 2, 'driver_cache')
+        drivers = [mock.Mock() for _ in range(3)]
+        self.cache['storage_0'] = drivers[0]
+        self.cache['storage_1'] = drivers[1]
+        self.assertEqual(drivers[0], self.cache.get('storage_0'))
+
+        self.cache['storage_2'] = drivers[2]
+
+        self.assertEqual(['storage_0', 'storage_2'], list(self.cache))
+        drivers[1].close_connection.assert_called_once_with()
+        self.assertFalse(drivers[0].close_connection.called)
+        self.assertEqual({'size': 2, 'in_use': 0, 'hits': 1, 'misses': 0,
+                          'evictions': 1}, self.cache.get_stats())
+
+    def test_idle_eviction(self):
+        self.override_config('idle_timeout', 60, 'driver_cache')
+        idle_driver = mock.Mock()
+        idle_driver.close_connection.side_effect = Exception('logout failed')
+        used_driver = mock.Mock()
+        self.cache['storage_idle'] = idle_driver
+        self.cache['storage_used'] = used_driver
+        self.now += 30
+        self.cache.get('storage_used')
+        self.now += 40
+
+        self.assertIsNone(self.cache.get('storage_idle'))
+        self.assertEqual(used_driver, self.cache.get('storage_used'))
+        idle_driver.close_connection.assert_called_once_with()
+        self.assertEqual({'size': 1, 'in_use': 0, 'hits': 2, 'misses': 1,
+                          'evictions': 1}, self.cache.get_stats())
+
+    def test_evicted_driver_closed_when_released(self):
+        self.override_config('max_size', 1, 'driver_cache')
+        driver = mock.Mock()
+        self.cache.add('storage_0', driver, acquire=True)
+        self.cache.get('storage_0', acquire=True)
+        self.cache['storage_1'] = mock.Mock()
+
+        # Evicted while two calls use it
+        self.assertEqual(['storage_1'], list(self.cache))
+        self.cache.release(driver)
+        self.assertFalse(driver.close_connection.called)
+        self.cache.release(driver)
+        driver.close_connection.assert_called_once_with()
+        self.assertEqual(0, self.cache.get_stats()['in_use'])
+
+
+class TestDriverManager(test.TestCase):
+
+    def setUp(self):
+        super(TestDriverManager, self).setUp()
+        self.driver_manager = manager.DriverManager()
+        patcher = mock.patch.object(self.driver_manager, 'driver_factory',
+                                    manager.DriverCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_remove_driver(self):
+        driver = mock.Mock()
+        self.driver_manager.update_driver('storage_1', driver)
+
+        self.driver_manager.remove_driver('storage_1')
+        self.driver_manager.remove_driver('storage_1')
+
+        self.assertNotIn('storage_1', self.driver_manager.driver_factory)
+        driver.close_connection.assert_called_once_with()
+
+    def test_remove_driver_in_use(self):
+        driver = mock.Mock()
+        self.driver_manager.update_driver('storage_1', driver)
+
+        with self.driver_manager.use_driver(context, storage_id='storage_1'):
+            self.driver_manager.remove_driver('storage_1')
+            self.assertFalse(driver.close_connection.called)
+        driver.close_connection.assert_called_once_with()
+
+    @mock.patch.object(manager.DriverManager, 'get_driver')
+    def test_prewarm(self, mock_get_driver):
+        mock_get_driver.side_effect = [Exception('unreachable'), mock.Mock()]
+        self.driver_manager.update_driver('storage_0', mock.Mock())
+
+        self.driver_manager.prewarm(context, ['storage_0', 'storage_1',
+                                              'storage_2'])
+
+        mock_get_driver.assert_has_calls([
+            mock.call(context, storage_id='storage_1'),
+            mock.call(context, storage_id='storage_2')])
@@ -0,0 +1,75 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import requests
+
+from delfin import test
+from delfin.drivers.utils import http_transport
+
+
+class TestHttpTransport(test.TestCase):
+
+    def test_sessions_share_adapter(self):
+        session_1 = http_transport.create_session()
+        session_2 = http_transport.create_session()
+        adapter = session_1.get_adapter('https://10.0.0.1:8443/api')
+
+        self.assertIsInstance(adapter, http_transport.TransportAdapter)
+        self.assertIs(adapter, session_2.get_adapter('http://10.0.0.2/api'))
+        self.assertEqual('gzip, deflate',
+                         session_1.headers['Accept-Encoding'])
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(
+            http_transport.CONF.http_transport.max_connections_per_host,
+            adapter._pool_maxsize)
+        self.assertIn('GET', adapter.max_retries.allowed_methods)
+        self.assertNotIn('POST', adapter.max_retries.allowed_methods)
+        # Connection failures are not retried
+        self.assertEqual(0, adapter.max_retries.connect)
+
+        session_1.close()
+        self.assertIsNotNone(adapter.poolmanager.pools)
+
+    def test_get_timeout(self):
+        self.override_config('connect_timeout', 5, 'http_transport')
+        self.override_config('read_timeout', 20, 'http_transport')
+        self.override_config('write_timeout', 40, 'http_transport')
+        get_timeout = http_transport.TransportAdapter.get_timeout
+
+        self.assertEqual((5, 20), get_timeout('GET', None))
+        self.assertEqual((5, 40), get_timeout('POST', None))
+        self.assertEqual((5, 30), get_timeout('GET', 30))
+        self.assertEqual((1, 2), get_timeout('GET', (1, 2)))
+
+    @mock.patch.object(requests.adapters.HTTPAdapter, 'send')
+    def test_send_records_latency(self, mock_send):
+        self.mock_object(http_transport, 'LATENCY',
+                         http_transport.LatencyHistogram())
+        adapter = http_transport.get_adapter()
+        request = requests.Request(
+            'GET', 'https://10.0.0.1:8443/api/types').prepare()
+
+        adapter.send(request)
+        mock_send.side_effect = requests.exceptions.ConnectionError
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          adapter.send, request, timeout=30)
+
+        self.assertEqual(
+            (http_transport.CONF.http_transport.connect_timeout, 30),
+            mock_send.call_args[1]['timeout'])
+        stats = http_transport.get_latency_stats()['10.0.0.1:8443']
+        self.assertEqual(2, stats['count'])
+        self.assertEqual(2, stats['buckets']['0.05'])
@@ -0,0 +1,132 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import eventlet
+
+from delfin import exception
+from delfin import test
+from delfin.drivers.utils import ssh_client
+
+ACCESS_INFO = {
+    'ssh': {
+        'host': '110.143.132.231',
+        'port': 22,
+        'username': 'user',
+        'password': 'pass',
+    }
+}
+
+# Other tests replace SSHPool.get without restoring it
+SSHPOOL_GET = ssh_client.SSHPool.get
+
+
+def _fake_connection(active=True):
+    conn = mock.Mock()
+    conn.get_transport.return_value.is_active.return_value = active
+    conn.exec_command.return_value = (
+        mock.Mock(), mock.Mock(read=mock.Mock(return_value=b'ok')),
+        mock.Mock(read=mock.Mock(return_value=b'')))
+    return conn
+
+
+class TestSSHPool(test.TestCase):
+
+    def setUp(self):
+        super(TestSSHPool, self).setUp()
+        self.override_config('max_connections', 2, 'ssh_pool')
+        self.override_config('max_channels', 2, 'ssh_pool')
+        self.override_config('idle_timeout', 60, 'ssh_pool')
+        self.mock_object(ssh_client.SSHPool, 'get', SSHPOOL_GET)
+        self.now = 1000
+        self.mock_object(ssh_client.time, 'time',
+                         mock.Mock(side_effect=lambda: self.now))
+        self.pool = ssh_client.SSHPool(**ACCESS_INFO)
+        self.created = []
+
+        def _create():
+            conn = _fake_connection()
+            self.created.append(conn)
+            return conn
+
+        self.mock_object(self.pool, 'create', mock.Mock(side_effect=_create))
+
+    def test_connection_shared_by_channels(self):
+        conns = [self.pool.get() for _ in range(4)]
+
+        self.assertEqual(2, len(self.created))
+        self.assertEqual([self.created[0]] * 2 + [self.created[1]] * 2,
+                         conns)
+        for conn in conns:
+            self.pool.put(conn)
+        self.assertEqual(self.created[0], self.pool.get())
+        self.assertEqual(2, len(self.created))
+
+    def test_dead_connection_replaced(self):
+        conn = self.pool.get()
+        self.pool.put(conn)
+        conn.get_transport.return_value.is_active.return_value = False
+
+        new_conn = self.pool.get()
+
+        self.assertNotEqual(conn, new_conn)
+        self.assertTrue(conn.close.called)
+        self.assertEqual(1, self.pool.current_size)
+
+    def test_idle_connection_closed(self):
+        conn = self.pool.get()
+        self.pool.put(conn)
+        self.now += 61
+
+        new_conn = self.pool.get()
+
+        self.assertNotEqual(conn, new_conn)
+        self.assertTrue(conn.close.called)
+
+    def test_do_exec(self):
+        self.assertEqual('ok', self.pool.do_exec('showwsapi'))
+        self.created[0].exec_command.side_effect = Exception('channel closed')
+        self.assertRaises(exception.SSHException, self.pool.do_exec,
+                          'showwsapi')
+
+        self.pool.close_all()
+        self.assertTrue(self.created[0].close.called)
+        self.assertEqual(0, self.pool.current_size)
+
+    def test_waiter_woken_by_discard(self):
+        conns = [self.pool.get() for _ in range(4)]
+        waiter = eventlet.spawn(self.pool.get)
+        eventlet.sleep(0)
+        self.assertEqual(1, self.pool.channel.getting())
+
+        # The released connection is dead, a new one is created instead
+        conns[0].get_transport.return_value.is_active.return_value = False
+        self.pool.put(conns[0])
+        self.pool.put(conns[1])
+
+        self.assertEqual(self.created[2], waiter.wait())
+        self.assertTrue(self.created[0].close.called)
+        self.assertEqual(2, self.pool.current_size)
+
+    def test_close_all_in_use(self):
+        conn = self.pool.get()
+
+        self.pool.close_all()
+        self.assertFalse(conn.close.called)
+        self.assertNotEqual(conn, self.pool.get())
+
+        # The last user closes it
+        self.pool.put(conn)
+        self.assertTrue(conn.close.called)
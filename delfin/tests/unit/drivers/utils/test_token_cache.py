@@ -0,0 +1,87 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest import mock
+
+import fixtures
+
+from delfin import test
+from delfin.drivers.utils import token_cache
+
+KEY = token_cache.get_key('https://10.0.0.1:8443', 'user', 'cGFzc3dvcmQ=')
+
+
+class TestTokenCache(test.TestCase):
+
+    def setUp(self):
+        super(TestTokenCache, self).setUp()
+        self.override_config('enabled', True, 'token_cache')
+        self.override_config('path', self.useFixture(fixtures.TempDir()).path,
+                             'token_cache')
+        self.override_config('ttl', 600, 'token_cache')
+        self.override_config('refresh_ahead', 60, 'token_cache')
+        self.now = 1000.0
+        self.mock_object(token_cache, 'time',
+                         mock.Mock(time=lambda: self.now))
+        self.tokens = iter(['token_%s' % i for i in range(1, 10)])
+        self.login = mock.Mock(
+            side_effect=lambda: {'token': next(self.tokens)})
+
+    def test_disabled(self):
+        self.override_config('enabled', False, 'token_cache')
+        token_cache.get_or_login(KEY, self.login)
+        token_cache.get_or_login(KEY, self.login)
+        self.assertEqual(2, self.login.call_count)
+
+    def test_shared_session(self):
+        self.assertEqual({'token': 'token_1'},
+                         token_cache.get_or_login(KEY, self.login))
+        self.assertEqual({'token': 'token_1'},
+                         token_cache.get_or_login(KEY, self.login))
+        self.assertEqual(1, self.login.call_count)
+        file_name = os.path.join(token_cache.CONF.token_cache.path, KEY)
+        self.assertEqual(0o600, os.stat(file_name).st_mode & 0o777)
+
+    def test_invalid_token(self):
+        token_cache.get_or_login(KEY, self.login)
+        # The rejected session was already renewed by another caller
+        self.assertEqual({'token': 'token_1'},
+                         token_cache.get_or_login(KEY, self.login,
+                                                  'token_0'))
+        self.assertEqual({'token': 'token_2'},
+                         token_cache.get_or_login(KEY, self.login,
+                                                  'token_1'))
+        self.assertEqual(2, self.login.call_count)
+
+    def test_expired_session(self):
+        token_cache.get_or_login(KEY, self.login)
+        self.now += 600
+        self.assertEqual({'token': 'token_2'},
+                         token_cache.get_or_login(KEY, self.login))
+
+    def test_refresh_ahead(self):
+        token_cache.get_or_login(KEY, self.login)
+        self.now += 550
+        refresh_lock = token_cache._get_refresh_lock(KEY)
+
+        # Another caller is renewing the session
+        with refresh_lock:
+            self.assertEqual({'token': 'token_1'},
+                             token_cache.get_or_login(KEY, self.login))
+        self.assertEqual({'token': 'token_2'},
+                         token_cache.get_or_login(KEY, self.login))
+        self.assertEqual({'token': 'token_2'},
+                         token_cache.get_or_login(KEY, self.login))
+        self.assertEqual(2, self.login.call_count)
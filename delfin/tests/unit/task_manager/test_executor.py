@@ -0,0 +1,111 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import eventlet
+
+from delfin import context
+from delfin import exception
+from delfin import test
+from delfin.task_manager import executor
+
+
+class _ConcurrencyRecorder(object):
+    def __init__(self):
+        self.running = {}
+        self.max_running = {}
+
+    def task(self, *keys):
+        for key in keys:
+            self.running[key] = self.running.get(key, 0) + 1
+            self.max_running[key] = max(self.max_running.get(key, 0),
+                                        self.running[key])
+        eventlet.sleep(0.01)
+        for key in keys:
+            self.running[key] -= 1
+
+
+def _wait_all(sync_executor):
+    while True:
+        stats = sync_executor.get_stats()
+        if not stats['queued'] and not stats['running']:
+            return stats
+        eventlet.sleep(0.01)
+
+
+class TestSyncExecutor(test.TestCase):
+
+    def test_global_and_storage_limits(self):
+        self.override_config('max_workers', 3, 'sync_executor')
+        self.override_config('storage_max_workers', 1, 'sync_executor')
+        sync_executor = executor.SyncExecutor()
+        recorder = _ConcurrencyRecorder()
+
+        for i in range(5):
+            for storage_id in ('storage_1', 'storage_2', 'storage_3',
+                               'storage_4'):
+                sync_executor.submit(context, storage_id, recorder.task,
+                                     'all', storage_id)
+        stats = _wait_all(sync_executor)
+
+        self.assertEqual(3, recorder.max_running['all'])
+        self.assertEqual(1, recorder.max_running['storage_1'])
+        self.assertEqual(20, stats['completed'])
+        self.assertGreater(stats['max_wait'], 0)
+
+    @mock.patch('delfin.db.access_info_get_cached')
+    def test_vendor_limits(self, mock_access_info_get):
+        self.override_config('vendor_max_workers',
+                             {'hpe 3par': '1', 'hpe': '2'},
+                             'sync_executor')
+        access_infos = {
+            'storage_1': {'vendor': 'hpe', 'model': '3par'},
+            'storage_2': {'vendor': 'hpe', 'model': '3par'},
+            'storage_3': {'vendor': 'hpe', 'model': 'other'},
+            'storage_4': {'vendor': 'hpe', 'model': 'other'},
+            'storage_5': {'vendor': 'hpe', 'model': 'other'},
+        }
+
+        def _access_info_get(ctx, storage_id):
+            if storage_id not in access_infos:
+                raise exception.AccessInfoNotFound(storage_id)
+            return access_infos[storage_id]
+
+        mock_access_info_get.side_effect = _access_info_get
+        sync_executor = executor.SyncExecutor()
+        recorder = _ConcurrencyRecorder()
+
+        for storage_id in sorted(access_infos) + ['storage_6']:
+            info = access_infos.get(storage_id, {})
+            sync_executor.submit(context, storage_id, recorder.task,
+                                 '%s %s' % (info.get('vendor'),
+                                            info.get('model')))
+        _wait_all(sync_executor)
+
+        self.assertEqual(1, recorder.max_running['hpe 3par'])
+        self.assertEqual(2, recorder.max_running['hpe other'])
+
+    def test_failed_task_releases_slots(self):
+        self.override_config('max_workers', 1, 'sync_executor')
+        sync_executor = executor.SyncExecutor()
+        failed_task = mock.Mock(side_effect=Exception('sync failed'))
+        task = mock.Mock()
+
+        sync_executor.submit(context, 'storage_1', failed_task)
+        sync_executor.submit(context, 'storage_1', task)
+        stats = _wait_all(sync_executor)
+
+        self.assertTrue(task.called)
+        self.assertEqual(2, stats['completed'])
@@ -0,0 +1,50 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import coordination
+from delfin import service
+from delfin import test
+from delfin.task_manager import manager
+
+
+class TestTaskManager(test.TestCase):
+
+    def test_stop_leaves_hash_ring(self):
+        self.override_config('partition_enabled', True, 'coordination')
+        calls = mock.Mock()
+        self.mock_object(coordination.TASK_HASH_RING, 'leave',
+                         calls.leave)
+        self.mock_object(coordination.LOCK_COORDINATOR, 'stop',
+                         calls.stop_coordinator)
+        task_server = service.Service.create(binary='delfin-task',
+                                             coordination=True)
+        task_server.rpcserver = calls.rpcserver
+
+        task_server.stop()
+
+        # The storages move to other nodes before this one stops serving
+        self.assertEqual(['leave', 'rpcserver.stop', 'stop_coordinator'],
+                         [name for name, args, kwargs in calls.mock_calls])
+
+    def test_get_stats(self):
+        task_manager = manager.TaskManager()
+
+        stats = task_manager.get_stats()
+
+        # The counters of the base manager and of the task manager
+        self.assertEqual({'db_cache', 'sync_executor', 'driver_cache',
+                          'http_latency'}, set(stats))
+        self.assertEqual(0, stats['sync_executor']['queued'])
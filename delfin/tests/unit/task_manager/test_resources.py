@@ -13,13 +13,14 @@
 # limitations under the License.
 
 
+import copy
 from unittest import mock
 
 from delfin.drivers import fake_storage
 from delfin.task_manager.tasks import resources
 from delfin.task_manager.tasks.resources import StorageDeviceTask
 
-from delfin import test, context, coordination
+from delfin import test, context, exception
 
 storage = {
     'id': '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6',
@@ -64,6 +65,74 @@ vols_list = [{
 ]
 
 
+class TestSetSyncedIfOk(test.TestCase):
+    @mock.patch('delfin.db.storage_sync_status_set_if_idle')
+    def test_set_synced_if_ok(self, mock_set_if_idle):
+        mock_set_if_idle.return_value = True
+        resources.set_synced_if_ok(context, 'fake_id', 3)
+        self.assertEqual(300, mock_set_if_idle.call_args[0][2])
+
+    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.db.storage_sync_status_set_if_idle')
+    def test_set_synced_if_ok_failed(self, mock_set_if_idle,
+                                     mock_storage_get):
+        mock_set_if_idle.return_value = False
+        self.assertRaises(exception.StorageIsSyncing,
+                          resources.set_synced_if_ok, context, 'fake_id', 3)
+
+        mock_storage_get.side_effect = exception.StorageNotFound('fake_id')
+        self.assertRaises(exception.InvalidInput,
+                          resources.set_synced_if_ok, context, 'fake_id', 3)
+
+
+class TestStorageResourceTask(test.TestCase):
+    def setUp(self):
+        super(TestStorageResourceTask, self).setUp()
+        self.task = resources.StorageResourceTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+
+    def test_classify_resources(self):
+        db_vols = [
+            {'id': 'id_1', 'native_volume_id': 'vol_1', 'status': 'normal'},
+            {'id': 'id_2', 'native_volume_id': 'vol_2', 'status': 'normal'},
+            {'id': 'id_3', 'native_volume_id': 'vol_3', 'status': 'normal'},
+        ]
+        storage_vols = [
+            {'native_volume_id': 'vol_1', 'status': 'normal'},
+            {'native_volume_id': 'vol_2', 'status': 'error'},
+            {'native_volume_id': 'vol_4', 'status': 'normal'},
+        ]
+
+        add_list, update_list, delete_id_list = \
+            self.task._classify_resources(storage_vols, db_vols,
+                                          'native_volume_id')
+
+        self.assertEqual([{'native_volume_id': 'vol_4',
+                           'status': 'normal'}], add_list)
+        self.assertEqual([{'id': 'id_2', 'native_volume_id': 'vol_2',
+                           'status': 'error'}], update_list)
+        self.assertEqual(['id_3'], delete_id_list)
+
+    def test_classify_resources_with_duplicates(self):
+        db_vols = [
+            {'id': 'id_1', 'native_volume_id': 'vol_1', 'status': 'normal'},
+            {'id': 'id_2', 'native_volume_id': 'vol_1', 'status': 'normal'},
+        ]
+        storage_vols = [
+            {'native_volume_id': 'vol_1', 'status': 'error'},
+            {'native_volume_id': 'vol_1', 'status': 'normal'},
+        ]
+
+        add_list, update_list, delete_id_list = \
+            self.task._classify_resources(storage_vols, db_vols,
+                                          'native_volume_id')
+
+        self.assertEqual([], add_list)
+        self.assertEqual([{'id': 'id_1', 'native_volume_id': 'vol_1',
+                           'status': 'error'}], update_list)
+        self.assertEqual(['id_2'], delete_id_list)
+
+
 class TestStorageDeviceTask(test.TestCase):
     def setUp(self):
         super(TestStorageDeviceTask, self).setUp()
@@ -72,21 +141,23 @@ class TestStorageDeviceTask(test.TestCase):
             context, "12c2d52f-01bc-41f5-b73f-7abf6f38a2a6")
         self.mock_object(self.task_manager, 'driver_api', self.driver_api)
 
-    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.task_manager.rpcapi.TaskAPI', mock.Mock())
+    @mock.patch('delfin.db.storage_sync_status_decrease')
     @mock.patch('delfin.drivers.api.API.get_storage')
     @mock.patch('delfin.db.storage_update')
-    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.db.storage_get_cached')
     @mock.patch('delfin.db.storage_delete')
     @mock.patch('delfin.db.access_info_delete')
     @mock.patch('delfin.db.alert_source_delete')
     def test_sync_successful(self, alert_source_delete, access_info_delete,
                              mock_storage_delete, mock_storage_get,
-                             mock_storage_update, mock_get_storage, get_lock):
+                             mock_storage_update, mock_get_storage,
+                             mock_status_decrease):
         storage_obj = resources.StorageDeviceTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
 
         storage_obj.sync()
-        self.assertTrue(get_lock.called)
+        self.assertTrue(mock_status_decrease.called)
         self.assertTrue(mock_storage_get.called)
         self.assertTrue(mock_storage_delete.called)
         self.assertTrue(access_info_delete.called)
@@ -99,9 +170,11 @@ class TestStorageDeviceTask(test.TestCase):
         mock_get_storage.return_value = fake_storage_obj.get_storage(context)
         storage_obj.sync()
 
+    @mock.patch('delfin.task_manager.rpcapi.TaskAPI')
     @mock.patch('delfin.db.storage_delete')
     @mock.patch('delfin.db.alert_source_delete')
-    def test_successful_remove(self, mock_alert_del, mock_strg_del):
+    def test_successful_remove(self, mock_alert_del, mock_strg_del,
+                               mock_task_api):
         storage_obj = resources.StorageDeviceTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         storage_obj.remove()
@@ -110,10 +183,12 @@ class TestStorageDeviceTask(test.TestCase):
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         mock_alert_del.assert_called_with(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        mock_task_api.return_value.invalidate_db_cache.assert_called_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
 
 
 class TestStoragePoolTask(test.TestCase):
-    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.db.storage_sync_status_decrease')
     @mock.patch('delfin.drivers.api.API.list_storage_pools')
     @mock.patch('delfin.db.storage_pool_get_all')
     @mock.patch('delfin.db.storage_pools_delete')
@@ -121,14 +196,14 @@ class TestStoragePoolTask(test.TestCase):
     @mock.patch('delfin.db.storage_pools_create')
     def test_sync_successful(self, mock_pool_create, mock_pool_update,
                              mock_pool_del, mock_pool_get_all,
-                             mock_list_pools, get_lock):
+                             mock_list_pools, mock_status_decrease):
         pool_obj = resources.StoragePoolTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         pool_obj.sync()
 
         self.assertTrue(mock_list_pools.called)
         self.assertTrue(mock_pool_get_all.called)
-        self.assertTrue(get_lock.called)
+        self.assertTrue(mock_status_decrease.called)
 
         # collect the pools from fake_storage
         fake_storage_obj = fake_storage.FakeStorageDriver()
@@ -140,8 +215,16 @@ class TestStoragePoolTask(test.TestCase):
         pool_obj.sync()
         self.assertTrue(mock_pool_create.called)
 
+        # pools without changes are not updated
+        mock_list_pools.return_value = copy.deepcopy(pools_list)
+        mock_pool_get_all.return_value = pools_list
+        pool_obj.sync()
+        self.assertFalse(mock_pool_update.called)
+
         # update the new pool of DB
-        mock_list_pools.return_value = pools_list
+        changed_pools = copy.deepcopy(pools_list)
+        changed_pools[0]['used_capacity'] = 4096
+        mock_list_pools.return_value = changed_pools
         mock_pool_get_all.return_value = pools_list
         pool_obj.sync()
         self.assertTrue(mock_pool_update.called)
@@ -161,7 +244,7 @@ class TestStoragePoolTask(test.TestCase):
 
 
 class TestStorageVolumeTask(test.TestCase):
-    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.db.storage_sync_status_decrease')
     @mock.patch('delfin.drivers.api.API.list_volumes')
     @mock.patch('delfin.db.volume_get_all')
     @mock.patch('delfin.db.volumes_delete')
@@ -169,13 +252,13 @@ class TestStorageVolumeTask(test.TestCase):
     @mock.patch('delfin.db.volumes_create')
     def test_sync_successful(self, mock_vol_create, mock_vol_update,
                              mock_vol_del, mock_vol_get_all, mock_list_vols,
-                             get_lock):
+                             mock_status_decrease):
         vol_obj = resources.StorageVolumeTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         vol_obj.sync()
         self.assertTrue(mock_list_vols.called)
         self.assertTrue(mock_vol_get_all.called)
-        self.assertTrue(get_lock.called)
+        self.assertTrue(mock_status_decrease.called)
 
         # collect the volumes from fake_storage
         fake_storage_obj = fake_storage.FakeStorageDriver()
@@ -186,8 +269,16 @@ class TestStorageVolumeTask(test.TestCase):
         vol_obj.sync()
         self.assertTrue(mock_vol_create.called)
 
+        # volumes without changes are not updated
+        mock_list_vols.return_value = copy.deepcopy(vols_list)
+        mock_vol_get_all.return_value = vols_list
+        vol_obj.sync()
+        self.assertFalse(mock_vol_update.called)
+
         # update the volumes to DB
-        mock_list_vols.return_value = vols_list
+        changed_vols = copy.deepcopy(vols_list)
+        changed_vols[0]['status'] = 'error'
+        mock_list_vols.return_value = changed_vols
         mock_vol_get_all.return_value = vols_list
         vol_obj.sync()
         self.assertTrue(mock_vol_update.called)
@@ -198,6 +289,71 @@ class TestStorageVolumeTask(test.TestCase):
         vol_obj.sync()
         self.assertTrue(mock_vol_del.called)
 
+    @mock.patch('delfin.db.storage_sync_status_decrease')
+    @mock.patch('delfin.drivers.api.API.iter_volumes')
+    @mock.patch('delfin.db.volumes_get_by_native_ids')
+    @mock.patch('delfin.db.volumes_mark_synced')
+    @mock.patch('delfin.db.volumes_delete_not_synced')
+    @mock.patch('delfin.db.volumes_update')
+    @mock.patch('delfin.db.volumes_create')
+    def test_sync_paged(self, mock_vol_create, mock_vol_update,
+                        mock_delete_not_synced, mock_mark_synced,
+                        mock_get_by_native_ids, mock_iter_vols,
+                        mock_status_decrease):
+        self.flags(paged_sync_enabled=True, sync_page_size=2)
+        db_vols = [{'id': 'id_%s' % i,
+                    'native_volume_id': 'vol_%s' % i,
+                    'status': 'normal'} for i in range(3)]
+        storage_vols = copy.deepcopy(db_vols)
+        for vol in storage_vols:
+            vol.pop('id')
+        storage_vols[1]['status'] = 'error'
+        storage_vols.append({'native_volume_id': 'vol_3',
+                             'status': 'normal'})
+        mock_iter_vols.return_value = iter([storage_vols[:2],
+                                            storage_vols[2:]])
+        mock_get_by_native_ids.side_effect = [db_vols[:2], db_vols[2:]]
+
+        vol_obj = resources.StorageVolumeTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        vol_obj.sync()
+
+        mock_iter_vols.assert_called_once_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda', 2)
+        mock_get_by_native_ids.assert_any_call(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda',
+            ['vol_0', 'vol_1'])
+        self.assertEqual(['id_0', 'id_1'],
+                         mock_mark_synced.call_args_list[0][0][1])
+        self.assertEqual(['id_2'],
+                         mock_mark_synced.call_args_list[1][0][1])
+        mock_vol_update.assert_called_once_with(
+            context, [{'id': 'id_1', 'native_volume_id': 'vol_1',
+                       'status': 'error'}])
+        mock_vol_create.assert_called_once_with(
+            context, [{'native_volume_id': 'vol_3', 'status': 'normal'}])
+        self.assertTrue(mock_delete_not_synced.called)
+
+    @mock.patch('delfin.db.storage_sync_status_decrease')
+    @mock.patch('delfin.drivers.api.API.iter_volumes')
+    @mock.patch('delfin.db.volumes_delete_not_synced')
+    def test_sync_paged_no_page(self, mock_delete_not_synced,
+                                mock_iter_vols, mock_status_decrease):
+        self.flags(paged_sync_enabled=True, sync_page_size=2)
+        vol_obj = resources.StorageVolumeTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+
+        # An iteration which stopped early keeps the volumes
+        mock_iter_vols.return_value = iter([])
+        vol_obj.sync()
+        self.assertFalse(mock_delete_not_synced.called)
+
+        # A storage without volumes yields an empty page
+        mock_iter_vols.return_value = iter([[]])
+        vol_obj.sync()
+        mock_delete_not_synced.assert_called_once_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda', mock.ANY)
+
     @mock.patch('delfin.db.volume_delete_by_storage')
     def test_remove(self, mock_vol_del):
         vol_obj = resources.StorageVolumeTask(
@@ -0,0 +1,125 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from unittest import mock
+
+from delfin import context
+from delfin import coordination
+from delfin import exception
+from delfin import test
+from delfin.common import constants
+from delfin.task_manager import scheduler
+from delfin.task_manager.tasks import resources
+
+# 2020-01-01 00:00:00
+NOW = 1577836800
+
+
+def _fake_storage(storage_id, seconds_ago, sync_status=0):
+    last_update = datetime.datetime.utcfromtimestamp(NOW - seconds_ago)
+    return {
+        'id': storage_id,
+        'sync_status': sync_status,
+        'created_at': last_update,
+        'updated_at': last_update,
+    }
+
+
+class TestSyncScheduler(test.TestCase):
+    def setUp(self):
+        super(TestSyncScheduler, self).setUp()
+        self.override_config('enabled', True, 'periodic_sync')
+        self.task_rpcapi = mock.Mock()
+        self.scheduler = scheduler.SyncScheduler(self.task_rpcapi)
+
+    def test_get_interval(self):
+        self.override_config('storage_intervals',
+                             {'storage_1': '600', 'storage_2': 'invalid'},
+                             'periodic_sync')
+        self.assertEqual(600, self.scheduler.get_interval('storage_1'))
+        self.assertEqual(3600, self.scheduler.get_interval('storage_2'))
+        self.assertEqual(3600, self.scheduler.get_interval('storage_3'))
+
+    def test_offsets_spread_over_interval(self):
+        offsets = [self.scheduler.get_offset('storage_%s' % i, 3600)
+                   for i in range(1000)]
+        self.assertTrue(all(0 <= offset < 3600 for offset in offsets))
+        # Offsets should land in every tenth of the interval
+        self.assertEqual(10, len(set(offset // 360 for offset in offsets)))
+        self.assertEqual(offsets[0],
+                         self.scheduler.get_offset('storage_0', 3600))
+
+    def test_get_due_storages(self):
+        fresh = _fake_storage('storage_fresh', 0)
+        stale = _fake_storage('storage_stale', 3600)
+        staler = _fake_storage('storage_staler', 7200)
+
+        due = self.scheduler.get_due_storages([fresh, stale, staler], NOW)
+
+        self.assertEqual([staler, stale], due)
+
+    @mock.patch.object(resources, 'set_synced_if_ok')
+    @mock.patch('delfin.db.storage_get_all')
+    def test_schedule_with_max_in_flight(self, mock_get_all, mock_set_synced):
+        self.override_config('max_in_flight', 2, 'periodic_sync')
+        mock_get_all.return_value = [
+            _fake_storage('storage_syncing', 10,
+                          sync_status=constants.ResourceSync.START),
+            _fake_storage('storage_1', 7200),
+            _fake_storage('storage_2', 3600),
+        ]
+        self.mock_object(scheduler.timeutils, 'utcnow_ts',
+                         mock.Mock(return_value=NOW))
+
+        self.scheduler.schedule(context)
+
+        mock_set_synced.assert_called_once_with(
+            context, 'storage_1',
+            len(resources.StorageResourceTask.__subclasses__()))
+        self.assertEqual(len(resources.StorageResourceTask.__subclasses__()),
+                         self.task_rpcapi.sync_storage_resource.call_count)
+
+    @mock.patch.object(resources, 'set_synced_if_ok')
+    @mock.patch('delfin.db.storage_get_all')
+    def test_schedule_partitioned(self, mock_get_all, mock_set_synced):
+        self.override_config('partition_enabled', True, 'coordination')
+        self.override_config('host', 'host-b')
+        self.override_config('max_in_flight', 3, 'periodic_sync')
+        self.mock_object(coordination.TASK_HASH_RING, 'get_members',
+                         mock.Mock(return_value={'host-a', 'host-b'}))
+        owners = {'storage_1': 'host-a', 'storage_2': 'host-b',
+                  'storage_3': 'host-b', 'storage_4': 'host-b'}
+        self.mock_object(coordination.TASK_HASH_RING, 'get_owner',
+                         mock.Mock(side_effect=owners.get))
+        mock_get_all.return_value = [
+            _fake_storage(storage_id, 7200) for storage_id in sorted(owners)]
+        self.mock_object(scheduler.timeutils, 'utcnow_ts',
+                         mock.Mock(return_value=NOW))
+
+        self.scheduler.schedule(context)
+
+        # host-a gets 2 of the 3 syncs, host-b the 1 left
+        self.assertEqual(1, self.scheduler.get_max_in_flight())
+        mock_set_synced.assert_called_once_with(
+            context, 'storage_2',
+            len(resources.StorageResourceTask.__subclasses__()))
+
+    @mock.patch.object(resources, 'set_synced_if_ok')
+    def test_sync_storage_is_syncing(self, mock_set_synced):
+        mock_set_synced.side_effect = exception.StorageIsSyncing('storage_1')
+
+        self.scheduler.sync_storage(context, 'storage_1')
+
+        self.assertFalse(self.task_rpcapi.sync_storage_resource.called)
@@ -19,6 +19,7 @@ from tooz import coordination as tooz_coordination
 from tooz import locking as tooz_locking
 
 from delfin import coordination
+from delfin import exception
 from delfin import test
 
 
@@ -118,3 +119,81 @@ class CoordinationTestCase(test.TestCase):
         bar.__getitem__.return_value = 8
         func(foo, bar)
         get_lock.assert_called_with('lock-func-7-8')
+
+
+class ConsistentHashingTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ConsistentHashingTestCase, self).setUp()
+        self.get_coordinator = self.mock_object(tooz_coordination,
+                                                'get_coordinator')
+        self.crd = self.get_coordinator.return_value
+        self.members = set()
+        self.crd.get_members.side_effect = \
+            lambda group_id: mock.Mock(get=lambda: set(self.members))
+        self.hash_ring = coordination.ConsistentHashing('group')
+
+    def _set_hosts(self, *hosts):
+        self.members = set(
+            (coordination.ConsistentHashing.MEMBER_PREFIX + host)
+            .encode('ascii') for host in hosts)
+
+    def test_join(self):
+        self.crd.create_group.return_value.get.side_effect = \
+            tooz_coordination.GroupAlreadyExist(b'group')
+
+        self.hash_ring.join('host1')
+
+        self.get_coordinator.assert_called_once_with(
+            mock.ANY, b'delfin-member-host1', timeout=mock.ANY)
+        self.crd.join_group.assert_called_once_with(b'group')
+
+    def test_leave(self):
+        self.hash_ring.join('host1')
+        self.hash_ring.leave()
+
+        self.crd.leave_group.assert_called_once_with(b'group')
+        self.crd.stop.assert_called_once_with()
+        self.assertIsNone(self.hash_ring.member)
+        # Leaving twice is harmless
+        self.hash_ring.leave()
+        self.crd.leave_group.assert_called_once_with(b'group')
+
+    def test_get_owner_without_members(self):
+        self.hash_ring.join('host1')
+
+        self.assertIsNone(self.hash_ring.get_owner('storage_1'))
+
+    def test_get_owner_rebalance(self):
+        self.hash_ring.join('host1')
+        self._set_hosts('host1', 'host2', 'host3')
+        storage_ids = ['storage_%s' % i for i in range(300)]
+        owners = dict((storage_id, self.hash_ring.get_owner(storage_id))
+                      for storage_id in storage_ids)
+        self.assertEqual({'host1', 'host2', 'host3'}, set(owners.values()))
+
+        self._set_hosts('host1', 'host2')
+        self.assertEqual({'host1', 'host2'},
+                         self.hash_ring.get_members(refresh=True))
+        for storage_id in storage_ids:
+            owner = self.hash_ring.get_owner(storage_id)
+            if owners[storage_id] != 'host3':
+                # Only the storages of the leaving host move
+                self.assertEqual(owners[storage_id], owner)
+            else:
+                self.assertIn(owner, ('host1', 'host2'))
+
+    def test_members_cached(self):
+        self.hash_ring.join('host1')
+        self._set_hosts('host1')
+        self.hash_ring.get_owner('storage_1')
+        self._set_hosts('host2')
+
+        self.assertEqual('host1', self.hash_ring.get_owner('storage_1'))
+        self.assertEqual(1, self.crd.get_members.call_count)
+
+    def test_coordinator_not_started(self):
+        hash_ring = coordination.ConsistentHashing(
+            'group', coordinator=coordination.Coordinator())
+        self.assertRaises(exception.CoordinatorNotStarted,
+                          hash_ring.get_owner, 'storage_1')
@@ -16,10 +16,14 @@
 
 """Test of Base Manager for Manila."""
 
+import logging
+from unittest import mock
+
 import ddt
 from oslo_utils import importutils
 
 from delfin import manager
+from delfin.db import cache as db_cache
 from delfin import test
 
 
@@ -54,3 +58,18 @@ class ManagerTestCase(test.TestCase):
 
         fake_manager.run_periodic_tasks.assert_called_once_with(
             fake_context, raise_on_error=raise_on_error)
+
+    @ddt.data(True, False)
+    def test_report_stats(self, debug):
+        fake_manager = manager.Manager(self.host, self.db_driver)
+        self.mock_object(db_cache, 'get_stats',
+                         mock.Mock(return_value={'storage': {'hits': 1}}))
+        self.mock_object(manager.LOG, 'isEnabledFor',
+                         mock.Mock(return_value=debug))
+        self.mock_object(manager.LOG, 'debug')
+
+        fake_manager.report_stats('fake_context')
+
+        manager.LOG.isEnabledFor.assert_called_once_with(logging.DEBUG)
+        self.assertEqual(debug, db_cache.get_stats.called)
+        self.assertEqual(debug, manager.LOG.debug.called)
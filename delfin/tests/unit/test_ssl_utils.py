@@ -0,0 +1,68 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest import mock
+
+import fixtures
+import requests
+
+from delfin import ssl_utils
+from delfin import test
+
+
+class TestSSLUtils(test.TestCase):
+
+    def setUp(self):
+        super(TestSSLUtils, self).setUp()
+        self.ca_path = self.useFixture(fixtures.TempDir()).path + '/'
+        open(os.path.join(self.ca_path, 'ca.pem'), 'w').close()
+        self.useFixture(fixtures.MockPatchObject(ssl_utils, '_reloaded', {}))
+        self.useFixture(fixtures.MockPatchObject(ssl_utils, '_contexts', {}))
+
+    def _touch_ca_path(self):
+        mtime = os.stat(self.ca_path).st_mtime + 10
+        os.utime(self.ca_path, (mtime, mtime))
+
+    @mock.patch.object(ssl_utils, '_load_cert')
+    def test_reload_certificate_on_change(self, mock_load_cert):
+        ssl_utils.reload_certificate(self.ca_path)
+        ssl_utils.reload_certificate(self.ca_path)
+        self.assertEqual(1, mock_load_cert.call_count)
+
+        self._touch_ca_path()
+        ssl_utils.reload_certificate(self.ca_path)
+        self.assertEqual(2, mock_load_cert.call_count)
+
+    def test_get_ssl_context(self):
+        context = ssl_utils.get_ssl_context(self.ca_path)
+        self.assertIs(context, ssl_utils.get_ssl_context(self.ca_path))
+
+        self._touch_ca_path()
+        self.assertIsNot(context, ssl_utils.get_ssl_context(self.ca_path))
+
+    def test_adapter_uses_shared_context(self):
+        adapter = ssl_utils.get_host_name_ignore_adapter()
+        request = requests.Request(
+            'GET', 'https://10.0.0.1:8443/api/types').prepare()
+
+        _, pool_kwargs = adapter.build_connection_pool_key_attributes(
+            request, self.ca_path)
+        self.assertNotIn('ca_cert_dir', pool_kwargs)
+        self.assertIs(ssl_utils.get_ssl_context(self.ca_path),
+                      pool_kwargs['ssl_context'])
+
+        _, pool_kwargs = adapter.build_connection_pool_key_attributes(
+            request, False)
+        self.assertNotIn('ssl_context', pool_kwargs)